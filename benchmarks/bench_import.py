@@ -0,0 +1,57 @@
+# ===== Engine Import-Time Benchmark =====
+# Imports the engine package in fresh interpreters and checks that cold start
+# stays under budget and does not drag in the heavy optional dependencies.
+#
+#   python benchmarks/bench_import.py [--runs 10] [--budget-ms 100]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+HEAVY_MODULES = ["requests", "selenium", "lxml", "numpy", "tkinter"]
+
+PROBE = f"""
+import sys, time, json
+start = time.perf_counter()
+import engine
+elapsed = time.perf_counter() - start
+loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "loaded": loaded}}))
+"""
+
+def run_probe():
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(SRC_DIR))
+    output = subprocess.run([sys.executable, "-c", PROBE], env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of the engine package.")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    # The first run also writes bytecode caches; keep it out of the numbers.
+    run_probe()
+    results = [run_probe() for _ in range(args.runs)]
+
+    timings = sorted(result["seconds"] * 1000 for result in results)
+    loaded = sorted({module for result in results for module in result["loaded"]})
+    median = timings[len(timings) // 2]
+
+    print(f"engine import: min {timings[0]:.1f} ms, median {median:.1f} ms, max {timings[-1]:.1f} ms over {args.runs} runs")
+
+    failed = False
+    if median > args.budget_ms:
+        print(f"FAIL: median import time exceeds {args.budget_ms:.0f} ms budget")
+        failed = True
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(loaded)}")
+        failed = True
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
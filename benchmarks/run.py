@@ -0,0 +1,256 @@
+# ===== End-to-End Benchmark Harness =====
+# Times each pipeline stage against the local stub server at several input
+# sizes and writes the results as JSON, so runs can be compared across
+# versions. Needs no network access.
+#
+#   python benchmarks/run.py --latency-ms 50
+#   python benchmarks/run.py --compare benchmarks/results/bench-20261018-120000.json
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubServer
+
+NETWORK_SIZES = [1, 5, 20, 50]
+COMPUTE_SIZES = [1, 10, 100, 1000]
+CORPUS_SIZES = [1000, 10000, 100000]
+SEARCH_QUERIES = ["chicken breast", "rice", "broccoli", "egg", "butter", "tomatoes", "potatoes", "cheddar cheese"]
+
+# ===== Environment =====
+
+# Points the engine at the stub, keeps every store it writes (caches,
+# corpus, learned resolver) in `workdir`, gives it no offline food database,
+# and lifts the rate limits so pacing does not skew timings.
+# Recipe searches always go to the stub; the local corpus has its own stage.
+def configure_environment(stub, workdir):
+    os.environ.update({
+        "RECIPE_USDA_BASE_URL": f"{stub.base_url}/fdc/v1",
+        "RECIPE_SPOONACULAR_BASE_URL": stub.base_url,
+        "USDA_API_KEY": "stub",
+        "SPOONACULAR_API_KEY": "stub",
+        "RECIPE_CACHE_PATH": os.path.join(workdir, "cache.sqlite3"),
+        "RECIPE_STORE_PATH": os.path.join(workdir, "recipes.sqlite3"),
+        "RECIPE_FOOD_DB_PATH": os.path.join(workdir, "no-food-db.sqlite3"),
+        "RECIPE_CORPUS_PATH": os.path.join(workdir, "corpus.sqlite3"),
+        "RECIPE_RESOLVER_PATH": os.path.join(workdir, "resolver.sqlite3"),
+        "RECIPE_CORPUS_MODE": "remote",
+        "RECIPE_USDA_REQUESTS_PER_HOUR": str(10 ** 9),
+        "RECIPE_SPOONACULAR_POINTS_PER_MINUTE": str(10 ** 9)
+    })
+
+# ===== Stages =====
+
+# Each stage is a prepare function: given a size it sets up inputs outside
+# the timed region and returns the call to time. Network stages start from a
+# cold response cache on every repetition.
+def build_stages(engine):
+    food_ids = [food["fdcId"] for food in engine_fixture_foods()]
+
+    def cold_cache():
+        engine.get_response_cache().clear()
+        engine.get_recipe_store().clear()
+
+    def fetch_recipe_data(size):
+        cold_cache()
+        return lambda: engine.fetch_recipe_data(["tomatoes", "pasta"], number=size)
+
+    def scrape_recipe_details(size):
+        urls, _ = engine.fetch_recipe_data(["tomatoes", "pasta"], number=size)
+        cold_cache()
+        return lambda: engine.scrape_recipe_details(urls)
+
+    # Search through scraping, phase after phase versus pipelined.
+    def recipe_search(size):
+        cold_cache()
+        return lambda: engine.scrape_recipe_details(engine.fetch_recipe_data(["tomatoes", "pasta"], number=size)[0])
+
+    def recipe_pipeline(size):
+        cold_cache()
+        return lambda: list(engine.stream_recipes(["tomatoes", "pasta"], number=size))
+
+    def wide_search(size):
+        cold_cache()
+        queries = [f"{SEARCH_QUERIES[i % len(SEARCH_QUERIES)]} {i}" for i in range(size)]
+        return lambda: [engine.search_foods(query) for query in queries]
+
+    def food_search_narrow(size):
+        cold_cache()
+        ids = [food_ids[i % len(food_ids)] + 10 ** 6 * (i // len(food_ids)) for i in range(size)]
+        return lambda: engine.fetch_food_details(ids)
+
+    def nutrition(size):
+        foods = [engine_fixture_foods()[i % len(food_ids)] for i in range(size)]
+        return lambda: [engine.nutrition(food, 1.5) for food in foods]
+
+    # Corpora are built once per size, outside the timed region.
+    corpora = {}
+
+    def corpus_find(size):
+        from engine.corpus import RecipeCorpus
+
+        if size not in corpora:
+            corpora[size] = RecipeCorpus(":memory:")
+            corpora[size].add_many(synthetic_recipes(size))
+        corpus = corpora[size]
+        return lambda: corpus.find(["chicken breast", "rice", "egg"], 10)
+
+    def recipe_total(size):
+        vectors = [engine.food_vector(engine_fixture_foods()[i % len(food_ids)]) for i in range(size)]
+        grams = [100 + i % 50 for i in range(size)]
+        return lambda: engine.recipe_total(vectors, grams)
+
+    return [
+        ("fetch_recipe_data", NETWORK_SIZES, fetch_recipe_data),
+        ("scrape_recipe_details", NETWORK_SIZES, scrape_recipe_details),
+        ("recipe_search", NETWORK_SIZES, recipe_search),
+        ("recipe_pipeline", NETWORK_SIZES, recipe_pipeline),
+        ("wide_search", NETWORK_SIZES, wide_search),
+        ("food_search_narrow", NETWORK_SIZES, food_search_narrow),
+        ("nutrition", COMPUTE_SIZES, nutrition),
+        ("recipe_total", COMPUTE_SIZES, recipe_total),
+        ("corpus_find", CORPUS_SIZES, corpus_find)
+    ]
+
+# Recipes over a long-tailed ingredient vocabulary, like real recipe sites:
+# a few staples appear everywhere and most ingredients are rare.
+def synthetic_recipes(size):
+    rng = random.Random(size)
+    vocabulary = ["salt", "butter", "egg", "rice", "chicken breast", "garlic", "onion", "tomatoes"] + [f"ingredient {i}" for i in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    return [
+        {"id": i, "title": f"Recipe {i}", "url": f"https://example.invalid/recipe/{i}", "ingredients": rng.choices(vocabulary, weights, k=rng.randint(4, 15))}
+        for i in range(size)
+    ]
+
+_fixture_foods = None
+
+def engine_fixture_foods():
+    global _fixture_foods
+    if _fixture_foods is None:
+        with open(os.path.join(BENCH_DIR, "fixtures", "usda_foods.json"), encoding="utf-8") as f:
+            _fixture_foods = json.load(f)["foods"]
+    return _fixture_foods
+
+# ===== Running =====
+
+def time_stage(prepare, size, repeats, warmup):
+    # Warm-up runs absorb one-time costs such as lazy imports.
+    for _ in range(warmup):
+        prepare(size)()
+
+    timings = []
+    for _ in range(repeats):
+        run = prepare(size)
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def run_benchmarks(args):
+    stub = StubServer(latency_ms=args.latency_ms, page_latency_ms=args.page_latency_ms).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(stub, workdir)
+        import engine
+
+        results = []
+        for name, sizes, prepare in build_stages(engine):
+            if args.stages and name not in args.stages:
+                continue
+            for size in args.sizes or sizes:
+                timings = time_stage(prepare, size, args.repeats, args.warmup)
+                stub.requests.clear()
+                prepare(size)()
+                results.append({
+                    "stage": name,
+                    "size": size,
+                    "repeats": args.repeats,
+                    "median_s": statistics.median(timings),
+                    "min_s": min(timings),
+                    "max_s": max(timings),
+                    "upstream_requests": dict(stub.requests)
+                })
+                print(f"{name:<22} size {size:>5}: median {results[-1]['median_s'] * 1000:9.2f} ms  (min {results[-1]['min_s'] * 1000:.2f} ms)")
+
+        engine.get_response_cache().close()
+        engine.get_recipe_store().close()
+
+    stub.stop()
+    return results
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# ===== Comparing =====
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["stage"], r["size"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nComparison against {baseline_path}:")
+    for result in results:
+        old = baseline.get((result["stage"], result["size"]))
+        if old is None or old["median_s"] == 0:
+            continue
+        ratio = result["median_s"] / old["median_s"]
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(f"{result['stage']:<22} size {result['size']:>5}: {old['median_s'] * 1000:9.2f} -> {result['median_s'] * 1000:9.2f} ms  x{ratio:.2f} {flag}")
+        if flag:
+            regressions.append(result)
+
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each pipeline stage against a local API stand-in.")
+    parser.add_argument("--latency-ms", type=float, default=50, help="artificial delay per API response")
+    parser.add_argument("--page-latency-ms", type=float, default=None, help="artificial delay per recipe page")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed runs per stage and size")
+    parser.add_argument("--stages", nargs="*", help="only run these stages")
+    parser.add_argument("--sizes", nargs="*", type=int, help="override the input sizes for every stage")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="slowdown ratio above which a stage counts as a regression")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args)
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("bench-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": args.latency_ms,
+            "page_latency_ms": args.page_latency_ms,
+            "results": results
+        }, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+# ===== GUI Soak Benchmark =====
+# Drives the Tk app through a long run of meals and recipe searches against
+# the local stub server and checks that the widget count, resident memory
+# and per-operation latency stay flat. Needs a display; on a headless
+# machine run it under Xvfb.
+#
+#   python benchmarks/soak.py --operations 1000
+#   xvfb-run python benchmarks/soak.py
+
+import argparse
+import gc
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+sys.path.insert(0, os.path.abspath(SRC_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from stub_server import StubServer
+from run import SEARCH_QUERIES, configure_environment, git_revision
+
+OPERATION_TIMEOUT_SECONDS = 60
+MEAL_SIZE = 3
+RECIPES_PER_SEARCH = 5
+
+# ===== Probes =====
+
+def widget_count(widget):
+    return 1 + sum(widget_count(child) for child in widget.winfo_children())
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS, but it still shows growth.
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+# ===== Driving the App =====
+
+class Dialogs:
+    def __init__(self):
+        self.shown = []
+
+    def record(self, kind):
+        def show(title, message, **options):
+            self.shown.append({"kind": kind, "title": title, "message": message})
+        return show
+
+# Runs Tk's event loop until `done()` holds, like the user waiting for the
+# app to settle.
+def pump(app, done):
+    deadline = time.perf_counter() + OPERATION_TIMEOUT_SECONDS
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("operation did not finish")
+        app.root.update()
+        time.sleep(0.001)
+
+def settled(app):
+    return not app.task_runner.busy
+
+def run_meal(app, step):
+    app.Recipe_Maker_Reset()
+    for offset in range(MEAL_SIZE):
+        query = SEARCH_QUERIES[(step + offset) % len(SEARCH_QUERIES)]
+        app.F_Entry.insert(0, query)
+        app.request_suggestions()
+        pump(app, lambda: settled(app))
+
+        app.G_Entry.insert(0, str(50 + 10 * offset))
+        app.Recipe_Maker()
+
+    app.resolve_meal()
+    while True:
+        pump(app, lambda: settled(app))
+        if app.pending_choice is None:
+            break
+        app.choose_food()
+
+def run_recipe_search(app, step):
+    app.entry.delete(0, "end")
+    app.entry.insert(0, ", ".join(SEARCH_QUERIES[step % len(SEARCH_QUERIES)].split()))
+    app.recipe_count.set(RECIPES_PER_SEARCH)
+    app.display_recipes()
+    pump(app, lambda: settled(app))
+
+    if app.choices:
+        app.clicked.set(app.choices[step % len(app.choices)])
+        app.insert_nutrition()
+    app.show_recipe_page(0)
+
+def soak(args):
+    stub = StubServer(latency_ms=args.latency_ms).start()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        configure_environment(stub, workdir)
+
+        import tkinter
+        try:
+            import main as app
+        except tkinter.TclError as e:
+            stub.stop()
+            raise SystemExit(f"Cannot open a display for the soak run: {e}")
+
+        # Modal dialogs would stall the run; they are recorded instead.
+        dialogs = Dialogs()
+        for kind in ("showwarning", "showerror", "showinfo"):
+            setattr(app.messagebox, kind, dialogs.record(kind))
+
+        samples = []
+        latencies = []
+        for step in range(args.operations):
+            kind = "meal" if step % 2 == 0 else "recipe_search"
+            start = time.perf_counter()
+            (run_meal if kind == "meal" else run_recipe_search)(app, step)
+            latencies.append({"kind": kind, "seconds": time.perf_counter() - start})
+
+            if (step + 1) % args.sample_every == 0:
+                gc.collect()
+                app.root.update()
+                samples.append({"operations": step + 1, "widgets": widget_count(app.root), "rss_bytes": rss_bytes()})
+                print(f"{step + 1:>6} ops: {samples[-1]['widgets']} widgets, {samples[-1]['rss_bytes'] / 2 ** 20:.1f} MiB RSS")
+
+        app.close_app()
+
+    stub.stop()
+    return samples, latencies, dialogs.shown
+
+# ===== Checking =====
+
+def median_ms(latencies, kind):
+    return statistics.median(entry["seconds"] for entry in latencies if entry["kind"] == kind) * 1000
+
+# Compares the end of the run with a baseline taken after warm-up: the first
+# `warmup` share of operations fills caches and lazy imports, and is left out.
+def check(samples, latencies, args):
+    baseline = next((s for s in samples if s["operations"] >= args.operations * args.warmup), samples[0])
+    final = samples[-1]
+    window = max(1, int(len(latencies) * args.warmup))
+    early = latencies[window:2 * window]
+    late = latencies[-window:]
+
+    failures = []
+    if final["widgets"] > baseline["widgets"]:
+        failures.append(f"widget count grew from {baseline['widgets']} to {final['widgets']}")
+
+    growth_mib = (final["rss_bytes"] - baseline["rss_bytes"]) / 2 ** 20
+    if growth_mib > args.max_rss_growth_mb:
+        failures.append(f"RSS grew by {growth_mib:.1f} MiB (limit {args.max_rss_growth_mb} MiB)")
+
+    for kind in ("meal", "recipe_search"):
+        before, after = median_ms(early, kind), median_ms(late, kind)
+        print(f"{kind:<14} median {before:8.2f} ms -> {after:8.2f} ms")
+        if after > before * args.max_latency_ratio:
+            failures.append(f"{kind} median latency rose from {before:.2f} ms to {after:.2f} ms")
+
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that a long GUI session keeps widget count, memory and latency flat.")
+    parser.add_argument("--operations", type=int, default=1000, help="meals and recipe searches, alternating")
+    parser.add_argument("--latency-ms", type=float, default=0, help="artificial delay per API response")
+    parser.add_argument("--sample-every", type=int, default=50, help="operations between widget and RSS samples")
+    parser.add_argument("--warmup", type=float, default=0.1, help="share of operations excluded as warm-up")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=25.0)
+    parser.add_argument("--max-latency-ratio", type=float, default=1.5)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/soak-<timestamp>.json)")
+    args = parser.parse_args()
+
+    if args.operations < 2 * args.sample_every:
+        parser.error("--operations must cover at least two samples")
+
+    samples, latencies, dialogs = soak(args)
+    failures = check(samples, latencies, args)
+    if dialogs:
+        failures.append(f"{len(dialogs)} dialogs were shown, first: {dialogs[0]['title']}: {dialogs[0]['message']}")
+
+    output = args.output or os.path.join(RESULTS_DIR, time.strftime("soak-%Y%m%d-%H%M%S.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "operations": args.operations,
+            "samples": samples,
+            "latencies": latencies,
+            "dialogs": dialogs,
+            "failures": failures
+        }, f, indent=2)
+    print(f"\nWrote {output}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
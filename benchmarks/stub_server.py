@@ -0,0 +1,196 @@
+# ===== Local API Stand-In =====
+# Serves the recorded USDA and Spoonacular fixtures in benchmarks/fixtures so
+# the engine can be exercised with no network access. Point the engine at it
+# with RECIPE_USDA_BASE_URL=http://host:port/fdc/v1 and
+# RECIPE_SPOONACULAR_BASE_URL=http://host:port.
+#
+#   python benchmarks/stub_server.py --port 8765 --latency-ms 80
+
+import argparse
+import copy
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from string import Template
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read() if name.endswith(".html") else json.load(f)
+
+# ===== Fixture Data =====
+
+class Fixtures:
+    def __init__(self):
+        self.foods = load_fixture("usda_foods.json")["foods"]
+        self.recipes = load_fixture("find_by_ingredients.json")
+        self.information = load_fixture("recipe_information.json")
+        self.page = Template(load_fixture("recipe_page.html"))
+
+    # Ids outside the recorded set are served as copies of a recorded food,
+    # so any input size can be benchmarked.
+    def food(self, fdc_id):
+        food = copy.deepcopy(self.foods[fdc_id % len(self.foods)])
+        food["fdcId"] = fdc_id
+        return food
+
+    def search(self, query):
+        tokens = re.findall(r"[a-z]+", query.lower())
+        hits = [food for food in self.foods if any(token in food["description"].lower() for token in tokens)] or self.foods
+        return {
+            "totalHits": len(hits),
+            "foods": [{"fdcId": food["fdcId"], "description": food["description"], "dataType": food["dataType"]} for food in hits]
+        }
+
+    def find_by_ingredients(self, number):
+        results = []
+        for i in range(number):
+            recipe = copy.deepcopy(self.recipes[i % len(self.recipes)])
+            recipe["id"] = 700000 + i
+            recipe["title"] = f"{recipe['title']} #{i + 1}"
+            results.append(recipe)
+        return results
+
+    def recipe_information(self, recipe_id, base_url):
+        info = copy.deepcopy(self.information)
+        info["id"] = recipe_id
+        info["title"] = f"{info['title']} #{recipe_id - 700000 + 1}"
+        info["spoonacularSourceUrl"] = f"{base_url}/recipe/{recipe_id}"
+        return info
+
+    def recipe_page(self, recipe_id):
+        info = self.recipe_information(recipe_id, "")
+        ingredients = info["extendedIngredients"]
+
+        grid = "\n".join(
+            '      <div class="spoonacular-ingredient-item"><div>'
+            '<div class="spoonacular-image-wrapper"></div><div></div><div></div>'
+            f'<div>{ingredient["name"]}</div></div></div>'
+            for ingredient in ingredients
+        )
+        rows = "\n".join(
+            '      <div class="spoonacular-ingredient">'
+            f'<div class="spoonacular-amount t12 spoonacular-metric">{round(ingredient["amount"] * 28.35)} g</div>'
+            f'<div class="spoonacular-amount t12 spoonacular-us">{ingredient["amount"]} {ingredient["unit"]}</div>'
+            '</div>'
+            for ingredient in ingredients
+        )
+        nutrients = "\n".join(
+            f'      <div class="spoonacular-nutrient-name">{name}</div><div class="spoonacular-nutrient-value">{value}</div>'
+            for name, value in [("Calories", "584k"), ("Protein", "19g"), ("Fat", "20g"), ("Carbohydrates", "83g"), ("Fiber", "8g"), ("Calcium", "120mg")]
+        )
+
+        return self.page.substitute(
+            title=info["title"],
+            ingredient_grid=grid,
+            ingredient_rows=rows,
+            nutrients=nutrients,
+            price=f"Cost per Serving: ${info['pricePerServing'] / 100:.2f}"
+        )
+
+# ===== Server =====
+
+class StubServer:
+    def __init__(self, host="127.0.0.1", port=0, latency_ms=0, page_latency_ms=None):
+        self.fixtures = Fixtures()
+        self.latency = latency_ms / 1000
+        self.page_latency = (latency_ms if page_latency_ms is None else page_latency_ms) / 1000
+        self.requests = Counter()
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def route(self, path, query):
+        if path == "/fdc/v1/foods/search":
+            return "usda_search", self.latency, self.fixtures.search(query.get("query", [""])[0])
+        if path == "/fdc/v1/foods":
+            ids = [int(i) for i in query.get("fdcIds", [""])[0].split(",") if i]
+            return "usda_foods", self.latency, [self.fixtures.food(i) for i in ids]
+        match = re.fullmatch(r"/fdc/v1/food/(\d+)", path)
+        if match:
+            return "usda_food", self.latency, self.fixtures.food(int(match.group(1)))
+        if path == "/recipes/findByIngredients":
+            return "spoonacular_find", self.latency, self.fixtures.find_by_ingredients(int(query.get("number", ["10"])[0]))
+        if path == "/recipes/informationBulk":
+            ids = [int(i) for i in query.get("ids", [""])[0].split(",") if i]
+            return "spoonacular_information_bulk", self.latency, [self.fixtures.recipe_information(i, self.base_url) for i in ids]
+        match = re.fullmatch(r"/recipes/(\d+)/information", path)
+        if match:
+            return "spoonacular_information", self.latency, self.fixtures.recipe_information(int(match.group(1)), self.base_url)
+        match = re.fullmatch(r"/recipe/(\d+)", path)
+        if match:
+            return "recipe_page", self.page_latency, self.fixtures.recipe_page(int(match.group(1)))
+        return None, 0, None
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+            wbufsize = 1 << 16
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                name, latency, payload = stub.route(url.path, parse_qs(url.query))
+                if name is None:
+                    self.send_error(404)
+                    return
+
+                stub.requests[name] += 1
+                if latency:
+                    time.sleep(latency)
+
+                is_page = isinstance(payload, str)
+                body = (payload if is_page else json.dumps(payload)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8" if is_page else "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded USDA and Spoonacular responses locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0, help="artificial delay added to every API response")
+    parser.add_argument("--page-latency-ms", type=float, default=None, help="delay for recipe pages (default: same as --latency-ms)")
+    args = parser.parse_args()
+
+    stub = StubServer(args.host, args.port, args.latency_ms, args.page_latency_ms)
+    print(f"Serving fixtures on {stub.base_url} (Ctrl+C to stop)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub._server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# ===== Recipe and Nutrition Engine =====
+# GUI-free core used by the Tk front end in main.py. Importing this package
+# only pulls in the standard library; requests, Selenium, lxml and NumPy are loaded
+# the first time a function that needs them is called.
+
+from .nutrition import (
+    NUTRIENT_FIELDS, NUTRIENT_UNITS, IncompleteNutritionError,
+    food_vector, nutrition, recipe_total, summarize, full_panel
+)
+from .meal import Meal, MealItem, get_food_resolver, prefetch_densities
+from .vectors import NUTRIENT_PANEL, PANEL_INDEX, nutrient_vector, meal_totals
+from .usda import search_foods, suggest_foods, fetch_food_details, get_response_cache
+from .recipes import DEFAULT_RECIPE_RESULTS, MAX_RECIPE_RESULTS, default_recipe_results, fetch_recipe_data, scrape_recipe_details, scrape_recipe_page, get_driver_pool, get_recipe_store, get_recipe_corpus, recipe_nutrition, complete_recipe_records, stream_recipes
+from .measures import parse_measure, measure_grams
+from .metrics import get_metrics, operation, span
+
+__all__ = [
+    "NUTRIENT_FIELDS",
+    "NUTRIENT_UNITS",
+    "IncompleteNutritionError",
+    "NUTRIENT_PANEL",
+    "PANEL_INDEX",
+    "food_vector",
+    "nutrition",
+    "recipe_total",
+    "summarize",
+    "full_panel",
+    "nutrient_vector",
+    "meal_totals",
+    "Meal",
+    "MealItem",
+    "search_foods",
+    "suggest_foods",
+    "fetch_food_details",
+    "get_response_cache",
+    "DEFAULT_RECIPE_RESULTS",
+    "MAX_RECIPE_RESULTS",
+    "default_recipe_results",
+    "fetch_recipe_data",
+    "scrape_recipe_details",
+    "scrape_recipe_page",
+    "stream_recipes",
+    "get_driver_pool",
+    "get_recipe_store",
+    "get_recipe_corpus",
+    "recipe_nutrition",
+    "complete_recipe_records",
+    "parse_measure",
+    "measure_grams",
+    "get_food_resolver",
+    "prefetch_densities",
+    "get_metrics",
+    "operation",
+    "span"
+]
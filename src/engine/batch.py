@@ -0,0 +1,242 @@
+# ===== Imports =====
+import argparse
+import csv
+import itertools
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# ===== Defaults =====
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_WINDOW_PER_WORKER = 4
+PROGRESS_INTERVAL_SECONDS = 5.0
+
+# ===== Reading Meals =====
+
+# JSONL: one meal per line,
+#   {"id": "lunch", "ingredients": [{"food": "chicken breast", "grams": 150}, {"fdcId": 169756, "grams": 80}]}
+# CSV: one ingredient per row with columns meal_id, food, fdc_id, grams. Rows
+# of a meal must be consecutive; a meal ends when meal_id changes.
+# A record that cannot be parsed comes through as {"id", "error"} so one bad
+# line does not stop the run.
+def read_meals(f, input_format):
+    if input_format == "csv":
+        yield from _read_csv_meals(f)
+    else:
+        yield from _read_jsonl_meals(f)
+
+def _read_jsonl_meals(f):
+    for line_number, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            meal = json.loads(line)
+            if not isinstance(meal, dict):
+                raise ValueError("meal must be a JSON object")
+        except ValueError as e:
+            yield {"id": line_number, "error": f"{type(e).__name__}: {e}"}
+            continue
+        meal.setdefault("id", line_number)
+        yield meal
+
+def _read_csv_meals(f):
+    rows = csv.DictReader(f)
+    for meal_id, group in itertools.groupby(rows, key=lambda row: row.get("meal_id")):
+        try:
+            ingredients = [
+                {"food": row.get("food") or None, "fdcId": int(row["fdc_id"]) if row.get("fdc_id") else None, "grams": _parse_grams(row.get("grams"))}
+                for row in group
+            ]
+        except ValueError as e:
+            yield {"id": meal_id, "error": f"{type(e).__name__}: {e}"}
+            continue
+        yield {"id": meal_id, "ingredients": ingredients}
+
+def _parse_grams(value):
+    if value in (None, ""):
+        raise ValueError("grams is missing")
+    grams = float(value)
+    if not math.isfinite(grams) or grams < 0:
+        raise ValueError(f"grams must be a finite, non-negative number, got {value!r}")
+    return grams
+
+# ===== Food Resolution =====
+
+def _tokens(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+# Deterministic best match among search hits: prefer descriptions that contain
+# every query word, then the highest share of description words covered by
+# the query, then the shortest description, then the lowest fdcId.
+def best_match(query, foods):
+    query_tokens = set(_tokens(query))
+    if not foods or not query_tokens:
+        return None
+
+    def score(food):
+        description_tokens = _tokens(food["description"])
+        covered = sum(1 for token in description_tokens if token in query_tokens)
+        return (
+            not query_tokens.issubset(description_tokens),
+            -covered / max(len(description_tokens), 1),
+            len(food["description"]),
+            food["fdcId"]
+        )
+
+    return min(foods, key=score)
+
+# Per-process memo so each worker resolves a given name or fdcId only once.
+_resolved_names = {}
+_vectors = {}
+
+def _resolve_name(name):
+    from .usda import search_foods
+
+    key = " ".join(_tokens(name))
+    if key not in _resolved_names:
+        match = best_match(name, search_foods(name).get("foods", []))
+        _resolved_names[key] = match["fdcId"] if match else None
+    return _resolved_names[key]
+
+def _load_vectors(fdc_ids):
+    from .nutrition import food_vector, IncompleteNutritionError
+    from .usda import fetch_food_details
+
+    missing = [fdc_id for fdc_id in fdc_ids if fdc_id not in _vectors]
+    if missing:
+        for fdc_id, USDA_json in fetch_food_details(missing).items():
+            try:
+                _vectors[fdc_id] = food_vector(USDA_json)
+            except IncompleteNutritionError:
+                _vectors[fdc_id] = None
+
+# ===== Meal Analysis =====
+
+def analyze_meal(meal, full=False):
+    from .nutrition import recipe_total, summarize, full_panel
+
+    resolved = []
+    unresolved = []
+    for ingredient in meal.get("ingredients", []):
+        fdc_id = ingredient.get("fdcId") or (_resolve_name(ingredient["food"]) if ingredient.get("food") else None)
+        if fdc_id is None:
+            unresolved.append(ingredient.get("food"))
+        else:
+            resolved.append((ingredient, fdc_id))
+
+    _load_vectors(list(dict.fromkeys(fdc_id for _, fdc_id in resolved)))
+
+    used = []
+    vectors = []
+    grams = []
+    for ingredient, fdc_id in resolved:
+        if _vectors.get(fdc_id) is None:
+            unresolved.append(ingredient.get("food") or fdc_id)
+            continue
+        used.append(fdc_id)
+        vectors.append(_vectors[fdc_id])
+        grams.append(_parse_grams(ingredient.get("grams")))
+
+    totals = recipe_total(vectors, grams)
+    result = {
+        "id": meal.get("id"),
+        "totals": {label: round(value, 2) for label, value in summarize(totals).items()},
+        "resolved": used,
+        "unresolved": unresolved
+    }
+    if full:
+        result["panel"] = {f"{name} ({unit})": round(value, 4) for name, unit, value in full_panel(totals)}
+    return result
+
+def analyze_chunk(meals, full=False):
+    results = []
+    for meal in meals:
+        if "error" in meal:
+            results.append({"id": meal.get("id"), "error": meal["error"]})
+            continue
+        try:
+            results.append(analyze_meal(meal, full))
+        except Exception as e:
+            results.append({"id": meal.get("id"), "error": f"{type(e).__name__}: {e}"})
+    return results
+
+# Each worker builds its own HTTP client, so the USDA hourly quota is split
+# evenly between them; otherwise --workers N would send N times the limit.
+def _init_worker(workers):
+    from . import http_client
+    from .config import env_int
+
+    per_hour = env_int('RECIPE_USDA_REQUESTS_PER_HOUR', http_client.DEFAULT_USDA_REQUESTS_PER_HOUR)
+    os.environ['RECIPE_USDA_REQUESTS_PER_HOUR'] = str(max(1, per_hour // workers))
+    http_client._http_client = None
+
+# Streams results in input order while keeping at most `window` chunks in
+# flight, so memory stays bounded no matter how large the input is.
+def analyze_stream(meals, workers=None, chunk_size=DEFAULT_CHUNK_SIZE, full=False):
+    workers = workers or os.cpu_count() or 1
+    window = workers * DEFAULT_WINDOW_PER_WORKER
+    meals = iter(meals)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(workers,)) as pool:
+        in_flight = deque()
+        chunks = iter(lambda: list(itertools.islice(meals, chunk_size)), [])
+
+        for chunk in chunks:
+            in_flight.append(pool.submit(analyze_chunk, chunk, full))
+            if len(in_flight) >= window:
+                yield from in_flight.popleft().result()
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+# ===== Command Line =====
+#   python -m engine.batch meals.jsonl -o totals.jsonl
+#   python -m engine.batch meals.csv --workers 8 --full
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m engine.batch", description="Compute nutrition totals for many meals at once.")
+    parser.add_argument("input", help="JSONL or CSV file of meals, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="input format (default: from the file extension)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="meals sent to a worker at a time")
+    parser.add_argument("--full", action="store_true", help="include the full nutrient panel for every meal")
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    start = time.perf_counter()
+    last_report = start
+    count = 0
+    errors = 0
+
+    try:
+        for result in analyze_stream(read_meals(source, input_format), args.workers, args.chunk_size, args.full):
+            sink.write(json.dumps(result) + "\n")
+            count += 1
+            errors += "error" in result
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL_SECONDS:
+                print(f"{count} meals, {count / (now - start):.1f} meals/s", file=sys.stderr)
+                last_report = now
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Processed {count} meals ({errors} errors) in {elapsed:.2f} s: {count / elapsed if elapsed else 0:.1f} meals/s", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
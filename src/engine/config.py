@@ -0,0 +1,28 @@
+# ===== Imports =====
+import os
+
+# ===== API Keys =====
+
+# Keys are read on every call rather than at import time so a front end can
+# run load_dotenv() (or set the environment some other way) after importing
+# the engine.
+def spoonacular_api_key():
+    return os.getenv('SPOONACULAR_API_KEY')
+
+def usda_api_key():
+    return os.getenv('USDA_API_KEY')
+
+def env_int(name, default):
+    return int(os.getenv(name, default))
+
+def env_str(name, default):
+    return os.getenv(name, default)
+
+# ===== API Base URLs =====
+
+# Overridable so the benchmark harness can point the engine at a local stub.
+def usda_base_url():
+    return os.getenv('RECIPE_USDA_BASE_URL', 'https://api.nal.usda.gov/fdc/v1')
+
+def spoonacular_base_url():
+    return os.getenv('RECIPE_SPOONACULAR_BASE_URL', 'https://api.spoonacular.com')
@@ -0,0 +1,309 @@
+# ===== Imports =====
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+# ===== Defaults =====
+DEFAULT_CORPUS_PATH = os.path.join(os.path.expanduser("~"), ".recipe_nutrition_corpus.sqlite3")
+
+# An ingredient set searched remotely within this many seconds is answered
+# from the corpus alone.
+DEFAULT_CORPUS_REFRESH = 7 * 24 * 60 * 60
+
+# Spoonacular's findByIngredients rankings.
+MAXIMIZE_USED = 1
+MINIMIZE_MISSED = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recipes (
+    recipe_id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL,
+    url TEXT NOT NULL,
+    ingredients TEXT NOT NULL,
+    ingredient_keys TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS searches (
+    query_key TEXT PRIMARY KEY,
+    number INTEGER NOT NULL,
+    searched_at REAL NOT NULL
+);
+"""
+
+# ===== Ingredient Keys =====
+
+def _singular(token):
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith(("oes", "ches", "shes", "sses")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith("ss") and len(token) > 3:
+        return token[:-1]
+    return token
+
+# "Tomatoes, cherry" and "cherry tomato" share a key.
+def ingredient_key(name):
+    return " ".join(sorted(_singular(token) for token in re.findall(r"[a-z0-9]+", name.lower())))
+
+def search_key(food_list):
+    return "|".join(sorted({ingredient_key(food) for food in food_list} - {""}))
+
+# ===== Bitset Helpers =====
+# A set of recipes is a Python int with bit i set for the recipe at position
+# i, so unions, intersections and counts over the whole corpus are a handful
+# of machine-word loops inside the interpreter.
+
+def _bitset(positions):
+    if not positions:
+        return 0
+    packed = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        packed[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(packed, "little")
+
+def _positions(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+# Bit-sliced counter: plane i holds bit i of how many of `bitsets` each
+# recipe belongs to.
+def _count_planes(bitsets):
+    planes = []
+    for carry in bitsets:
+        for i, plane in enumerate(planes):
+            planes[i], carry = plane ^ carry, plane & carry
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+    return planes
+
+def _count_equals(planes, count, universe):
+    if count >> len(planes):
+        return 0
+    mask = universe
+    for i, plane in enumerate(planes):
+        mask &= plane if count >> i & 1 else ~plane
+    return mask
+
+# ===== Recipe Corpus =====
+
+# Recipes seen in earlier searches, with an inverted index from ingredient
+# key to the bitset of recipes using it. Rows live in SQLite; the index is
+# rebuilt in memory when the corpus opens.
+class RecipeCorpus:
+    def __init__(self, path=DEFAULT_CORPUS_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        self._recipes = []
+        self._positions = {}
+        self._ingredient_bits = {}
+        self._size_bits = {}
+        self._token_keys = {}
+        self._match_cache = {}
+        self._load()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._positions)
+
+    # Ingredient keys are stored next to the names so opening a large corpus
+    # does not normalize every name again.
+    def _load(self):
+        rows = self._conn.execute("SELECT recipe_id, title, url, ingredients, ingredient_keys FROM recipes ORDER BY rowid")
+        self._place([
+            {"id": recipe_id, "title": title, "url": url, "ingredients": json.loads(ingredients), "keys": json.loads(keys)}
+            for recipe_id, title, url, ingredients, keys in rows
+        ])
+
+    # `recipes` holds {"id", "title", "url", "ingredients"} dicts. A recipe
+    # already in the corpus is replaced.
+    def add_many(self, recipes):
+        recipes = [recipe for recipe in recipes if recipe.get("url") and recipe.get("ingredients")]
+        if not recipes:
+            return
+
+        entries = list({recipe["id"]: self._entry(recipe) for recipe in recipes}.values())
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO recipes (recipe_id, title, url, ingredients, ingredient_keys) VALUES (?, ?, ?, ?, ?)",
+                [(entry["id"], entry["title"], entry["url"], json.dumps(entry["ingredients"]), json.dumps(entry["keys"])) for entry in entries]
+            )
+            self._conn.commit()
+            self._place(entries)
+            self._match_cache.clear()
+
+    # Gives each entry a bit position (reusing a replaced recipe's) and ORs
+    # the new bits in one pass per ingredient, rather than one big-int
+    # update per recipe.
+    def _place(self, entries):
+        positions_by_key = {}
+        positions_by_size = {}
+        for entry in entries:
+            position = self._positions.get(entry["id"])
+            if position is None:
+                position = len(self._recipes)
+                self._recipes.append(None)
+                self._positions[entry["id"]] = position
+            else:
+                self._unindex(position)
+
+            self._recipes[position] = entry
+            for key in entry["keys"]:
+                positions_by_key.setdefault(key, []).append(position)
+            positions_by_size.setdefault(len(entry["keys"]), []).append(position)
+
+        for key, positions in positions_by_key.items():
+            if key not in self._ingredient_bits:
+                self._ingredient_bits[key] = 0
+                self._index_tokens(key)
+            self._ingredient_bits[key] |= _bitset(positions)
+        for size, positions in positions_by_size.items():
+            self._size_bits[size] = self._size_bits.get(size, 0) | _bitset(positions)
+
+    def record_search(self, food_list, number):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (query_key, number, searched_at) VALUES (?, ?, ?)",
+                (search_key(food_list), number, time.time())
+            )
+            self._conn.commit()
+
+    # True when this ingredient set was searched remotely, for at least
+    # `number` recipes, within the last `max_age` seconds.
+    def covers(self, food_list, number, max_age=DEFAULT_CORPUS_REFRESH):
+        with self._lock:
+            row = self._conn.execute("SELECT number, searched_at FROM searches WHERE query_key = ?", (search_key(food_list),)).fetchone()
+        return row is not None and row[0] >= number and time.time() - row[1] < max_age
+
+    # Recipes using at least one of `food_list`, ranked like findByIngredients:
+    # most used then fewest missed ingredients, or the reverse for
+    # MINIMIZE_MISSED. A query ingredient matches every corpus ingredient
+    # containing all of its words ("chicken" matches "chicken breast"), and
+    # each matched recipe ingredient counts as used, so the ranking agrees
+    # with the reported counts.
+    def find(self, food_list, number, ranking=MAXIMIZE_USED):
+        with self._lock:
+            matched_keys = set()
+            for food in food_list:
+                matched_keys |= self._match(ingredient_key(food))[0]
+            bitsets = [self._ingredient_bits[key] for key in sorted(matched_keys) if self._ingredient_bits[key]]
+            if not bitsets or number <= 0:
+                return []
+
+            planes = _count_planes(bitsets)
+            universe = 0
+            for bits in bitsets:
+                universe |= bits
+            # No recipe can use more ingredients than it has.
+            most_used = min(len(bitsets), max(self._size_bits))
+            by_used = {used: _count_equals(planes, used, universe) for used in range(1, most_used + 1)}
+
+            results = []
+            for used, size in self._rank_order(by_used, ranking):
+                for position in _positions(by_used[used] & self._size_bits.get(size, 0)):
+                    results.append(self._result(self._recipes[position], matched_keys))
+                    if len(results) == number:
+                        return results
+            return results
+
+    def stats(self):
+        with self._lock:
+            return {"recipes": len(self._positions), "ingredients": sum(1 for bits in self._ingredient_bits.values() if bits)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _rank_order(self, by_used, ranking):
+        sizes = sorted(self._size_bits)
+        used_counts = sorted((used for used, bits in by_used.items() if bits), reverse=True)
+        if ranking == MINIMIZE_MISSED:
+            pairs = [(size - used, -used, used, size) for used in used_counts for size in sizes if size >= used]
+            return [(used, size) for _, _, used, size in sorted(pairs)]
+        return [(used, size) for used in used_counts for size in sizes if size >= used]
+
+    def _match(self, query_key):
+        if query_key not in self._match_cache:
+            tokens = query_key.split()
+            keys = set(self._token_keys.get(tokens[0], ())) if tokens else set()
+            for token in tokens[1:]:
+                keys &= self._token_keys.get(token, set())
+            bits = 0
+            for key in keys:
+                bits |= self._ingredient_bits[key]
+            self._match_cache[query_key] = (keys, bits)
+        return self._match_cache[query_key]
+
+    def _result(self, recipe, matched_keys):
+        used = [name for name, key in zip(recipe["ingredients"], recipe["keys"]) if key in matched_keys]
+        missed = [name for name, key in zip(recipe["ingredients"], recipe["keys"]) if key not in matched_keys]
+        return {
+            "id": recipe["id"],
+            "title": recipe["title"],
+            "url": recipe["url"],
+            "usedIngredientCount": len(used),
+            "missedIngredientCount": len(missed),
+            "usedIngredients": used,
+            "missedIngredients": missed
+        }
+
+    def _entry(self, recipe):
+        names = {}
+        for name in recipe["ingredients"]:
+            key = ingredient_key(name)
+            if key and key not in names:
+                names[key] = name
+        return {"id": recipe["id"], "title": recipe["title"], "url": recipe["url"], "ingredients": list(names.values()), "keys": list(names)}
+
+    def _unindex(self, position):
+        bit = 1 << position
+        old = self._recipes[position]
+        for key in old["keys"]:
+            self._ingredient_bits[key] &= ~bit
+        self._size_bits[len(old["keys"])] &= ~bit
+
+    def _index_tokens(self, key):
+        for token in key.split():
+            self._token_keys.setdefault(token, set()).add(key)
+
+# ===== Command Line =====
+#   python -m engine.corpus stats
+#   python -m engine.corpus find "rice, egg" --number 5
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m engine.corpus", description="Inspect or query the local recipe corpus.")
+    parser.add_argument("--db", default=os.getenv("RECIPE_CORPUS_PATH", DEFAULT_CORPUS_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("stats", help="show corpus size")
+    find_parser = commands.add_parser("find", help="rank recipes for comma-separated ingredients")
+    find_parser.add_argument("ingredients")
+    find_parser.add_argument("--number", type=int, default=10)
+    find_parser.add_argument("--ranking", type=int, choices=[MAXIMIZE_USED, MINIMIZE_MISSED], default=MAXIMIZE_USED)
+
+    args = parser.parse_args(argv)
+    corpus = RecipeCorpus(args.db)
+
+    if args.command == "stats":
+        stats = corpus.stats()
+        print(f"{stats['recipes']} recipes, {stats['ingredients']} ingredients")
+    else:
+        food_list = [food for food in args.ingredients.split(",") if food.strip()]
+        for result in corpus.find(food_list, args.number, args.ranking):
+            print(f"{result['id']}\t{result['usedIngredientCount']} used\t{result['missedIngredientCount']} missed\t{result['title']}")
+
+    corpus.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
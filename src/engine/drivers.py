@@ -0,0 +1,111 @@
+# ===== Imports =====
+import queue
+import threading
+from .metrics import incr, span
+
+# ===== Defaults =====
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 25
+
+# ===== Chrome Driver Pool =====
+
+# Keeps up to `size` Chrome drivers alive between scrapes. Drivers are only
+# started when first needed, checked before they are handed out, and replaced
+# once they have loaded `max_pages` pages so a long session stays bounded.
+class DriverPool:
+    def __init__(self, options, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES):
+        self.options = options
+        self.size = size
+        self.max_pages = max_pages
+
+        self._idle = queue.LifoQueue()
+        self._pages = {}
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def acquire(self):
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                driver = self._try_create()
+
+            if driver is None:
+                # Pool is at capacity; wait for a driver to be released or
+                # for a recycled slot to free up.
+                try:
+                    driver = self._idle.get(timeout=0.25)
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(driver):
+                return driver
+            incr("driver_unhealthy_total")
+            self._discard(driver)
+
+    def release(self, driver, pages=1):
+        with self._lock:
+            self._pages[driver] = self._pages.get(driver, 0) + pages
+            recycle = self._closed or self._pages[driver] >= self.max_pages
+
+        if recycle:
+            incr("driver_recycled_total")
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def _try_create(self):
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if not can_create:
+            return None
+
+        from selenium import webdriver
+
+        try:
+            with span("driver.start"):
+                driver = webdriver.Chrome(options=self.options)
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+        with self._lock:
+            self._pages[driver] = 0
+        return driver
+
+    def _is_healthy(self, driver):
+        from selenium.common.exceptions import WebDriverException
+
+        try:
+            driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def _discard(self, driver):
+        from selenium.common.exceptions import WebDriverException
+
+        with self._lock:
+            self._pages.pop(driver, None)
+            self._created -= 1
+
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
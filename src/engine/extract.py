@@ -0,0 +1,94 @@
+# ===== Imports =====
+import functools
+import importlib.util
+import threading
+
+# ===== Compiled Selectors =====
+
+# lxml is optional and comparatively slow to import, so the selectors are
+# compiled the first time a page is actually parsed.
+_selectors = None
+_selectors_lock = threading.Lock()
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def _load_selectors():
+    global _selectors
+    with _selectors_lock:
+        if _selectors is None:
+            from lxml import etree
+
+            _selectors = {
+                "ingredient_rows": etree.XPath(f"//div[{_has_class('spoonacular-ingredient')}]"),
+                "metric_amount": etree.XPath(
+                    f".//div[{_has_class('spoonacular-amount')} and {_has_class('t12')} and {_has_class('spoonacular-metric')}]"
+                ),
+                "ingredient_names": etree.XPath('//*[@id="spoonacular-ingredient-vis-grid"]/div/div/div[4]'),
+                "recipe_title": etree.XPath('//*[@id="wrapper"]/div/div[3]/h1'),
+                "nutrient_names": etree.XPath(f"//div[{_has_class('spoonacular-nutrient-name')}]"),
+                "nutrient_values": etree.XPath(f"//div[{_has_class('spoonacular-nutrient-value')}]"),
+                "price_tables": etree.XPath('//*[@id="spoonacularPriceBreakdownTable"]'),
+                "quickview": etree.XPath(f".//div[{_has_class('spoonacular-quickview')}]"),
+                "servings": etree.XPath('//*[@id="spoonacular-serving-stepper"]/@value')
+            }
+    return _selectors
+
+# ===== Static Recipe Page Extraction =====
+
+@functools.lru_cache(maxsize=None)
+def fast_path_available():
+    return importlib.util.find_spec("lxml") is not None
+
+def _text(element):
+    return " ".join(element.text_content().split())
+
+# Pulls the same fields the Selenium scraper reads out of a Spoonacular recipe
+# page's static HTML. Returns None when the markup does not carry what we
+# need (no title, no ingredient rows, rows without metric amounts, or names
+# and amounts that do not pair up), in which case the caller should fall
+# back to the browser. Pages whose ingredient widget is rendered by script
+# arrive with a title but no rows.
+def extract_recipe_page(page_html):
+    if not page_html or not fast_path_available():
+        return None
+
+    from lxml import etree, html as lxml_html
+
+    selectors = _load_selectors()
+
+    try:
+        document = lxml_html.fromstring(page_html)
+    except (etree.ParserError, ValueError):
+        return None
+
+    titles = selectors["recipe_title"](document)
+    if not titles:
+        return None
+
+    measures = []
+    for row in selectors["ingredient_rows"](document):
+        amounts = selectors["metric_amount"](row)
+        if not amounts:
+            return None
+        measures.append(_text(amounts[0]))
+
+    ingredients = [_text(element) for element in selectors["ingredient_names"](document)]
+    if not measures or len(ingredients) != len(measures):
+        return None
+
+    price = []
+    for table in selectors["price_tables"](document):
+        quickviews = selectors["quickview"](table)
+        if quickviews:
+            price.append(_text(quickviews[0]))
+
+    return {
+        "name": _text(titles[0]),
+        "ingredients": ingredients,
+        "measures": measures,
+        "nutrient_names": [_text(element) for element in selectors["nutrient_names"](document)],
+        "nutrient_values": [_text(element) for element in selectors["nutrient_values"](document)],
+        "price": price,
+        "servings": next(iter(selectors["servings"](document)), None)
+    }
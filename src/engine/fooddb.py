@@ -0,0 +1,232 @@
+# ===== Imports =====
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import zipfile
+
+# ===== Defaults =====
+DEFAULT_FOOD_DB_PATH = os.path.join(os.path.expanduser("~"), ".recipe_nutrition_foods.sqlite3")
+DEFAULT_SEARCH_LIMIT = 50
+
+# The CSV dumps use snake_case data types; the API reports display names.
+DATA_TYPE_NAMES = {"sr_legacy_food": "SR Legacy", "foundation_food": "Foundation", "survey_fndds_food": "Survey (FNDDS)"}
+UNIT_NAMES = {"G": "g", "MG": "mg", "UG": "µg", "KCAL": "kcal", "KJ": "kJ", "IU": "IU"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS foods (
+    fdc_id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    data_type TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS foods_fts USING fts5 (
+    description, content='foods', content_rowid='fdc_id'
+);
+CREATE TABLE IF NOT EXISTS nutrients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    unit_name TEXT NOT NULL,
+    number TEXT
+);
+CREATE TABLE IF NOT EXISTS food_nutrients (
+    fdc_id INTEGER NOT NULL,
+    nutrient_id INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (fdc_id, nutrient_id)
+) WITHOUT ROWID;
+"""
+
+# ===== Local Food Database =====
+
+# SQLite copy of the USDA SR Legacy dataset. Descriptions are indexed with
+# FTS5 so searches return the same {"foods": [...]} shape as the remote
+# foods/search endpoint, and `food` rebuilds the food/{fdcId} response from
+# the nutrient table.
+class FoodDatabase:
+    def __init__(self, path=DEFAULT_FOOD_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def open_existing(cls, path=DEFAULT_FOOD_DB_PATH):
+        if not os.path.exists(path):
+            return None
+        database = cls(path)
+        if not database.has_data():
+            database.close()
+            return None
+        return database
+
+    def has_data(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM foods LIMIT 1").fetchone() is not None
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        match = fts_query(query)
+        if not match:
+            return {"totalHits": 0, "foods": []}
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT foods.fdc_id, foods.description, foods.data_type FROM foods_fts "
+                "JOIN foods ON foods.fdc_id = foods_fts.rowid "
+                "WHERE foods_fts MATCH ? ORDER BY bm25(foods_fts), length(foods.description) LIMIT ?",
+                (match, limit)
+            ).fetchall()
+
+        foods = [{"fdcId": fdc_id, "description": description, "dataType": data_type} for fdc_id, description, data_type in rows]
+        return {"totalHits": len(foods), "foods": foods}
+
+    def food(self, fdc_id):
+        with self._lock:
+            row = self._conn.execute("SELECT description, data_type FROM foods WHERE fdc_id = ?", (fdc_id,)).fetchone()
+            if row is None:
+                return None
+            nutrient_rows = self._conn.execute(
+                "SELECT nutrients.id, nutrients.number, nutrients.name, nutrients.unit_name, food_nutrients.amount "
+                "FROM food_nutrients JOIN nutrients ON nutrients.id = food_nutrients.nutrient_id "
+                "WHERE food_nutrients.fdc_id = ? ORDER BY nutrients.id",
+                (fdc_id,)
+            ).fetchall()
+
+        description, data_type = row
+        return {
+            "fdcId": fdc_id,
+            "description": description,
+            "dataType": data_type,
+            "foodNutrients": [
+                {"nutrient": {"id": nutrient_id, "number": number, "name": name, "unitName": unit_name}, "amount": amount}
+                for nutrient_id, number, name, unit_name, amount in nutrient_rows
+            ]
+        }
+
+    # ----- Importing -----
+
+    def import_dump(self, path):
+        if os.path.isdir(path) or zipfile.is_zipfile(path):
+            return self.import_csv(path)
+        return self.import_json(path)
+
+    def import_json(self, path):
+        with open(path, encoding="utf-8") as f:
+            dump = json.load(f)
+
+        foods = dump.get("SRLegacyFoods", dump.get("foods", [])) if isinstance(dump, dict) else dump
+        food_rows = []
+        nutrient_rows = {}
+        amount_rows = []
+
+        for food in foods:
+            food_rows.append((food["fdcId"], food["description"], food.get("dataType", "SR Legacy")))
+            for item in food.get("foodNutrients", []):
+                nutrient = item.get("nutrient", {})
+                if "id" not in nutrient or item.get("amount") is None:
+                    continue
+                nutrient_rows[nutrient["id"]] = (nutrient["id"], nutrient["name"], nutrient.get("unitName", ""), nutrient.get("number"))
+                amount_rows.append((food["fdcId"], nutrient["id"], item["amount"]))
+
+        self._load(food_rows, nutrient_rows.values(), amount_rows)
+        return len(food_rows)
+
+    def import_csv(self, path):
+        tables = _open_csv_tables(path, ["food.csv", "nutrient.csv", "food_nutrient.csv"])
+
+        food_rows = [
+            (int(row["fdc_id"]), row["description"], DATA_TYPE_NAMES.get(row.get("data_type"), "SR Legacy"))
+            for row in tables["food.csv"]
+        ]
+        nutrient_rows = [
+            (int(row["id"]), row["name"], UNIT_NAMES.get(row.get("unit_name", ""), row.get("unit_name", "")), row.get("nutrient_nbr"))
+            for row in tables["nutrient.csv"]
+        ]
+        amount_rows = (
+            (int(row["fdc_id"]), int(row["nutrient_id"]), float(row["amount"]))
+            for row in tables["food_nutrient.csv"]
+            if row.get("amount")
+        )
+
+        self._load(food_rows, nutrient_rows, amount_rows)
+        return len(food_rows)
+
+    def _load(self, food_rows, nutrient_rows, amount_rows):
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("INSERT OR REPLACE INTO foods VALUES (?, ?, ?)", food_rows)
+                self._conn.executemany("INSERT OR REPLACE INTO nutrients VALUES (?, ?, ?, ?)", nutrient_rows)
+                self._conn.executemany("INSERT OR REPLACE INTO food_nutrients VALUES (?, ?, ?)", amount_rows)
+                self._conn.execute("INSERT INTO foods_fts (foods_fts) VALUES ('rebuild')")
+            self._conn.execute("ANALYZE")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# ===== Helpers =====
+
+def fts_query(query):
+    tokens = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{token}"*' for token in tokens)
+
+def _open_csv_tables(path, names):
+    tables = {}
+
+    if os.path.isdir(path):
+        for dirpath, _, filenames in os.walk(path):
+            for name in names:
+                if name in filenames and name not in tables:
+                    tables[name] = _read_csv(open(os.path.join(dirpath, name), encoding="utf-8", newline=""))
+    else:
+        archive = zipfile.ZipFile(path)
+        for member in archive.namelist():
+            name = os.path.basename(member)
+            if name in names and name not in tables:
+                tables[name] = _read_csv(io.TextIOWrapper(archive.open(member), encoding="utf-8", newline=""))
+
+    missing = [name for name in names if name not in tables]
+    if missing:
+        raise FileNotFoundError(f"SR Legacy dump at {path} is missing {', '.join(missing)}")
+    return tables
+
+def _read_csv(f):
+    with f:
+        yield from csv.DictReader(f)
+
+# ===== Command Line =====
+#   python -m engine.fooddb import FoodData_Central_sr_legacy_food_csv_2018-04.zip
+#   python -m engine.fooddb search "cheddar cheese"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m engine.fooddb", description="Manage the offline SR Legacy food database.")
+    parser.add_argument("--db", default=os.getenv("RECIPE_FOOD_DB_PATH", DEFAULT_FOOD_DB_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="load an SR Legacy CSV (directory or zip) or JSON dump")
+    import_parser.add_argument("path")
+
+    search_parser = commands.add_parser("search", help="full-text search over food descriptions")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+
+    args = parser.parse_args(argv)
+    database = FoodDatabase(args.db)
+
+    if args.command == "import":
+        count = database.import_dump(args.path)
+        print(f"Imported {count} foods into {args.db}")
+    else:
+        for food in database.search(args.query, args.limit)["foods"]:
+            print(f"{food['fdcId']}\t{food['description']}")
+
+    database.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
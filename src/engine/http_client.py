@@ -0,0 +1,175 @@
+# ===== Imports =====
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+from .config import env_int
+from .metrics import span, incr
+
+# ===== Defaults =====
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 20
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_POOL_SIZE = 16
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# USDA allows 1,000 requests per hour per key. Spoonacular meters "points"
+# per minute; 60 is the free-plan ceiling.
+DEFAULT_USDA_REQUESTS_PER_HOUR = 1000
+DEFAULT_SPOONACULAR_POINTS_PER_MINUTE = 60
+
+# ===== Token Bucket =====
+
+# Classic token bucket: holds up to `capacity` tokens and refills at `rate`
+# tokens per second. `acquire` charges the full cost up front, letting the
+# bucket go into debt, and sleeps until the debt is repaid. A call dearer
+# than the whole bucket (informationBulk for 50 ids) is therefore still paid
+# in full, and callers are paced at the quota ceiling instead of bursting
+# into 429s.
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+
+        if wait:
+            time.sleep(wait)
+
+# ===== HTTP Client =====
+
+# Shared entry point for every outbound request. Keeps one keep-alive
+# requests.Session per host, applies timeouts, retries 429/5xx and connection
+# errors with jittered exponential backoff (honouring Retry-After), and paces
+# calls through a named TokenBucket when one is given.
+class HttpClient:
+    def __init__(self, timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT), max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX, pool_size=DEFAULT_POOL_SIZE):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pool_size = pool_size
+        self.limiters = {}
+
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def add_limiter(self, name, rate, capacity):
+        self.limiters[name] = TokenBucket(rate, capacity)
+
+    def get(self, url, params=None, headers=None, limiter=None, cost=1, timeout=None):
+        import requests
+
+        host = urlsplit(url).netloc
+        session = self._session(host)
+        bucket = self.limiters.get(limiter)
+        attempt = 0
+
+        while True:
+            if bucket is not None:
+                with span("http.rate_limit_wait", limiter=limiter):
+                    bucket.acquire(cost)
+
+            try:
+                with span("http.request", host=host) as labels:
+                    response = session.get(url, params=params, headers=headers, timeout=timeout or self.timeout)
+                    labels["status"] = response.status_code
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                incr("http_requests_total", host=host, status=type(e).__name__)
+                if attempt >= self.max_retries:
+                    raise
+                incr("http_retries_total", host=host, reason=type(e).__name__)
+                self._sleep_before_retry(attempt, None)
+                attempt += 1
+                continue
+
+            incr("http_requests_total", host=host, status=response.status_code)
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                incr("http_retries_total", host=host, reason=response.status_code)
+                self._sleep_before_retry(attempt, response.headers.get("Retry-After"))
+                response.close()
+                attempt += 1
+                continue
+
+            response.raise_for_status()
+            return response
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers["Accept-Encoding"] = "gzip, deflate"
+                self._sessions[host] = session
+        return session
+
+    def _sleep_before_retry(self, attempt, retry_after):
+        delay = None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = None
+
+        if delay is None:
+            delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+            delay = random.uniform(delay / 2, delay)
+
+        with span("http.retry_backoff"):
+            time.sleep(min(delay, self.backoff_max))
+
+# ===== Shared Client =====
+_http_client = None
+_http_client_lock = threading.Lock()
+
+def get_http_client():
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            client = HttpClient(
+                timeout=(env_int('RECIPE_HTTP_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT), env_int('RECIPE_HTTP_READ_TIMEOUT', DEFAULT_READ_TIMEOUT)),
+                max_retries=env_int('RECIPE_HTTP_MAX_RETRIES', DEFAULT_MAX_RETRIES)
+            )
+
+            usda_per_hour = env_int('RECIPE_USDA_REQUESTS_PER_HOUR', DEFAULT_USDA_REQUESTS_PER_HOUR)
+            client.add_limiter("usda", usda_per_hour / 3600, max(1, usda_per_hour // 60))
+
+            spoonacular_per_minute = env_int('RECIPE_SPOONACULAR_POINTS_PER_MINUTE', DEFAULT_SPOONACULAR_POINTS_PER_MINUTE)
+            client.add_limiter("spoonacular", spoonacular_per_minute / 60, max(1, spoonacular_per_minute // 4))
+
+            _http_client = client
+    return _http_client
+
+# ===== Spoonacular Point Costs =====
+
+def find_by_ingredients_cost(number):
+    return 1 + 0.01 * number
+
+def information_bulk_cost(count):
+    return 1 + 0.5 * max(count - 1, 0)
@@ -0,0 +1,252 @@
+# ===== Imports =====
+import itertools
+import math
+import threading
+from .cache import normalize_query
+from .config import env_str
+from .nutrition import food_vector, summarize, IncompleteNutritionError
+from .vectors import PANEL_SIZE
+
+# ===== Per-100 g Densities =====
+
+# Nutrient vectors are a property of the food, not the meal, so they are
+# shared by every Meal in the process. None marks a food whose USDA record
+# lacks a required nutrient.
+_densities = {}
+_densities_lock = threading.Lock()
+
+def cached_density(fdc_id):
+    with _densities_lock:
+        return _densities.get(fdc_id)
+
+def has_density(fdc_id):
+    with _densities_lock:
+        return fdc_id in _densities
+
+def store_density(fdc_id, USDA_json):
+    try:
+        vector = food_vector(USDA_json)
+    except IncompleteNutritionError:
+        vector = None
+
+    with _densities_lock:
+        _densities[fdc_id] = vector
+    return vector
+
+# Fetches and caches the densities of foods the user is likely to pick, so
+# resolving them later needs no request. Returns the ids that were fetched;
+# with `remote=False` only local data is read.
+def prefetch_densities(fdc_ids, remote=True):
+    from .usda import fetch_food_details
+
+    missing = [fdc_id for fdc_id in dict.fromkeys(fdc_ids) if not has_density(fdc_id)]
+    if not missing:
+        return []
+
+    foods_by_id = fetch_food_details(missing, remote=remote)
+    for fdc_id, USDA_json in foods_by_id.items():
+        store_density(fdc_id, USDA_json)
+    return list(foods_by_id)
+
+# ===== Learned Resolver =====
+_food_resolver = None
+_food_resolver_lock = threading.Lock()
+
+def get_food_resolver():
+    global _food_resolver
+    with _food_resolver_lock:
+        if _food_resolver is None:
+            from .resolver import FoodResolver, DEFAULT_RESOLVER_PATH
+
+            _food_resolver = FoodResolver(env_str('RECIPE_RESOLVER_PATH', DEFAULT_RESOLVER_PATH))
+    return _food_resolver
+
+# ===== Meal Items =====
+
+class MealItem:
+    def __init__(self, item_id, name, grams):
+        self.item_id = item_id
+        self.name = name
+        self.grams = grams
+        self.fdc_id = None
+        self.description = None
+        self.vector = None
+        self.unavailable = False
+        self.auto_resolved = False
+        self.manual = False
+
+    @property
+    def resolved(self):
+        return self.fdc_id is not None
+
+    @property
+    def ready(self):
+        return self.vector is not None
+
+    def contribution(self):
+        return self.vector * (self.grams / 100.0)
+
+# A NaN or infinite weight would poison the running total for good.
+def _checked_grams(grams):
+    grams = float(grams)
+    if not math.isfinite(grams) or grams < 0:
+        raise ValueError(f"grams must be a finite, non-negative number, got {grams}")
+    return grams
+
+# ===== Meal =====
+
+# A meal that is edited in place. Each ingredient is resolved to an fdcId
+# once; a name resolved earlier in the meal, or one the optional learned
+# resolver is confident about, is filled in without asking. The running
+# total is adjusted by each item's own contribution on every add, remove or
+# re-weight, so a change costs one vector update no matter how many
+# ingredients the meal has.
+class Meal:
+    def __init__(self, resolver=None):
+        self.items = {}
+        self.resolver = resolver
+
+        self._ids = itertools.count(1)
+        self._resolved_names = {}
+        self._total = None
+
+    def add(self, name, grams):
+        grams = _checked_grams(grams)
+        item = MealItem(next(self._ids), name, grams)
+        self.items[item.item_id] = item
+        self.auto_resolve(item.item_id)
+        return item
+
+    # Resolves an item without asking when its name was already chosen in
+    # this meal or the learned resolver has a confident match. Items the
+    # user asked to choose again are left alone.
+    def auto_resolve(self, item_id):
+        item = self.items[item_id]
+        if item.resolved or item.manual:
+            return item.resolved
+
+        previous = self._resolved_names.get(normalize_query(item.name))
+        if previous is not None:
+            self.resolve(item_id, *previous)
+            return True
+
+        match = self.resolver.resolve(item.name) if self.resolver is not None else None
+        if match is None:
+            return False
+
+        self.resolve(item_id, match["fdcId"], match["description"])
+        item.auto_resolved = True
+        return True
+
+    def remove(self, item_id):
+        item = self.items.pop(item_id)
+        if item.ready:
+            self._adjust(-item.contribution())
+        if not self.items:
+            self._total = None
+        return item
+
+    def reweight(self, item_id, grams):
+        item = self.items[item_id]
+        grams = _checked_grams(grams)
+        if item.ready:
+            self._adjust(item.vector * ((grams - item.grams) / 100.0))
+        item.grams = grams
+        return item
+
+    # Records the food chosen for an item and, when its density is already
+    # cached, adds it to the total straight away. `learn` teaches the
+    # resolver that this name maps to this food.
+    def resolve(self, item_id, fdc_id, description=None, learn=False):
+        item = self.items[item_id]
+        if item.ready:
+            self._adjust(-item.contribution())
+            item.vector = None
+
+        item.fdc_id = fdc_id
+        item.description = description
+        item.unavailable = False
+        item.auto_resolved = False
+        item.manual = False
+        self._resolved_names[normalize_query(item.name)] = (fdc_id, description)
+
+        if learn and self.resolver is not None and description:
+            self.resolver.record(item.name, fdc_id, description)
+
+        if has_density(fdc_id):
+            self._apply_density(item, cached_density(fdc_id))
+        return item
+
+    # Drops an item's food so the user is asked again, bypassing both the
+    # per-meal memo and the learned resolver.
+    def unresolve(self, item_id):
+        item = self.items[item_id]
+        if item.ready:
+            self._adjust(-item.contribution())
+
+        self._resolved_names.pop(normalize_query(item.name), None)
+        item.fdc_id = None
+        item.description = None
+        item.vector = None
+        item.unavailable = False
+        item.auto_resolved = False
+        item.manual = True
+        return item
+
+    # Attaches a freshly fetched USDA record to every item that uses it.
+    # Returns the items that became ready.
+    def add_food_details(self, fdc_id, USDA_json):
+        vector = store_density(fdc_id, USDA_json)
+
+        updated = []
+        for item in self.items.values():
+            if item.fdc_id == fdc_id and not item.ready:
+                self._apply_density(item, vector)
+                updated.append(item)
+        return updated
+
+    def unresolved(self):
+        return [item for item in self.items.values() if not item.resolved]
+
+    # fdcIds chosen for this meal whose densities still need fetching.
+    def missing_densities(self):
+        return list(dict.fromkeys(
+            item.fdc_id for item in self.items.values()
+            if item.resolved and not item.ready and not item.unavailable and not has_density(item.fdc_id)
+        ))
+
+    @property
+    def total(self):
+        if self._total is None:
+            import numpy as np
+            return np.zeros(PANEL_SIZE)
+        return self._total.copy()
+
+    def summary(self):
+        return summarize(self.total)
+
+    # Rebuilds the total from scratch, discarding any rounding drift from
+    # a long run of incremental updates.
+    def recompute(self):
+        self._total = None
+        for item in self.items.values():
+            if item.ready:
+                self._adjust(item.contribution())
+
+    def clear(self):
+        self.items.clear()
+        self._resolved_names.clear()
+        self._total = None
+
+    def _apply_density(self, item, vector):
+        if vector is None:
+            item.unavailable = True
+            return
+        item.vector = vector
+        self._adjust(item.contribution())
+
+    def _adjust(self, delta):
+        if self._total is None:
+            self._total = delta.copy()
+        else:
+            self._total += delta
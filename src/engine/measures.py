@@ -0,0 +1,240 @@
+# ===== Imports =====
+import re
+from fractions import Fraction
+
+# ===== Unit Tables =====
+
+# Canonical unit -> grams (mass) or millilitres (volume). Recipe pages mix
+# metric and US units, abbreviations and plurals; UNIT_ALIASES folds them
+# onto these names.
+MASS_GRAMS = {
+    "g": 1.0,
+    "kg": 1000.0,
+    "mg": 0.001,
+    "oz": 28.3495,
+    "lb": 453.592
+}
+
+VOLUME_ML = {
+    "ml": 1.0,
+    "cl": 10.0,
+    "dl": 100.0,
+    "l": 1000.0,
+    "tsp": 4.92892,
+    "tbsp": 14.7868,
+    "fl oz": 29.5735,
+    "cup": 236.588,
+    "pint": 473.176,
+    "quart": 946.353,
+    "gallon": 3785.41
+}
+
+# Fixed weights of units that are neither mass nor volume.
+UNIT_GRAMS = {
+    "pinch": 0.3,
+    "dash": 0.6,
+    "handful": 30.0,
+    "slice": 25.0,
+    "stick": 113.0
+}
+
+UNIT_ALIASES = {
+    "gram": "g", "grams": "g", "gr": "g", "grs": "g",
+    "kilogram": "kg", "kilograms": "kg", "kgs": "kg",
+    "milligram": "mg", "milligrams": "mg",
+    "ounce": "oz", "ounces": "oz",
+    "pound": "lb", "pounds": "lb", "lbs": "lb",
+    "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml", "mls": "ml",
+    "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "teaspoon": "tsp", "teaspoons": "tsp", "tsps": "tsp",
+    "tablespoon": "tbsp", "tablespoons": "tbsp", "tbsps": "tbsp", "tbs": "tbsp", "tbl": "tbsp",
+    "fluid ounce": "fl oz", "fluid ounces": "fl oz", "fl. oz": "fl oz", "floz": "fl oz",
+    "cups": "cup", "c": "cup",
+    "pints": "pint", "pt": "pint",
+    "quarts": "quart", "qt": "quart",
+    "gallons": "gallon", "gal": "gallon",
+    "pinches": "pinch", "dashes": "dash", "handfuls": "handful",
+    "slices": "slice", "sticks": "stick",
+    "cloves": "clove",
+    "pieces": "piece", "pcs": "piece",
+    "whole": "piece", "medium": "piece", "mediums": "piece",
+    "smalls": "small", "larges": "large",
+    "servings": "serving"
+}
+
+# Single-letter spoon abbreviations differ only in case: "1 T" is a
+# tablespoon, "1 t" a teaspoon. They are looked up before lowercasing.
+CASE_SENSITIVE_UNITS = {"T": "tbsp", "t": "tsp"}
+
+# Size words scale the usual weight of one piece.
+SIZE_FACTORS = {"piece": 1.0, "small": 0.75, "large": 1.25}
+
+# ===== Ingredient Tables =====
+
+# Grams per millilitre, matched on the ingredient name. Anything not listed
+# is taken to weigh like water.
+DEFAULT_DENSITY = 1.0
+DENSITIES = {
+    "water": 1.0,
+    "milk": 1.03,
+    "cream": 1.0,
+    "yogurt": 1.03,
+    "oil": 0.92,
+    "butter": 0.96,
+    "flour": 0.53,
+    "sugar": 0.85,
+    "brown sugar": 0.9,
+    "powdered sugar": 0.56,
+    "salt": 1.2,
+    "baking soda": 0.9,
+    "baking powder": 0.9,
+    "cocoa": 0.42,
+    "honey": 1.42,
+    "syrup": 1.33,
+    "molasses": 1.4,
+    "rice": 0.85,
+    "oats": 0.34,
+    "quinoa": 0.72,
+    "lentils": 0.8,
+    "breadcrumbs": 0.45,
+    "cheese": 0.45,
+    "parmesan": 0.4,
+    "peanut butter": 1.08,
+    "nuts": 0.55,
+    "spinach": 0.13,
+    "lettuce": 0.2,
+    "parsley": 0.25,
+    "cilantro": 0.25,
+    "basil": 0.25,
+    "pepper": 0.45,
+    "cinnamon": 0.53,
+    "vinegar": 1.01,
+    "juice": 1.04,
+    "broth": 1.0,
+    "stock": 1.0,
+    "wine": 0.99,
+    "soy sauce": 1.15,
+    "mayonnaise": 0.91,
+    "ketchup": 1.1
+}
+
+# Grams of one medium piece, for counts like "2 eggs" or "1 large onion".
+# The longest matching name wins, so "egg yolk" is not weighed as an egg.
+PIECE_GRAMS = {
+    "egg": 50.0,
+    "egg yolk": 17.0,
+    "yolk": 17.0,
+    "egg white": 33.0,
+    "garlic": 3.0,
+    "onion": 110.0,
+    "shallot": 45.0,
+    "scallion": 15.0,
+    "potato": 170.0,
+    "sweet potato": 130.0,
+    "tomato": 120.0,
+    "carrot": 60.0,
+    "celery": 40.0,
+    "bell pepper": 120.0,
+    "jalapeno": 14.0,
+    "zucchini": 200.0,
+    "cucumber": 300.0,
+    "avocado": 150.0,
+    "apple": 180.0,
+    "banana": 120.0,
+    "orange": 130.0,
+    "lemon": 60.0,
+    "lime": 45.0,
+    "chicken breast": 170.0,
+    "chicken thigh": 110.0,
+    "tortilla": 45.0,
+    "bread": 25.0,
+    "bay leaf": 0.2
+}
+
+# ===== Parsing =====
+
+_VULGAR_FRACTIONS = {"¼": "1/4", "½": "1/2", "¾": "3/4", "⅓": "1/3", "⅔": "2/3", "⅛": "1/8", "⅜": "3/8", "⅝": "5/8", "⅞": "7/8"}
+# "1,000" groups thousands; any other comma is a decimal point ("1,5").
+_THOUSANDS = r"\d{1,3}(?:,\d{3})+(?:\.\d+)?(?!\d)"
+_NUMBER = rf"\d+\s+\d+/\d+|\d+/\d+|{_THOUSANDS}|\d+(?:[.,]\d+)?|\.\d+"
+_MEASURE_PATTERN = re.compile(rf"^\s*(?P<amount>{_NUMBER})(?:\s*(?:-|–|to)\s*(?P<upper>{_NUMBER}))?\s*(?P<unit>.*?)\s*$")
+
+def _number(text):
+    if re.fullmatch(_THOUSANDS, text):
+        return float(text.replace(",", ""))
+    total = Fraction(0)
+    for part in text.replace(",", ".").split():
+        total += Fraction(part)
+    return float(total)
+
+def normalize_unit(unit):
+    unit = unit.strip().rstrip(".")
+    if unit in CASE_SENSITIVE_UNITS:
+        return CASE_SENSITIVE_UNITS[unit]
+    unit = unit.lower()
+    return UNIT_ALIASES.get(unit, unit)
+
+# "1 1/2 cups" -> (1.5, "cup"), "200g" -> (200.0, "g"), "2-3 cloves" ->
+# (2.5, "clove"), "3" -> (3.0, ""). Returns None for anything without a
+# leading amount, such as "to taste".
+def parse_measure(text):
+    if not text:
+        return None
+    for symbol, fraction in _VULGAR_FRACTIONS.items():
+        text = text.replace(symbol, f" {fraction}")
+
+    match = _MEASURE_PATTERN.match(text)
+    if match is None:
+        return None
+
+    amount = _number(match.group("amount"))
+    if match.group("upper"):
+        amount = (amount + _number(match.group("upper"))) / 2
+    return amount, normalize_unit(match.group("unit"))
+
+def _lookup(table, ingredient):
+    name = f" {' '.join(re.findall(r'[a-z]+', (ingredient or '').lower()))} "
+    best = None
+    for key in table:
+        if f" {key} " in name or f" {key}s " in name or f" {key}es " in name:
+            if best is None or len(key) > len(best):
+                best = key
+    return table[best] if best is not None else None
+
+def density(ingredient):
+    found = _lookup(DENSITIES, ingredient)
+    return DEFAULT_DENSITY if found is None else found
+
+def piece_grams(ingredient):
+    return _lookup(PIECE_GRAMS, ingredient)
+
+# Grams of `ingredient` described by a measure string, or None when the
+# measure cannot be turned into a weight ("to taste", "1 serving", a count
+# of something with no known piece weight).
+def measure_grams(measure, ingredient=None):
+    parsed = parse_measure(measure)
+    if parsed is None:
+        return None
+
+    amount, unit = parsed
+    if unit in MASS_GRAMS:
+        return amount * MASS_GRAMS[unit]
+    if unit in VOLUME_ML:
+        return amount * VOLUME_ML[unit] * density(ingredient)
+    if unit in UNIT_GRAMS:
+        return amount * UNIT_GRAMS[unit]
+    if unit == "clove":
+        return amount * PIECE_GRAMS["garlic"]
+
+    # "2 large eggs": a leading size word scales the piece named after it,
+    # or the ingredient itself when nothing follows ("1 large").
+    size, _, rest = unit.partition(" ")
+    factor = SIZE_FACTORS.get(normalize_unit(size))
+    if factor is not None:
+        unit = rest.strip()
+    else:
+        factor = 1.0
+
+    # "2 eggs": the unit word names the food itself.
+    weight = piece_grams(unit if unit else ingredient)
+    return None if weight is None else amount * weight * factor
@@ -0,0 +1,266 @@
+# ===== Imports =====
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from .config import env_int, env_str
+
+# ===== Defaults =====
+DEFAULT_RECENT_OPERATIONS = 50
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_PREFIX = "recipe_"
+
+# ===== Operations =====
+
+# One user-visible action, e.g. a recipe fetch, together with every span
+# recorded while it was active. Spans from worker threads run in parallel,
+# so the per-stage totals in `breakdown` can add up to more than `duration`.
+class Operation:
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.duration = None
+        self.error = None
+        self.spans = []
+
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_span(self, name, duration, labels):
+        with self._lock:
+            self.spans.append((name, duration, labels))
+
+    def finish(self, error=None):
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def breakdown(self):
+        totals = {}
+        with self._lock:
+            for name, duration, _ in self.spans:
+                totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            spans = [{"span": name, "seconds": round(duration, 6), **labels} for name, duration, labels in self.spans]
+        return {
+            "operation": self.name,
+            "started": self.started,
+            "seconds": round(self.duration, 6) if self.duration is not None else None,
+            "error": self.error,
+            "spans": spans
+        }
+
+# The active operation is tracked per thread. Work handed to a thread pool
+# keeps reporting into it when the callable is wrapped with `bind`.
+_local = threading.local()
+
+def current_operation():
+    return getattr(_local, "operation", None)
+
+@contextmanager
+def activate(operation):
+    previous = current_operation()
+    _local.operation = operation
+    try:
+        yield operation
+    finally:
+        _local.operation = previous
+
+def bind(func):
+    operation = current_operation()
+    if operation is None:
+        return func
+
+    def bound(*args, **kwargs):
+        with activate(operation):
+            return func(*args, **kwargs)
+    return bound
+
+# ===== Metrics Registry =====
+
+# Label values are stored as strings, so a label that is sometimes an int
+# (an HTTP status) and sometimes a str (an exception name) still sorts.
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+# In-process counters and latency histograms, plus a ring buffer of the last
+# finished operations. Everything is kept in plain dicts keyed by
+# (metric name, sorted label items) so recording stays cheap.
+class Metrics:
+    def __init__(self, recent=DEFAULT_RECENT_OPERATIONS, prometheus_path=None, trace_path=None):
+        self.prometheus_path = prometheus_path
+        self.trace_path = trace_path
+        self.recent = deque(maxlen=recent)
+
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+
+    def incr(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0, 0.0, [0] * len(LATENCY_BUCKETS)]
+            histogram[0] += 1
+            histogram[1] += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    histogram[2][i] += 1
+                    break
+
+    def counter(self, name, **labels):
+        with self._lock:
+            if labels:
+                return self._counters.get((name, _label_key(labels)), 0)
+            return sum(value for (counter_name, _), value in self._counters.items() if counter_name == name)
+
+    def record_operation(self, operation):
+        self.observe("operation_duration_seconds", operation.duration, operation=operation.name)
+        if operation.error:
+            self.incr("operation_errors_total", operation=operation.name)
+
+        with self._lock:
+            self.recent.append(operation)
+
+        if self.trace_path:
+            self.append_jsonl(self.trace_path, [operation])
+        if self.prometheus_path:
+            self.write_prometheus(self.prometheus_path)
+
+    def recent_operations(self):
+        with self._lock:
+            return list(self.recent)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.recent.clear()
+
+    # ===== Export =====
+
+    # Prometheus text exposition format, suitable for the node_exporter
+    # textfile collector or for serving as-is.
+    def prometheus_text(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, (count, total, list(buckets))) for key, (count, total, buckets) in self._histograms.items())
+
+        lines = []
+        declared = set()
+        for (name, labels), value in counters:
+            metric = METRIC_PREFIX + name
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+
+        for (name, labels), (count, total, buckets) in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+    # Written to a temporary file and renamed so a scraper never reads a
+    # half-written file.
+    def write_prometheus(self, path):
+        temporary = f"{path}.tmp"
+        with self._file_lock:
+            with open(temporary, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(temporary, path)
+
+    def append_jsonl(self, path, operations=None):
+        operations = self.recent_operations() if operations is None else operations
+        with self._file_lock, open(path, "a", encoding="utf-8") as f:
+            for operation in operations:
+                f.write(json.dumps(operation.to_dict()) + "\n")
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label_value(value)}"' for key, value in labels) + "}"
+
+def _escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# ===== Shared Registry =====
+_metrics = None
+_metrics_lock = threading.Lock()
+
+# RECIPE_METRICS_PATH rewrites a Prometheus text file and RECIPE_TRACE_PATH
+# appends one JSON line per finished operation.
+def get_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics(
+                recent=env_int('RECIPE_RECENT_OPERATIONS', DEFAULT_RECENT_OPERATIONS),
+                prometheus_path=env_str('RECIPE_METRICS_PATH', None),
+                trace_path=env_str('RECIPE_TRACE_PATH', None)
+            )
+    return _metrics
+
+# ===== Recording =====
+
+def incr(name, amount=1, **labels):
+    get_metrics().incr(name, amount, **labels)
+
+# Times the enclosed block into the `span_duration_seconds` histogram and the
+# active operation. The yielded dict can be filled in with labels that are
+# only known once the block has run.
+@contextmanager
+def span(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield labels
+    finally:
+        seconds = time.perf_counter() - start
+        get_metrics().observe("span_duration_seconds", seconds, span=name, **labels)
+        operation = current_operation()
+        if operation is not None:
+            operation.add_span(name, seconds, dict(labels))
+
+def start_operation(name):
+    return Operation(name)
+
+def finish_operation(operation, error=None):
+    operation.finish(error)
+    get_metrics().record_operation(operation)
+
+@contextmanager
+def operation(name):
+    current = start_operation(name)
+    error = None
+    try:
+        with activate(current):
+            yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        finish_operation(current, error)
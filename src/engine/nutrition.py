@@ -0,0 +1,42 @@
+# ===== Imports =====
+from .vectors import PANEL_INDEX, NUTRIENT_PANEL, nutrient_vector, meal_totals
+
+# ===== Nutrient Fields =====
+
+# Summary shown in the GUI: (label, USDA nutrient id, unit, required)
+NUTRIENT_FIELDS = [
+    ("Calories", 1008, "kcal", True),
+    ("Protein", 1003, "g", True),
+    ("Fat", 1004, "g", True),
+    ("Carbs", 1005, "g", True),
+    ("Fiber", 1079, "g", False),
+    ("Calcium", 1087, "mg", False)
+]
+
+NUTRIENT_UNITS = {label: unit for label, _, unit, _ in NUTRIENT_FIELDS}
+
+class IncompleteNutritionError(ValueError):
+    pass
+
+# ===== Meal Math =====
+
+def food_vector(USDA_json):
+    vector, present = nutrient_vector(USDA_json)
+
+    for label, nutrient_id, _, required in NUTRIENT_FIELDS:
+        if required and not present[PANEL_INDEX[nutrient_id]]:
+            raise IncompleteNutritionError(f"Missing {label} for food {USDA_json.get('fdcId')}")
+
+    return vector
+
+def summarize(vector):
+    return {label: float(vector[PANEL_INDEX[nutrient_id]]) for label, nutrient_id, _, _ in NUTRIENT_FIELDS}
+
+def full_panel(vector):
+    return [(name, unit, float(vector[i])) for i, (_, name, unit) in enumerate(NUTRIENT_PANEL)]
+
+def nutrition(USDA_json, factor=1.0):
+    return summarize(food_vector(USDA_json) * factor)
+
+def recipe_total(vectors, grams):
+    return meal_totals(vectors, grams)
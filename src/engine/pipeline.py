@@ -0,0 +1,117 @@
+# ===== Imports =====
+import queue
+import threading
+from .metrics import bind, span
+
+# ===== Defaults =====
+DEFAULT_QUEUE_SIZE = 16
+POLL_SECONDS = 0.05
+
+_END = object()
+
+# ===== Stages =====
+
+# One step of a pipeline: `func(item)` returns an iterable of zero or more
+# items for the next stage, and `workers` threads run it side by side.
+class Stage:
+    def __init__(self, name, func, workers=1):
+        self.name = name
+        self.func = func
+        self.workers = workers
+
+# ===== Pipeline =====
+
+# Runs `stages` as a chain of thread pools joined by bounded queues and yields
+# what the last stage produces, as soon as it is produced. A slow stage fills
+# the queue in front of it, which blocks the stages upstream instead of
+# letting work pile up in memory, so total latency tends towards the slowest
+# stage rather than the sum of all of them.
+#
+# The first error in any stage stops the pipeline and is raised from the
+# generator. `cancelled()` is polled between items; closing the generator
+# early also stops every stage.
+def run_pipeline(source, stages, queue_size=DEFAULT_QUEUE_SIZE, cancelled=None):
+    stop = threading.Event()
+    errors = []
+    queues = [queue.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    def stopped():
+        return stop.is_set() or (cancelled is not None and cancelled())
+
+    def put(q, item):
+        while not stopped():
+            try:
+                q.put(item, timeout=POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(q):
+        while not stopped():
+            try:
+                return q.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+        return _END
+
+    def fail(e):
+        errors.append(e)
+        stop.set()
+
+    def feed():
+        try:
+            for item in source:
+                if not put(queues[0], item):
+                    return
+        except Exception as e:
+            fail(e)
+        finally:
+            put(queues[0], _END)
+
+    def run_stage(stage, inbox, outbox, remaining):
+        try:
+            while True:
+                item = get(inbox)
+                if item is _END:
+                    # Let sibling workers see the end too.
+                    put(inbox, _END)
+                    break
+                with span(f"pipeline.{stage.name}"):
+                    results = stage.func(item)
+                for result in results or ():
+                    if not put(outbox, result):
+                        return
+        except Exception as e:
+            fail(e)
+        finally:
+            with remaining["lock"]:
+                remaining["workers"] -= 1
+                last = remaining["workers"] == 0
+            if last:
+                put(outbox, _END)
+
+    threads = [threading.Thread(target=bind(feed), name="pipeline-source", daemon=True)]
+    for i, stage in enumerate(stages):
+        remaining = {"workers": stage.workers, "lock": threading.Lock()}
+        for n in range(stage.workers):
+            threads.append(threading.Thread(
+                target=bind(run_stage), args=(stage, queues[i], queues[i + 1], remaining),
+                name=f"pipeline-{stage.name}-{n}", daemon=True
+            ))
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = get(queues[-1])
+            if item is _END:
+                break
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,596 @@
+# ===== Imports =====
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit, urlunsplit
+from .cache import ResponseCache
+from .config import spoonacular_api_key, spoonacular_base_url, env_int, env_str
+from .drivers import DriverPool, DEFAULT_POOL_SIZE, DEFAULT_MAX_PAGES
+from .extract import extract_recipe_page, fast_path_available
+from .http_client import get_http_client, find_by_ingredients_cost, information_bulk_cost
+from .measures import measure_grams
+from .metrics import bind, incr, span
+from .nutrition import NUTRIENT_UNITS, recipe_total, summarize
+from .pipeline import Stage, run_pipeline
+
+# ===== Recipe Search =====
+# Each result costs Spoonacular points and a page load, so searches return
+# two recipes unless RECIPE_DEFAULT_RESULTS asks for more.
+DEFAULT_RECIPE_RESULTS = 2
+MAX_RECIPE_RESULTS = 100
+
+# ===== Spoonacular Bulk Fetching =====
+SPOONACULAR_BULK_SIZE = 50
+SPOONACULAR_FETCH_WORKERS = 4
+
+# ===== Pipelined Recipe Search =====
+# The first informationBulk call is kept small so pages start loading after
+# one short round trip; later calls use the full bulk size.
+PIPELINE_FIRST_CHUNK = 5
+DEFAULT_BUILD_WORKERS = 4
+DEFAULT_PIPELINE_QUEUE_SIZE = 16
+
+# ===== Recipe Scraping Workers =====
+# Pages usually come through the static fast path, so scraping runs wider
+# than the Chrome pool; browser fallbacks still queue on the pool's size.
+DEFAULT_SCRAPE_WORKERS = 8
+
+# ===== Static Page Fetching =====
+STATIC_FETCH_USER_AGENT = "Mozilla/5.0 (compatible; RecipeNutritionApp)"
+
+# ===== Parsed Recipe Store =====
+# Bump RECIPE_PARSER_VERSION whenever build_recipe_record or the page
+# extractors change what they produce; older records are then ignored.
+RECIPE_PARSER_VERSION = 5
+DEFAULT_RECIPE_STORE_PATH = os.path.join(os.path.expanduser("~"), ".recipe_nutrition_recipes.sqlite3")
+DEFAULT_RECIPE_STORE_TTL = 30 * 24 * 60 * 60
+DEFAULT_RECIPE_STORE_MAX_ENTRIES = 5000
+
+_recipe_store = None
+_recipe_store_lock = threading.Lock()
+
+def get_recipe_store():
+    global _recipe_store
+    with _recipe_store_lock:
+        if _recipe_store is None:
+            _recipe_store = ResponseCache(
+                path=env_str('RECIPE_STORE_PATH', DEFAULT_RECIPE_STORE_PATH),
+                ttl=env_int('RECIPE_STORE_TTL', DEFAULT_RECIPE_STORE_TTL),
+                max_entries=env_int('RECIPE_STORE_MAX_ENTRIES', DEFAULT_RECIPE_STORE_MAX_ENTRIES),
+                name="recipe"
+            )
+    return _recipe_store
+
+# Query strings and fragments do not change which recipe a page shows.
+def recipe_key(url):
+    parts = urlsplit(url)
+    return f"recipe:v{RECIPE_PARSER_VERSION}:{urlunsplit((parts.scheme, parts.netloc.lower(), parts.path.rstrip('/'), '', ''))}"
+
+# ===== Local Recipe Corpus =====
+# "auto" answers an ingredient set from the corpus when it was searched
+# remotely within RECIPE_CORPUS_REFRESH seconds, "local" never calls
+# findByIngredients, "remote" always does. Every remote search extends the
+# corpus.
+DEFAULT_CORPUS_MODE = "auto"
+
+_recipe_corpus = None
+_recipe_corpus_lock = threading.Lock()
+
+def get_recipe_corpus():
+    global _recipe_corpus
+    with _recipe_corpus_lock:
+        if _recipe_corpus is None:
+            from .corpus import RecipeCorpus, DEFAULT_CORPUS_PATH
+
+            _recipe_corpus = RecipeCorpus(env_str('RECIPE_CORPUS_PATH', DEFAULT_CORPUS_PATH))
+    return _recipe_corpus
+
+# ===== Chrome Driver Pool =====
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+def get_driver_pool():
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            from selenium.webdriver.chrome.options import Options
+
+            browser_options = Options()
+            browser_options.add_argument('--headless=new')
+
+            _driver_pool = DriverPool(
+                browser_options,
+                size=env_int('RECIPE_DRIVER_POOL_SIZE', DEFAULT_POOL_SIZE),
+                max_pages=env_int('RECIPE_DRIVER_MAX_PAGES', DEFAULT_MAX_PAGES)
+            )
+            atexit.register(_driver_pool.close)
+    return _driver_pool
+
+# ===== Recipe Search =====
+
+# Read on every call, like the API keys, so a .env loaded after import counts.
+def default_recipe_results():
+    return max(1, min(env_int('RECIPE_DEFAULT_RESULTS', DEFAULT_RECIPE_RESULTS), MAX_RECIPE_RESULTS))
+
+def fetch_recipe_data(food_list, number=None):
+    number = max(1, min(default_recipe_results() if number is None else number, MAX_RECIPE_RESULTS))
+    corpus = get_recipe_corpus()
+    if use_corpus(corpus, food_list, number):
+        matches = find_in_corpus(corpus, food_list, number)
+        return [match["url"] for match in matches], {match["title"]: match["missedIngredients"] for match in matches}
+
+    json_file = find_by_ingredients(food_list, number)
+
+    ids = [item["id"] for item in json_file]
+    chunks = [ids[i:i + SPOONACULAR_BULK_SIZE] for i in range(0, len(ids), SPOONACULAR_BULK_SIZE)]
+    info_by_id = {}
+
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(SPOONACULAR_FETCH_WORKERS, len(chunks))) as pool:
+            for info_list in pool.map(bind(fetch_recipe_information), chunks):
+                for info in info_list:
+                    info_by_id[info["id"]] = info
+
+    url_list = []
+    missed = {}
+    found = []
+
+    for item in json_file:
+        recipe = corpus_recipe(item, info_by_id.get(item["id"]))
+        if recipe is None:
+            continue
+        url_list.append(recipe["url"])
+        missed[item["title"]] = [i["name"] for i in item.get("missedIngredients", [])]
+        found.append(recipe)
+
+    corpus.add_many(found)
+    corpus.record_search(food_list, number)
+    return url_list, missed
+
+def use_corpus(corpus, food_list, number):
+    from .corpus import DEFAULT_CORPUS_REFRESH
+
+    mode = env_str('RECIPE_CORPUS_MODE', DEFAULT_CORPUS_MODE)
+    return mode == "local" or (mode == "auto" and corpus.covers(food_list, number, env_int('RECIPE_CORPUS_REFRESH', DEFAULT_CORPUS_REFRESH)))
+
+def find_in_corpus(corpus, food_list, number):
+    with span("corpus.find"):
+        matches = corpus.find(food_list, number)
+    incr("corpus_searches_total")
+    return matches
+
+def find_by_ingredients(food_list, number):
+    with span("spoonacular.find_by_ingredients"):
+        response = get_http_client().get(
+            f"{spoonacular_base_url()}/recipes/findByIngredients",
+            params={"ingredients": ",".join(food.strip() for food in food_list), "number": number, "apiKey": spoonacular_api_key()},
+            limiter="spoonacular",
+            cost=find_by_ingredients_cost(number)
+        )
+        return response.json()
+
+# Joins a findByIngredients item with its informationBulk entry into the
+# corpus's recipe shape, or None when the recipe has no page to scrape.
+def corpus_recipe(item, price_data):
+    if not price_data or not price_data.get("spoonacularSourceUrl"):
+        return None
+
+    ingredients = [i["name"] for i in price_data.get("extendedIngredients", [])]
+    return {
+        "id": item["id"],
+        "title": item["title"],
+        "url": price_data["spoonacularSourceUrl"],
+        "ingredients": ingredients or [i["name"] for i in item.get("usedIngredients", []) + item.get("missedIngredients", [])]
+    }
+
+def fetch_recipe_information(chunk):
+    import requests
+
+    ids = ",".join(str(id) for id in chunk)
+    try:
+        with span("spoonacular.information_bulk"):
+            price_response = get_http_client().get(
+                f"{spoonacular_base_url()}/recipes/informationBulk",
+                params={"ids": ids, "apiKey": spoonacular_api_key()},
+                limiter="spoonacular",
+                cost=information_bulk_cost(len(chunk))
+            )
+            return price_response.json()
+    except requests.exceptions.RequestException:
+        incr("swallowed_failures_total", step="information_bulk")
+        return []
+
+# ===== Recipe Scraping =====
+
+# Recipes already in the store are reported first without touching the
+# network; only new or stale pages are scraped. `on_recipe` is called as
+# each page finishes, in completion order, so the first result arrives
+# after one page's latency whatever the total. The returned list keeps the
+# order of `recipe_urls`.
+def scrape_recipe_details(recipe_urls, on_recipe=None, cancelled=None):
+    if not recipe_urls:
+        return []
+
+    recipe_store = get_recipe_store()
+    records = {}
+    to_scrape = []
+
+    for i, url in enumerate(recipe_urls):
+        stored = recipe_store.get(recipe_key(url))
+        if stored is None:
+            to_scrape.append((i, url))
+            continue
+        records[i] = tuple(stored)
+        if on_recipe:
+            on_recipe(records[i])
+
+    if not to_scrape or (cancelled and cancelled()):
+        return [records[i] for i in sorted(records)]
+
+    workers = env_int('RECIPE_SCRAPE_WORKERS', DEFAULT_SCRAPE_WORKERS)
+    with ThreadPoolExecutor(max_workers=min(workers, len(to_scrape))) as pool:
+        futures = {pool.submit(bind(scrape_recipe_page), url): (i, url) for i, url in to_scrape}
+
+        for future in as_completed(futures):
+            if cancelled and cancelled():
+                for pending in futures:
+                    pending.cancel()
+                break
+
+            i, url = futures[future]
+            record = future.result()
+            records[i] = record
+            if is_complete_record(record):
+                recipe_store.set(recipe_key(url), record)
+            if on_recipe:
+                on_recipe(record)
+
+    return [records[i] for i in sorted(records)]
+
+# ===== Pipelined Recipe Search =====
+
+# Search, information lookup, page loading and record building run as
+# stages joined by bounded queues, so each recipe moves on as soon as its
+# previous step is done: pages start loading after the first small
+# informationBulk call, and records are built while other pages are still
+# in flight. Yields records in completion order. `on_found(missed, total)`
+# is called once the search has returned, before any record.
+def stream_recipes(food_list, number=None, on_found=None, cancelled=None):
+    number = max(1, min(default_recipe_results() if number is None else number, MAX_RECIPE_RESULTS))
+    corpus = get_recipe_corpus()
+    recipe_store = get_recipe_store()
+    remote = not use_corpus(corpus, food_list, number)
+
+    def search():
+        if not remote:
+            matches = find_in_corpus(corpus, food_list, number)
+            if on_found:
+                on_found({match["title"]: match["missedIngredients"] for match in matches}, len(matches))
+            if matches:
+                yield matches
+            return
+
+        json_file = find_by_ingredients(food_list, number)
+        if on_found:
+            on_found({item["title"]: [i["name"] for i in item.get("missedIngredients", [])] for item in json_file}, len(json_file))
+
+        start = 0
+        size = PIPELINE_FIRST_CHUNK
+        while start < len(json_file):
+            yield json_file[start:start + size]
+            start += size
+            size = SPOONACULAR_BULK_SIZE
+
+    def information(chunk):
+        if not remote:
+            return [match["url"] for match in chunk]
+
+        info_by_id = {info["id"]: info for info in fetch_recipe_information([item["id"] for item in chunk])}
+        found = [recipe for recipe in (corpus_recipe(item, info_by_id.get(item["id"])) for item in chunk) if recipe is not None]
+        corpus.add_many(found)
+        return [recipe["url"] for recipe in found]
+
+    def load(url):
+        stored = recipe_store.get(recipe_key(url))
+        if stored is not None:
+            return [(url, None, tuple(stored))]
+        return [(url, load_recipe_page(url), None)]
+
+    def build(loaded):
+        url, page, record = loaded
+        if record is None:
+            with span("scrape.build"):
+                record = build_recipe_record(page, url)
+            if is_complete_record(record):
+                recipe_store.set(recipe_key(url), record)
+        return [record]
+
+    stages = [
+        Stage("information", information, workers=SPOONACULAR_FETCH_WORKERS),
+        Stage("load", load, workers=env_int('RECIPE_SCRAPE_WORKERS', DEFAULT_SCRAPE_WORKERS)),
+        Stage("build", build, workers=DEFAULT_BUILD_WORKERS)
+    ]
+    yield from run_pipeline(search(), stages, env_int('RECIPE_PIPELINE_QUEUE_SIZE', DEFAULT_PIPELINE_QUEUE_SIZE), cancelled)
+
+    if remote and not (cancelled and cancelled()):
+        corpus.record_search(food_list, number)
+
+# Pages that failed to load are not worth remembering.
+def is_complete_record(record):
+    recipe_details, _ = record
+    return recipe_details["name"] != "Unknown Recipe" and bool(recipe_details["ingredients"])
+
+def scrape_recipe_page(url):
+    return build_recipe_record(load_recipe_page(url), url)
+
+# The page's raw fields, from the static HTML when it carries them and from
+# a pooled browser otherwise.
+def load_recipe_page(url):
+    with span("scrape.page") as labels:
+        page = fetch_static_recipe_page(url)
+        labels["path"] = "static"
+
+        if page is None:
+            labels["path"] = "browser"
+            driver_pool = get_driver_pool()
+            with span("driver.acquire"):
+                driver = driver_pool.acquire()
+            try:
+                page = read_recipe_page(driver, url)
+            finally:
+                driver_pool.release(driver)
+
+        return page
+
+def fetch_static_recipe_page(url):
+    if not fast_path_available():
+        return None
+
+    import requests
+
+    try:
+        page_response = get_http_client().get(url, headers={"User-Agent": STATIC_FETCH_USER_AGENT}, timeout=10)
+    except requests.exceptions.RequestException:
+        incr("swallowed_failures_total", step="static_fetch")
+        return None
+
+    with span("scrape.extract_static"):
+        page = extract_recipe_page(page_response.text)
+    if page is None:
+        incr("swallowed_failures_total", step="static_extract")
+    return page
+
+# Amounts are read in whichever unit system the page shows and converted
+# locally, so the unit toggle and serving stepper are never touched.
+def read_recipe_page(driver, url):
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    with span("driver.get"):
+        driver.get(url)
+    try:
+        with span("driver.wait_ready"):
+            WebDriverWait(driver, 10).until(lambda d: d.execute_script("return document.readyState") == "complete")
+    except TimeoutException:
+        incr("swallowed_failures_total", step="wait_ready")
+
+    with span("driver.extract"):
+        return _read_recipe_fields(driver)
+
+def _read_recipe_fields(driver):
+    from selenium.webdriver.common.by import By
+    from selenium.common.exceptions import NoSuchElementException
+
+    measures = []
+    ingredients = []
+    price = []
+    nutrientName = []
+    nutrientValue = []
+    servings = None
+
+    try:
+        # textContent, unlike .text, is filled in for the hidden unit system too.
+        for element in driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-ingredient"):
+            measure = element.find_element(By.CSS_SELECTOR, "div.spoonacular-amount.t12.spoonacular-metric").get_attribute("textContent")
+            measures.append(" ".join(measure.split()))
+
+        for idx, element in enumerate(driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-image-wrapper"), start=1):
+            try:
+                ingredient = driver.find_element(By.XPATH, f'//*[@id=\"spoonacular-ingredient-vis-grid\"]/div[{idx}]/div/div[4]').text
+                ingredients.append(ingredient)
+            except NoSuchElementException:
+                break
+
+        recipe_name = driver.find_element(By.XPATH, '//*[@id="wrapper"]/div/div[3]/h1').text
+    except Exception:
+        incr("swallowed_failures_total", step="ingredients")
+        recipe_name = "Unknown Recipe"
+
+    try:
+        servings = driver.find_element(By.ID, "spoonacular-serving-stepper").get_attribute("value")
+    except Exception:
+        incr("swallowed_failures_total", step="servings")
+
+    try:
+        for element in driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-nutrient-name"):
+            nutrientName.append(element.text)
+        for element in driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-nutrient-value"):
+            nutrientValue.append(element.text)
+    except Exception:
+        incr("swallowed_failures_total", step="nutrients")
+
+    try:
+        for element in driver.find_elements(By.ID, "spoonacularPriceBreakdownTable"):
+            prices = element.find_element(By.CSS_SELECTOR, "div.spoonacular-quickview").text
+            price.append(prices)
+    except Exception:
+        incr("swallowed_failures_total", step="price")
+
+    return {
+        "name": recipe_name,
+        "ingredients": ingredients,
+        "measures": measures,
+        "nutrient_names": nutrientName,
+        "nutrient_values": nutrientValue,
+        "price": price,
+        "servings": servings
+    }
+
+# The record keeps each ingredient's weight and the page's serving count, so
+# nutrition is computed from USDA data for any serving count. Building never
+# sends a USDA request: ingredients that only a remote search could match
+# are listed under "pending" until complete_recipe_records looks them up.
+# The page's own nutrient panel is used when no ingredient could be counted.
+def build_recipe_record(page, url=None):
+    ingredients = dict(zip(page["ingredients"], page["measures"]))
+    recipe_details = {
+        "name": page["name"],
+        "url": url,
+        "ingredients": ingredients,
+        "price": page["price"],
+        "servings": parse_servings(page.get("servings")),
+        "grams": {ingredient: measure_grams(measure, ingredient) for ingredient, measure in ingredients.items()},
+        "page_nutrients": scraped_nutrients(page)
+    }
+    return recipe_details, recipe_nutrients(recipe_details)
+
+# Nutrient panel text for a record, updating its "pending" list. Local
+# failures are swallowed so a record is always built; with `remote`, lookup
+# errors reach the caller.
+def recipe_nutrients(recipe_details, remote=False):
+    ingredients = recipe_details["ingredients"]
+    try:
+        vector, missing, pending = _recipe_nutrition(recipe_details, 1, remote)
+    except Exception:
+        if remote:
+            raise
+        incr("swallowed_failures_total", step="local_nutrition")
+        vector, missing, pending = None, list(ingredients), []
+
+    recipe_details["pending"] = pending
+    if len(missing) + len(pending) == len(ingredients):
+        return dict(recipe_details["page_nutrients"])
+
+    nutrientDictItems = {label: f"{value:.0f}{NUTRIENT_UNITS[label]}" for label, value in summarize(vector).items()}
+    if missing:
+        nutrientDictItems["Not counted"] = ", ".join(missing)
+    if pending:
+        nutrientDictItems["Not looked up yet"] = ", ".join(pending)
+    return nutrientDictItems
+
+# Looks up the ingredients that `records` left pending, each distinct name
+# once however many recipes share it, and rebuilds their nutrients. Records
+# with nothing pending come back unchanged; completed ones replace their
+# stored copy.
+def complete_recipe_records(records):
+    from .meal import prefetch_densities
+
+    pending = [name for recipe_details, _ in records for name in recipe_details.get("pending", ())]
+    if not pending:
+        return list(records)
+
+    with span("recipes.complete"):
+        fdc_ids, _ = resolve_ingredients(pending, remote=True)
+        prefetch_densities([fdc_id for fdc_id in fdc_ids.values() if fdc_id is not None])
+
+        recipe_store = get_recipe_store()
+        completed = []
+        for recipe_details, nutrientDictItems in records:
+            if recipe_details.get("pending"):
+                recipe_details = dict(recipe_details)
+                nutrientDictItems = recipe_nutrients(recipe_details, remote=True)
+                if recipe_details.get("url") and is_complete_record((recipe_details, nutrientDictItems)):
+                    recipe_store.set(recipe_key(recipe_details["url"]), (recipe_details, nutrientDictItems))
+            completed.append((recipe_details, nutrientDictItems))
+        return completed
+
+def complete_recipe_record(record):
+    return complete_recipe_records([record])[0]
+
+def parse_servings(value):
+    try:
+        return max(1, int(float(value)))
+    except (TypeError, ValueError):
+        return 1
+
+def scraped_nutrients(page):
+    nutrientName = page["nutrient_names"]
+    nutrientValue = page["nutrient_values"]
+
+    return {
+        "Calories": nutrientValue[nutrientName.index("Calories")] if "Calories" in nutrientName else "N/A",
+        "Protein": nutrientValue[nutrientName.index("Protein")] if "Protein" in nutrientName else "N/A",
+        "Fat": nutrientValue[nutrientName.index("Fat")] if "Fat" in nutrientName else "N/A",
+        "Carbs": nutrientValue[nutrientName.index("Carbohydrates")] if "Carbohydrates" in nutrientName else "N/A",
+        "Fiber": nutrientValue[nutrientName.index("Fiber")] if "Fiber" in nutrientName else "N/A",
+        "Calcium": nutrientValue[nutrientName.index("Calcium")] if "Calcium" in nutrientName else "N/A"
+    }
+
+# ===== Local Recipe Nutrition =====
+
+# The learned resolver answers names the user has picked before; anything
+# else takes the best USDA search hit. Without `remote` only local data is
+# searched (the SR Legacy database and cached responses), and names it does
+# not know come back as the second value. With `remote` those are searched
+# in parallel; concurrent searches for one name share a request.
+def resolve_ingredients(names, remote=False):
+    from .batch import best_match
+    from .meal import get_food_resolver
+    from .usda import search_foods, FDC_FETCH_WORKERS
+
+    resolver = get_food_resolver()
+    fdc_ids = {}
+    unknown = []
+    for name in dict.fromkeys(names):
+        match = resolver.resolve(name)
+        if match is None:
+            USDA_json = search_foods(name, remote=False)
+            if USDA_json is None:
+                unknown.append(name)
+                continue
+            match = best_match(name, USDA_json.get("foods", []))
+        fdc_ids[name] = match["fdcId"] if match else None
+
+    if not remote or not unknown:
+        return fdc_ids, unknown
+
+    def search(name):
+        return best_match(name, search_foods(name).get("foods", []))
+
+    with ThreadPoolExecutor(max_workers=min(FDC_FETCH_WORKERS, len(unknown))) as pool:
+        for name, match in zip(unknown, pool.map(bind(search), unknown)):
+            fdc_ids[name] = match["fdcId"] if match else None
+    return fdc_ids, []
+
+# Nutrient vector for `servings` servings of a recipe record, summed from
+# per-100 g USDA densities, plus the ingredients that could not be counted
+# (no weight, no matching food, or incomplete USDA data). Without `remote`,
+# ingredients that need a USDA request are counted as missing too.
+def recipe_nutrition(recipe_details, servings=1, remote=True):
+    vector, missing, pending = _recipe_nutrition(recipe_details, servings, remote)
+    return vector, missing + pending
+
+def _recipe_nutrition(recipe_details, servings, remote):
+    from .meal import cached_density, has_density, prefetch_densities
+
+    weighed = {name: grams for name, grams in recipe_details.get("grams", {}).items() if grams}
+    fdc_ids, pending = resolve_ingredients(weighed, remote)
+    prefetch_densities([fdc_id for fdc_id in fdc_ids.values() if fdc_id is not None], remote=remote)
+
+    scale = servings / (recipe_details.get("servings") or 1)
+    vectors = []
+    grams = []
+    missing = [name for name in recipe_details["ingredients"] if name not in weighed]
+    for name, fdc_id in fdc_ids.items():
+        if fdc_id is not None and not remote and not has_density(fdc_id):
+            pending.append(name)
+            continue
+        vector = cached_density(fdc_id) if fdc_id is not None else None
+        if vector is None:
+            missing.append(name)
+            continue
+        vectors.append(vector)
+        grams.append(weighed[name] * scale)
+
+    return recipe_total(vectors, grams), missing, pending
@@ -0,0 +1,184 @@
+# ===== Imports =====
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from .corpus import ingredient_key
+
+# ===== Defaults =====
+DEFAULT_RESOLVER_PATH = os.path.join(os.path.expanduser("~"), ".recipe_nutrition_resolver.sqlite3")
+
+# A learned choice is applied without asking only when the closest query
+# seen before has the same words as the input (up to plurals and order),
+# that query was answered at least MIN_PICKS times, one food clearly
+# dominates its past choices, and no other food's query is almost as close.
+# Close spellings alone are not enough: "unsalted butter" scores 0.8 against
+# "salted butter" but is a different food.
+MIN_PICKS = 2
+MIN_CHOICE_SHARE = 0.75
+MIN_MARGIN = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS choices (
+    query_key TEXT NOT NULL,
+    fdc_id INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    picks INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (query_key, fdc_id)
+);
+"""
+
+# ===== Match Keys =====
+
+# Case, punctuation and word order do not matter: "Breast, chicken" and
+# "chicken breast" share a key.
+def query_key(query):
+    return " ".join(sorted(re.findall(r"[a-z0-9]+", query.lower())))
+
+def trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def similarity(a, b):
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+def same_words(a, b):
+    return a == b or ingredient_key(a) == ingredient_key(b)
+
+# ===== Learned Resolver =====
+
+# Remembers which fdcId was picked for each ingredient name and answers new
+# names from a character-trigram index over the names seen so far. Choices
+# live in SQLite; the index is rebuilt in memory when the resolver opens.
+class FoodResolver:
+    def __init__(self, path=DEFAULT_RESOLVER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+        self._choices = {}
+        self._descriptions = {}
+        self._grams = {}
+        self._index = {}
+        for key, fdc_id, description, picks in self._conn.execute("SELECT query_key, fdc_id, description, picks FROM choices"):
+            self._remember(key, fdc_id, description, picks)
+
+    def record(self, query, fdc_id, description):
+        key = query_key(query)
+        if not key:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO choices (query_key, fdc_id, description, picks, last_used) VALUES (?, ?, ?, 1, ?) "
+                "ON CONFLICT (query_key, fdc_id) DO UPDATE SET picks = picks + 1, description = excluded.description, last_used = excluded.last_used",
+                (key, fdc_id, description, time.time())
+            )
+            self._conn.commit()
+            self._remember(key, fdc_id, description, 1)
+
+    # Returns {"fdcId", "description", "score"} for a confident match, or
+    # None when the caller should fall back to asking.
+    def resolve(self, query):
+        key = query_key(query)
+        if not key:
+            return None
+
+        with self._lock:
+            ranked = self._candidates(key)
+            if not ranked:
+                return None
+
+            score, best_key = ranked[0]
+            choices = self._choices[best_key]
+            fdc_id, picks = choices.most_common(1)[0]
+
+            if not same_words(key, best_key):
+                return None
+            if sum(choices.values()) < MIN_PICKS or picks / sum(choices.values()) < MIN_CHOICE_SHARE:
+                return None
+            for other_score, other_key in ranked[1:]:
+                if score - other_score >= MIN_MARGIN:
+                    break
+                if self._choices[other_key].most_common(1)[0][0] != fdc_id:
+                    return None
+
+            return {"fdcId": fdc_id, "description": self._descriptions[fdc_id], "score": round(score, 3)}
+
+    def forget(self, query):
+        key = query_key(query)
+        with self._lock:
+            self._conn.execute("DELETE FROM choices WHERE query_key = ?", (key,))
+            self._conn.commit()
+            if self._choices.pop(key, None) is not None:
+                for gram in self._grams.pop(key):
+                    self._index[gram].discard(key)
+
+    def entries(self):
+        with self._lock:
+            return [
+                (key, fdc_id, self._descriptions[fdc_id], picks)
+                for key, choices in sorted(self._choices.items())
+                for fdc_id, picks in choices.most_common()
+            ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, key, fdc_id, description, picks):
+        self._descriptions[fdc_id] = description
+        if key not in self._choices:
+            self._choices[key] = Counter()
+            self._grams[key] = trigrams(key)
+            for gram in self._grams[key]:
+                self._index.setdefault(gram, set()).add(key)
+        self._choices[key][fdc_id] += picks
+
+    # Known keys sharing at least one trigram with `key`, best first.
+    def _candidates(self, key):
+        grams = trigrams(key)
+        related = set()
+        for gram in grams:
+            related |= self._index.get(gram, set())
+        return sorted(((similarity(grams, self._grams[other]), other) for other in related), reverse=True)
+
+# ===== Command Line =====
+#   python -m engine.resolver list
+#   python -m engine.resolver resolve "chicken breast"
+#   python -m engine.resolver forget "chicken breast"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m engine.resolver", description="Inspect or correct learned ingredient choices.")
+    parser.add_argument("--db", default=os.getenv("RECIPE_RESOLVER_PATH", DEFAULT_RESOLVER_PATH))
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="show every learned choice")
+    for name, help_text in [("resolve", "show what an ingredient name resolves to"), ("forget", "drop the learned choices for a name")]:
+        commands.add_parser(name, help=help_text).add_argument("query")
+
+    args = parser.parse_args(argv)
+    resolver = FoodResolver(args.db)
+
+    if args.command == "list":
+        for key, fdc_id, description, picks in resolver.entries():
+            print(f"{key}\t{fdc_id}\t{picks}\t{description}")
+    elif args.command == "resolve":
+        match = resolver.resolve(args.query)
+        print(f"{match['fdcId']}\t{match['score']}\t{match['description']}" if match else "No confident match")
+    else:
+        resolver.forget(args.query)
+
+    resolver.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
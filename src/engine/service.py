@@ -0,0 +1,503 @@
+# ===== Imports =====
+import argparse
+import asyncio
+import json
+import math
+import re
+import secrets
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+from .cache import normalize_query
+from .config import env_int
+from .meal import Meal, get_food_resolver
+from .metrics import get_metrics, incr, operation
+from .nutrition import food_vector, summarize, IncompleteNutritionError
+
+# ===== Defaults =====
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_SERVICE_WORKERS = 32
+DEFAULT_SESSION_TTL = 60 * 60
+SESSION_SWEEP_SECONDS = 60
+KEEP_ALIVE_SECONDS = 30
+MAX_BODY_BYTES = 1 << 20
+SEARCH_CANDIDATES = 10
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# ===== Request Coalescing =====
+
+# Runs blocking engine calls on a thread pool. While a call for a key is in
+# flight, identical requests wait on the same future instead of starting
+# their own, so a burst of clients asking for the same food or recipe search
+# costs one upstream call.
+class Coalescer:
+    def __init__(self, executor):
+        self.executor = executor
+        self._in_flight = {}
+
+    async def run(self, key, func, *args):
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, _traced, key[0], func, args)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+            incr("service_calls_total", call=key[0])
+        else:
+            incr("service_coalesced_total", call=key[0])
+
+        # One client disconnecting must not cancel the call for the others.
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+def _traced(name, func, args):
+    with operation(f"service.{name}"):
+        return func(*args)
+
+# `resolve` looks up the ingredients the recipe records left pending, so
+# every recipe's nutrition is complete at the cost of USDA searches.
+def _search_recipes(ingredients, number, resolve):
+    from .recipes import complete_recipe_records, stream_recipes
+
+    missed = {}
+    records = list(stream_recipes(ingredients, number, on_found=lambda found, total: missed.update(found)))
+    if resolve:
+        records = complete_recipe_records(records)
+    return records, missed
+
+# ===== Sessions =====
+
+class Session:
+    def __init__(self, session_id, resolver):
+        self.session_id = session_id
+        self.meal = Meal(resolver=resolver)
+        self.touched = time.monotonic()
+
+    def touch(self):
+        self.touched = time.monotonic()
+
+# ===== Service =====
+
+# The engine's recipe and meal operations over HTTP/JSON. Caches, the learned
+# resolver and the densities are shared by every client; each session owns
+# only its meal. Meals are touched on the event loop thread alone, so they
+# need no locking.
+class RecipeService:
+    def __init__(self, workers=DEFAULT_SERVICE_WORKERS, session_ttl=DEFAULT_SESSION_TTL):
+        self.session_ttl = session_ttl
+        self.sessions = {}
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="recipe-service")
+        self._coalescer = Coalescer(self._executor)
+        self._resolver = None
+        self._routes = [
+            ("GET", r"/health", self.health),
+            ("GET", r"/metrics", self.metrics),
+            ("GET", r"/foods/search", self.search),
+            ("GET", r"/foods/suggest", self.suggest),
+            ("GET", r"/foods/(\d+)", self.food),
+            ("POST", r"/recipes", self.recipes),
+            ("POST", r"/sessions", self.create_session),
+            ("GET", r"/sessions/(\w+)", self.get_session),
+            ("DELETE", r"/sessions/(\w+)", self.delete_session),
+            ("POST", r"/sessions/(\w+)/items", self.add_item),
+            ("PATCH", r"/sessions/(\w+)/items/(\d+)", self.update_item),
+            ("DELETE", r"/sessions/(\w+)/items/(\d+)", self.remove_item)
+        ]
+
+    # ----- Engine Calls -----
+
+    async def call(self, key, func, *args):
+        try:
+            return await self._coalescer.run(key, func, *args)
+        except ServiceError:
+            raise
+        except Exception as e:
+            raise ServiceError(HTTPStatus.BAD_GATEWAY, f"{type(e).__name__}: {e}")
+
+    async def search_foods(self, query):
+        from .usda import search_foods
+        return await self.call(("search", normalize_query(query)), search_foods, query)
+
+    async def food_details(self, fdc_id):
+        from .usda import fetch_food_details
+        return await self.call(("food", fdc_id), lambda: fetch_food_details([fdc_id]).get(fdc_id))
+
+    async def load_densities(self, meal):
+        fdc_ids = meal.missing_densities()
+        foods = await asyncio.gather(*(self.food_details(fdc_id) for fdc_id in fdc_ids))
+        for fdc_id, USDA_json in zip(fdc_ids, foods):
+            if USDA_json is not None:
+                meal.add_food_details(fdc_id, USDA_json)
+
+    # ----- Foods -----
+
+    async def health(self, request):
+        return {"status": "ok", "sessions": len(self.sessions)}
+
+    async def metrics(self, request):
+        return get_metrics().prometheus_text()
+
+    async def search(self, request):
+        query = request.param("q")
+        USDA_json = await self.search_foods(query)
+        return {"foods": USDA_json.get("foods", [])[:request.int_param("limit", SEARCH_CANDIDATES)]}
+
+    async def suggest(self, request):
+        from .usda import suggest_foods
+        query = request.param("q")
+        return {"foods": await self.call(("suggest", normalize_query(query)), suggest_foods, query)}
+
+    async def food(self, request, fdc_id):
+        USDA_json = await self.food_details(int(fdc_id))
+        if USDA_json is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"No food {fdc_id}")
+
+        result = {"fdcId": USDA_json["fdcId"], "description": USDA_json.get("description"), "per100g": None}
+        try:
+            result["per100g"] = summarize(food_vector(USDA_json))
+        except IncompleteNutritionError as e:
+            result["error"] = str(e)
+        return result
+
+    # ----- Recipes -----
+
+    async def recipes(self, request):
+        from .recipes import default_recipe_results
+
+        body = request.json()
+        ingredients = sorted({normalize_query(food) for food in _strings(body.get("ingredients", []), "ingredients") if food.strip()})
+        if not ingredients:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "ingredients must list at least one food")
+        number = _integer(body.get("number", default_recipe_results()), "number")
+        resolve = _boolean(body.get("resolve", False), "resolve")
+
+        records, missed = await self.call(("recipes", tuple(ingredients), number, resolve), _search_recipes, ingredients, number, resolve)
+
+        return {"recipes": [
+            {
+                "name": recipe["name"],
+                "ingredients": recipe["ingredients"],
+                "price": recipe["price"],
+                "servings": recipe.get("servings"),
+                "nutrition": nutrients,
+                "pendingIngredients": recipe.get("pending", []),
+                "missedIngredients": missed.get(recipe["name"], [])
+            }
+            for recipe, nutrients in records
+        ]}
+
+    # ----- Sessions -----
+
+    async def create_session(self, request):
+        if self._resolver is None:
+            self._resolver = await asyncio.get_running_loop().run_in_executor(self._executor, get_food_resolver)
+
+        session = Session(secrets.token_hex(8), self._resolver)
+        self.sessions[session.session_id] = session
+        return HTTPStatus.CREATED, self.session_json(session)
+
+    async def get_session(self, request, session_id):
+        return self.session_json(self.session(session_id))
+
+    async def delete_session(self, request, session_id):
+        self.sessions.pop(self.session(session_id).session_id)
+        return HTTPStatus.NO_CONTENT, None
+
+    # Adds an ingredient. It is resolved from an explicit fdcId, the
+    # learned resolver or an earlier item; otherwise the response carries
+    # search candidates and the client picks one with PATCH.
+    async def add_item(self, request, session_id):
+        session = self.session(session_id)
+        body = request.json()
+        name = _string(body.get("name", ""), "name").strip()
+        grams = _grams(body.get("grams"))
+        if not name:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "name is required")
+        choice = _food_choice(body)
+
+        item = session.meal.add(name, grams)
+        if choice is not None:
+            session.meal.resolve(item.item_id, *choice, learn=bool(choice[1]))
+
+        candidates = None
+        if not item.resolved:
+            candidates = (await self.search_foods(name)).get("foods", [])[:SEARCH_CANDIDATES]
+        await self.load_densities(session.meal)
+
+        result = self.session_json(session)
+        if candidates is not None:
+            result["candidates"] = {"item": item.item_id, "foods": candidates}
+        return HTTPStatus.CREATED, result
+
+    async def update_item(self, request, session_id, item_id):
+        session = self.session(session_id)
+        item_id = self.item_id(session, item_id)
+        body = request.json()
+        choice = _food_choice(body)
+        grams = _grams(body["grams"]) if body.get("grams") is not None else None
+
+        if choice is not None:
+            session.meal.resolve(item_id, *choice, learn=bool(choice[1]))
+        if grams is not None:
+            session.meal.reweight(item_id, grams)
+
+        await self.load_densities(session.meal)
+        return self.session_json(session)
+
+    async def remove_item(self, request, session_id, item_id):
+        session = self.session(session_id)
+        session.meal.remove(self.item_id(session, item_id))
+        return self.session_json(session)
+
+    def session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"No session {session_id}")
+        session.touch()
+        return session
+
+    def item_id(self, session, item_id):
+        item_id = int(item_id)
+        if item_id not in session.meal.items:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"No item {item_id}")
+        return item_id
+
+    def session_json(self, session):
+        items = []
+        for item in session.meal.items.values():
+            if item.ready:
+                status = "ready"
+            elif item.unavailable:
+                status = "unavailable"
+            elif item.resolved:
+                status = "pending"
+            else:
+                status = "unresolved"
+            items.append({"id": item.item_id, "name": item.name, "grams": item.grams, "fdcId": item.fdc_id, "description": item.description, "status": status})
+        return {"session": session.session_id, "items": items, "totals": session.meal.summary()}
+
+    async def sweep_sessions(self):
+        while True:
+            await asyncio.sleep(SESSION_SWEEP_SECONDS)
+            cutoff = time.monotonic() - self.session_ttl
+            for session_id in [sid for sid, session in self.sessions.items() if session.touched < cutoff]:
+                del self.sessions[session_id]
+
+    # ----- HTTP -----
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(Request.read(reader), KEEP_ALIVE_SECONDS)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                if request is None:
+                    break
+
+                status, payload = await self.dispatch(request)
+                writer.write(_response_bytes(status, payload, request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except ServiceError as e:
+            writer.write(_response_bytes(e.status, {"error": str(e)}, False))
+        finally:
+            writer.close()
+
+    async def dispatch(self, request):
+        started = time.perf_counter()
+        route = "unmatched"
+        try:
+            for method, pattern, handler in self._routes:
+                match = re.fullmatch(pattern, request.path)
+                if match is None:
+                    continue
+                if method != request.method:
+                    continue
+                route = handler.__name__
+                result = await handler(request, *match.groups())
+                return result if isinstance(result, tuple) else (HTTPStatus.OK, result)
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"No route for {request.method} {request.path}")
+        except ServiceError as e:
+            return e.status, {"error": str(e)}
+        except (KeyError, ValueError, TypeError) as e:
+            return HTTPStatus.BAD_REQUEST, {"error": f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            # A bug in one handler must not drop the connection unanswered.
+            incr("service_errors_total", route=route)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            get_metrics().observe("service_request_seconds", time.perf_counter() - started, route=route, method=request.method)
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_BODY_BYTES)
+        sweeper = asyncio.create_task(self.sweep_sessions())
+        if ready is not None:
+            ready(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            sweeper.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+# ===== HTTP Plumbing =====
+
+class Request:
+    def __init__(self, method, target, headers, body):
+        url = urlsplit(target)
+        self.method = method
+        self.path = url.path.rstrip("/") or "/"
+        self.query = parse_qs(url.query)
+        self.headers = headers
+        self.body = body
+        self.keep_alive = headers.get("connection", "").lower() != "close"
+
+    @classmethod
+    async def read(cls, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise ServiceError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return cls(method.upper(), target, headers, body)
+
+    def param(self, name):
+        values = self.query.get(name)
+        if not values or not values[0].strip():
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Query parameter '{name}' is required")
+        return values[0]
+
+    def int_param(self, name, default):
+        values = self.query.get(name)
+        return int(values[0]) if values else default
+
+    def json(self):
+        if not self.body:
+            return {}
+        try:
+            body = json.loads(self.body)
+        except ValueError:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Body is not valid JSON")
+        if not isinstance(body, dict):
+            raise ServiceError(HTTPStatus.BAD_REQUEST, "Body must be a JSON object")
+        return body
+
+# ----- Body Validation -----
+
+def _string(value, name):
+    if not isinstance(value, str):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"{name} must be a string")
+    return value
+
+def _strings(value, name):
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"{name} must be a list of strings")
+    return value
+
+def _integer(value, name):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    return value
+
+def _boolean(value, name):
+    if not isinstance(value, bool):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, f"{name} must be true or false")
+    return value
+
+# (fdcId, description) when the body picks a food, else None.
+def _food_choice(body):
+    if body.get("fdcId") is None:
+        return None
+    description = body.get("description")
+    if description is not None:
+        _string(description, "description")
+    return _integer(body["fdcId"], "fdcId"), description
+
+def _grams(value):
+    try:
+        grams = float(value)
+    except (TypeError, ValueError):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, "grams must be a number")
+    if not math.isfinite(grams):
+        raise ServiceError(HTTPStatus.BAD_REQUEST, "grams must be a finite number")
+    if grams < 0:
+        raise ServiceError(HTTPStatus.BAD_REQUEST, "grams must not be negative")
+    return grams
+
+def _response_bytes(status, payload, keep_alive):
+    status = HTTPStatus(status)
+    if payload is None:
+        body, content_type = b"", "application/json"
+    elif isinstance(payload, str):
+        body, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+# ===== Command Line =====
+#   python -m engine.service --port 8080
+#   curl -X POST localhost:8080/sessions
+#   curl -X POST localhost:8080/sessions/<id>/items -d '{"name": "rice", "grams": 150}'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m engine.service", description="Serve recipe search and meal nutrition over HTTP/JSON.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=env_int('RECIPE_SERVICE_WORKERS', DEFAULT_SERVICE_WORKERS), help="threads for blocking engine calls")
+    parser.add_argument("--session-ttl", type=int, default=env_int('RECIPE_SESSION_TTL', DEFAULT_SESSION_TTL), help="seconds an idle session is kept")
+    args = parser.parse_args(argv)
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    service = RecipeService(workers=args.workers, session_ttl=args.session_ttl)
+    print(f"Serving on http://{args.host}:{args.port} (Ctrl+C to stop)", file=sys.stderr)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# ===== Imports =====
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from .cache import ResponseCache, DEFAULT_CACHE_PATH, DEFAULT_TTL, DEFAULT_MAX_ENTRIES, normalize_query, search_key, food_key
+from .config import usda_api_key, usda_base_url, env_int, env_str
+from .http_client import get_http_client
+from .metrics import bind, incr, span
+
+# ===== Type-Ahead Suggestions =====
+DEFAULT_SUGGESTIONS = 8
+MIN_SUGGESTION_LENGTH = 3
+
+# ===== USDA Batch Fetching =====
+FDC_MAX_IDS_PER_REQUEST = 20
+FDC_FETCH_WORKERS = 4
+
+# ===== USDA Response Cache =====
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                path=env_str('RECIPE_CACHE_PATH', DEFAULT_CACHE_PATH),
+                ttl=env_int('RECIPE_CACHE_TTL', DEFAULT_TTL),
+                max_entries=env_int('RECIPE_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+            )
+    return _response_cache
+
+# ===== Offline SR Legacy Database =====
+_food_database = None
+_food_database_loaded = False
+_food_database_lock = threading.Lock()
+
+def get_food_database():
+    global _food_database, _food_database_loaded
+    with _food_database_lock:
+        if not _food_database_loaded:
+            from .fooddb import FoodDatabase, DEFAULT_FOOD_DB_PATH
+
+            _food_database = FoodDatabase.open_existing(env_str('RECIPE_FOOD_DB_PATH', DEFAULT_FOOD_DB_PATH))
+            _food_database_loaded = True
+    return _food_database
+
+# ===== In-Flight Searches =====
+# Threads searching for the same uncached name wait for the first one's
+# response instead of sending their own request.
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+def _coalesced(key, func):
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        owner = future is None
+        if owner:
+            future = _in_flight[key] = Future()
+
+    if not owner:
+        incr("usda_coalesced_total")
+        return future.result()
+
+    try:
+        result = func()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            _in_flight.pop(key, None)
+
+# ===== USDA Lookups =====
+
+# Searches and detail lookups go to the local SR Legacy database first; the
+# remote API (behind the response cache) is only used for foods it lacks.
+# With `remote=False` nothing is sent and None stands for "not known locally".
+def search_foods(query, remote=True):
+    with span("usda.search") as labels:
+        query = normalize_query(query)
+        food_database = get_food_database()
+        if food_database is not None:
+            USDA_json = food_database.search(query)
+            if USDA_json["foods"]:
+                labels["source"] = "food_db"
+                incr("food_db_hits_total", lookup="search")
+                return USDA_json
+
+        response_cache = get_response_cache()
+        cache_key = search_key(query, "SR Legacy")
+        USDA_json = response_cache.get(cache_key)
+        labels["source"] = "cache"
+
+        if USDA_json is None:
+            if not remote:
+                labels["source"] = "none"
+                return None
+            labels["source"] = "api"
+            USDA_json = _coalesced(cache_key, lambda: fetch_search(query, cache_key))
+
+        return USDA_json
+
+# A search that finished while this one waited for the lock is reused.
+def fetch_search(query, cache_key):
+    USDA_json = get_response_cache().get(cache_key)
+    if USDA_json is not None:
+        return USDA_json
+
+    USDA_response = get_http_client().get(
+        f"{usda_base_url()}/foods/search",
+        params={"api_key": usda_api_key(), "query": query, "dataType": "SR Legacy"},
+        limiter="usda"
+    )
+    USDA_json = USDA_response.json()
+    get_response_cache().set(cache_key, USDA_json)
+    return USDA_json
+
+# Candidate foods for a partially typed name. Goes through search_foods, so
+# every suggestion also warms the search cache the selection step reads.
+def suggest_foods(query, limit=DEFAULT_SUGGESTIONS):
+    if len(normalize_query(query)) < MIN_SUGGESTION_LENGTH:
+        return []
+    return search_foods(query).get("foods", [])[:limit]
+
+# Foods missing from both local sources are fetched only when `remote`.
+def fetch_food_details(f_IDs, remote=True):
+    with span("usda.details"):
+        return _fetch_food_details(f_IDs, remote)
+
+def _fetch_food_details(f_IDs, remote):
+    response_cache = get_response_cache()
+    food_database = get_food_database()
+    foods_by_id = {}
+    missing = []
+
+    for f_ID in dict.fromkeys(f_IDs):
+        USDA_json = food_database.food(f_ID) if food_database is not None else None
+        if USDA_json is not None:
+            incr("food_db_hits_total", lookup="food")
+        else:
+            USDA_json = response_cache.get(food_key(f_ID))
+        if USDA_json is None:
+            missing.append(f_ID)
+        else:
+            foods_by_id[f_ID] = USDA_json
+
+    chunks = [missing[i:i + FDC_MAX_IDS_PER_REQUEST] for i in range(0, len(missing), FDC_MAX_IDS_PER_REQUEST)]
+    if not chunks or not remote:
+        return foods_by_id
+
+    with ThreadPoolExecutor(max_workers=min(FDC_FETCH_WORKERS, len(chunks))) as pool:
+        for foods in pool.map(bind(fetch_food_chunk), chunks):
+            for USDA_json in foods:
+                foods_by_id[USDA_json["fdcId"]] = USDA_json
+                response_cache.set(food_key(USDA_json["fdcId"]), USDA_json)
+
+    return foods_by_id
+
+def fetch_food_chunk(chunk):
+    ids = ",".join(str(f_ID) for f_ID in chunk)
+    USDA_response = get_http_client().get(
+        f"{usda_base_url()}/foods",
+        params={"api_key": usda_api_key(), "fdcIds": ids},
+        limiter="usda"
+    )
+    return USDA_response.json()
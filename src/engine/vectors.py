@@ -0,0 +1,226 @@
+# ===== Nutrient Panel Layout =====
+
+# Fixed layout of a nutrient vector: one slot per USDA nutrient id, in this
+# order, amounts per 100 g of food. It covers every nutrient SR Legacy
+# reports per 100 g: the main panel first, then the minor vitamin forms,
+# amino acids, individual fatty acids and phytosterols. New nutrients are
+# appended so existing slots never move. Non-nutrient fields such as
+# specific gravity have no slot.
+# (nutrient id, USDA name, unit)
+NUTRIENT_PANEL = [
+    (1008, "Energy", "kcal"),
+    (1062, "Energy", "kJ"),
+    (1003, "Protein", "g"),
+    (1004, "Total lipid (fat)", "g"),
+    (1005, "Carbohydrate, by difference", "g"),
+    (1079, "Fiber, total dietary", "g"),
+    (2000, "Sugars, total including NLEA", "g"),
+    (1009, "Starch", "g"),
+    (1010, "Sucrose", "g"),
+    (1011, "Glucose (dextrose)", "g"),
+    (1012, "Fructose", "g"),
+    (1013, "Lactose", "g"),
+    (1014, "Maltose", "g"),
+    (1075, "Galactose", "g"),
+    (1051, "Water", "g"),
+    (1007, "Ash", "g"),
+    (1018, "Alcohol, ethyl", "g"),
+    (1057, "Caffeine", "mg"),
+    (1058, "Theobromine", "mg"),
+    (1087, "Calcium, Ca", "mg"),
+    (1089, "Iron, Fe", "mg"),
+    (1090, "Magnesium, Mg", "mg"),
+    (1091, "Phosphorus, P", "mg"),
+    (1092, "Potassium, K", "mg"),
+    (1093, "Sodium, Na", "mg"),
+    (1095, "Zinc, Zn", "mg"),
+    (1098, "Copper, Cu", "mg"),
+    (1101, "Manganese, Mn", "mg"),
+    (1103, "Selenium, Se", "µg"),
+    (1099, "Fluoride, F", "µg"),
+    (1162, "Vitamin C, total ascorbic acid", "mg"),
+    (1165, "Thiamin", "mg"),
+    (1166, "Riboflavin", "mg"),
+    (1167, "Niacin", "mg"),
+    (1170, "Pantothenic acid", "mg"),
+    (1175, "Vitamin B-6", "mg"),
+    (1177, "Folate, total", "µg"),
+    (1186, "Folic acid", "µg"),
+    (1187, "Folate, food", "µg"),
+    (1190, "Folate, DFE", "µg"),
+    (1180, "Choline, total", "mg"),
+    (1178, "Vitamin B-12", "µg"),
+    (1104, "Vitamin A, IU", "IU"),
+    (1106, "Vitamin A, RAE", "µg"),
+    (1105, "Retinol", "µg"),
+    (1107, "Carotene, beta", "µg"),
+    (1108, "Carotene, alpha", "µg"),
+    (1120, "Cryptoxanthin, beta", "µg"),
+    (1122, "Lycopene", "µg"),
+    (1123, "Lutein + zeaxanthin", "µg"),
+    (1109, "Vitamin E (alpha-tocopherol)", "mg"),
+    (1114, "Vitamin D (D2 + D3)", "µg"),
+    (1110, "Vitamin D (D2 + D3), International Units", "IU"),
+    (1185, "Vitamin K (phylloquinone)", "µg"),
+    (1253, "Cholesterol", "mg"),
+    (1258, "Fatty acids, total saturated", "g"),
+    (1292, "Fatty acids, total monounsaturated", "g"),
+    (1293, "Fatty acids, total polyunsaturated", "g"),
+    (1257, "Fatty acids, total trans", "g"),
+
+    # Minor vitamin forms and other compounds
+    (1002, "Nitrogen", "g"),
+    (1111, "Vitamin D2 (ergocalciferol)", "µg"),
+    (1112, "Vitamin D3 (cholecalciferol)", "µg"),
+    (1125, "Tocopherol, beta", "mg"),
+    (1126, "Tocopherol, gamma", "mg"),
+    (1127, "Tocopherol, delta", "mg"),
+    (1128, "Tocotrienol, alpha", "mg"),
+    (1129, "Tocotrienol, beta", "mg"),
+    (1130, "Tocotrienol, gamma", "mg"),
+    (1131, "Tocotrienol, delta", "mg"),
+    (1242, "Vitamin E, added", "mg"),
+    (1246, "Vitamin B-12, added", "µg"),
+    (1183, "Vitamin K (Menaquinone-4)", "µg"),
+    (1184, "Vitamin K (Dihydrophylloquinone)", "µg"),
+    (1198, "Betaine", "mg"),
+
+    # Amino acids
+    (1210, "Tryptophan", "g"),
+    (1211, "Threonine", "g"),
+    (1212, "Isoleucine", "g"),
+    (1213, "Leucine", "g"),
+    (1214, "Lysine", "g"),
+    (1215, "Methionine", "g"),
+    (1216, "Cystine", "g"),
+    (1217, "Phenylalanine", "g"),
+    (1218, "Tyrosine", "g"),
+    (1219, "Valine", "g"),
+    (1220, "Arginine", "g"),
+    (1221, "Histidine", "g"),
+    (1222, "Alanine", "g"),
+    (1223, "Aspartic acid", "g"),
+    (1224, "Glutamic acid", "g"),
+    (1225, "Glycine", "g"),
+    (1226, "Proline", "g"),
+    (1227, "Serine", "g"),
+    (1228, "Hydroxyproline", "g"),
+
+    # Individual fatty acids
+    (1259, "SFA 4:0", "g"),
+    (1260, "SFA 6:0", "g"),
+    (1261, "SFA 8:0", "g"),
+    (1262, "SFA 10:0", "g"),
+    (1263, "SFA 12:0", "g"),
+    (1332, "SFA 13:0", "g"),
+    (1264, "SFA 14:0", "g"),
+    (1299, "SFA 15:0", "g"),
+    (1265, "SFA 16:0", "g"),
+    (1300, "SFA 17:0", "g"),
+    (1266, "SFA 18:0", "g"),
+    (1267, "SFA 20:0", "g"),
+    (1273, "SFA 22:0", "g"),
+    (1301, "SFA 24:0", "g"),
+    (1274, "MUFA 14:1", "g"),
+    (1333, "MUFA 15:1", "g"),
+    (1275, "MUFA 16:1", "g"),
+    (1314, "MUFA 16:1 c", "g"),
+    (1323, "MUFA 17:1", "g"),
+    (1268, "MUFA 18:1", "g"),
+    (1315, "MUFA 18:1 c", "g"),
+    (1277, "MUFA 20:1", "g"),
+    (1279, "MUFA 22:1", "g"),
+    (1317, "MUFA 22:1 c", "g"),
+    (1312, "MUFA 24:1 c", "g"),
+    (1269, "PUFA 18:2", "g"),
+    (1316, "PUFA 18:2 n-6 c,c", "g"),
+    (1311, "PUFA 18:2 CLAs", "g"),
+    (1270, "PUFA 18:3", "g"),
+    (1404, "PUFA 18:3 n-3 c,c,c (ALA)", "g"),
+    (1321, "PUFA 18:3 n-6 c,c,c", "g"),
+    (1409, "PUFA 18:3i", "g"),
+    (1276, "PUFA 18:4", "g"),
+    (1313, "PUFA 20:2 n-6 c,c", "g"),
+    (1325, "PUFA 20:3", "g"),
+    (1405, "PUFA 20:3 n-3", "g"),
+    (1406, "PUFA 20:3 n-6", "g"),
+    (1271, "PUFA 20:4", "g"),
+    (1408, "PUFA 20:4 n-6", "g"),
+    (1278, "PUFA 20:5 n-3 (EPA)", "g"),
+    (1410, "PUFA 21:5", "g"),
+    (1411, "PUFA 22:4", "g"),
+    (1280, "PUFA 22:5 n-3 (DPA)", "g"),
+    (1272, "PUFA 22:6 n-3 (DHA)", "g"),
+    (1303, "TFA 16:1 t", "g"),
+    (1304, "TFA 18:1 t", "g"),
+    (1414, "TFA 18:1-11 t (18:1t n-7)", "g"),
+    (1305, "TFA 22:1 t", "g"),
+    (1306, "TFA 18:2 t not further defined", "g"),
+    (1310, "TFA 18:2 t,t", "g"),
+    (1329, "Fatty acids, total trans-monoenoic", "g"),
+    (1331, "Fatty acids, total trans-polyenoic", "g"),
+
+    # Phytosterols
+    (1283, "Phytosterols", "mg"),
+    (1284, "Stigmasterol", "mg"),
+    (1285, "Campesterol", "mg"),
+    (1286, "Beta-sitosterol", "mg")
+]
+
+PANEL_SIZE = len(NUTRIENT_PANEL)
+PANEL_INDEX = {nutrient_id: i for i, (nutrient_id, _, _) in enumerate(NUTRIENT_PANEL)}
+
+# Payloads without nutrient ids are matched on (name, unit). Energy is listed
+# twice by USDA, once in kcal and once in kJ, so the name alone is ambiguous.
+_NAME_INDEX = {(name, unit.lower()): i for i, (_, name, unit) in enumerate(NUTRIENT_PANEL)}
+_NAME_ONLY_INDEX = {}
+for _i, (_, _name, _) in enumerate(NUTRIENT_PANEL):
+    _NAME_ONLY_INDEX.setdefault(_name, _i)
+
+# ===== Parsing =====
+
+def panel_slot(food_nutrient):
+    nutrient = food_nutrient.get("nutrient", food_nutrient)
+    nutrient_id = nutrient.get("id", food_nutrient.get("nutrientId"))
+    if nutrient_id in PANEL_INDEX:
+        return PANEL_INDEX[nutrient_id]
+
+    name = nutrient.get("name", food_nutrient.get("nutrientName"))
+    unit = (nutrient.get("unitName") or food_nutrient.get("unitName") or "").lower()
+    if (name, unit) in _NAME_INDEX:
+        return _NAME_INDEX[(name, unit)]
+    return _NAME_ONLY_INDEX.get(name)
+
+# Single pass over foodNutrients. Returns the per-100 g vector and a boolean
+# mask of which slots the food actually reported.
+def nutrient_vector(USDA_json):
+    import numpy as np
+
+    vector = np.zeros(PANEL_SIZE)
+    present = np.zeros(PANEL_SIZE, dtype=bool)
+
+    for food_nutrient in USDA_json.get("foodNutrients", []):
+        amount = food_nutrient.get("amount", food_nutrient.get("value"))
+        if amount is None:
+            continue
+        slot = panel_slot(food_nutrient)
+        if slot is None or present[slot]:
+            continue
+        vector[slot] = amount
+        present[slot] = True
+
+    return vector, present
+
+# ===== Meal Math =====
+
+# `vectors` is a sequence of per-100 g nutrient vectors (or an n x PANEL_SIZE
+# matrix) and `grams` the matching gram weights. The whole meal is a single
+# matrix-vector product.
+def meal_totals(vectors, grams):
+    import numpy as np
+
+    if len(grams) == 0:
+        return np.zeros(PANEL_SIZE)
+
+    matrix = np.asarray(vectors, dtype=float).reshape(-1, PANEL_SIZE)
+    return np.asarray(grams, dtype=float) @ matrix / 100.0
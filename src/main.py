@@ -1,28 +1,16 @@
 # ===== Imports =====
-import os
-import time
-import requests
-import json
+import math
 import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException
-from selenium.webdriver.chrome.options import Options
+from tkinter import ttk, scrolledtext, messagebox, filedialog
 from dotenv import load_dotenv
+from tasks import TaskRunner
+from engine import (
+    NUTRIENT_UNITS, Meal, summarize, search_foods, fetch_food_details, stream_recipes, complete_recipe_records, get_metrics,
+    get_food_resolver, default_recipe_results, MAX_RECIPE_RESULTS, suggest_foods, prefetch_densities
+)
 
 # ===== Load Environment Variables =====
 load_dotenv()
-SPOONACULAR_API_KEY = os.getenv('SPOONACULAR_API_KEY')
-USDA_API_KEY = os.getenv('USDA_API_KEY')
-
-# ===== Selenium Browser Options =====
-browser_options = Options()
-browser_options.add_argument('--headless=new')
 
 # ===== Tkinter App Setup =====
 root = tk.Tk()
@@ -37,7 +25,18 @@ canvas = tk.Canvas(frame, background="#f0f0f0")
 scrollbar = ttk.Scrollbar(frame, orient="vertical", command=canvas.yview)
 content_frame = ttk.Frame(canvas)
 
+# A burst of layout changes recomputes the scroll region once, when idle.
+scrollregion_pending = False
+
 def on_frame_configure(event):
+    global scrollregion_pending
+    if not scrollregion_pending:
+        scrollregion_pending = True
+        root.after_idle(update_scrollregion)
+
+def update_scrollregion():
+    global scrollregion_pending
+    scrollregion_pending = False
     canvas.configure(scrollregion=canvas.bbox("all"))
 
 content_frame.bind("<Configure>", on_frame_configure)
@@ -61,18 +60,9 @@ def _on_mousewheel(event):
 canvas.bind_all("<MouseWheel>", _on_mousewheel)
 
 # ===== Global Variables =====
-recipe_have_foods = []
-conversion_factors = []
-wide_search_input = []
-Single_Nutrition_Input = []
-wide_search_index = 0
-
-calorie_t = []
-protein_t = []
-fat_t = []
-Carbs_t = []
-Fiber_t = []
-Calci_t = []
+meal = Meal(resolver=get_food_resolver())
+resolving = False
+pending_choice = None
 
 clicked = tk.StringVar()
 
@@ -158,6 +148,16 @@ instructions_label.pack(pady=(0, 5))
 entry = tk.Entry(recipe_frame, width=40, font=("Segoe UI", 12))
 entry.pack(pady=(0, 10))
 
+count_frame = tk.Frame(recipe_frame, bg=current_theme["bg"])
+count_frame.pack(pady=(0, 10))
+
+count_label = tk.Label(count_frame, text="Number of recipes:", font=("Segoe UI", 10), bg=current_theme["bg"], fg=current_theme["fg"])
+count_label.pack(side="left")
+
+recipe_count = tk.IntVar(value=default_recipe_results())
+count_spinbox = tk.Spinbox(count_frame, from_=1, to=MAX_RECIPE_RESULTS, textvariable=recipe_count, width=5, font=("Segoe UI", 10))
+count_spinbox.pack(side="left", padx=5)
+
 fetch_button = tk.Button(
     recipe_frame,
     text="Fetch Recipes",
@@ -169,7 +169,19 @@ fetch_button = tk.Button(
 fetch_button.pack(pady=(0, 10))
 
 output_text = scrolledtext.ScrolledText(recipe_frame, width=50, height=20, wrap=tk.WORD, font=("Segoe UI", 11))
-output_text.pack(padx=10, pady=10)
+output_text.pack(padx=10, pady=(10, 0))
+
+page_frame = tk.Frame(recipe_frame, bg=current_theme["bg"])
+page_frame.pack(pady=(5, 10))
+
+prev_page_button = tk.Button(page_frame, text="< Prev", command=lambda: show_recipe_page(recipe_page - 1), state="disabled", font=("Segoe UI", 10))
+prev_page_button.pack(side="left", padx=5)
+
+page_label = tk.Label(page_frame, text="", font=("Segoe UI", 10), bg=current_theme["bg"], fg=current_theme["fg"])
+page_label.pack(side="left", padx=5)
+
+next_page_button = tk.Button(page_frame, text="Next >", command=lambda: show_recipe_page(recipe_page + 1), state="disabled", font=("Segoe UI", 10))
+next_page_button.pack(side="left", padx=5)
 
 # ===== Middle: Build Your Own Meal Section =====
 custom_frame = tk.Frame(center_frame, bg=current_theme["bg"], bd=2, relief="groove")
@@ -188,6 +200,9 @@ f_label = tk.Label(custom_frame, text="Enter Food Name:", font=("Segoe UI", 12),
 f_label.pack()
 F_Entry = tk.Entry(custom_frame, font=("Segoe UI", 12))
 F_Entry.pack(pady=(0, 10))
+F_Entry.bind("<KeyRelease>", lambda event: schedule_suggestions(event))
+
+suggestion_listbox = tk.Listbox(custom_frame, width=40, height=5, font=("Segoe UI", 10), exportselection=False)
 
 g_label = tk.Label(custom_frame, text="Enter Weight in Grams:", font=("Segoe UI", 12), bg=current_theme["bg"], fg=current_theme["fg"])
 g_label.pack()
@@ -197,7 +212,7 @@ G_Entry.pack(pady=(0, 10))
 select_button = tk.Button(
     custom_frame,
     text="Add Ingredient",
-    command=lambda: Recipe_Maker(recipe_have_foods),
+    command=lambda: Recipe_Maker(),
     font=("Segoe UI", 12, "bold"),
     bg=current_theme["button_bg"],
     fg="white"
@@ -207,15 +222,41 @@ select_button.pack(pady=(0, 10))
 get_nutrition_button = tk.Button(
     custom_frame,
     text="Get Nutrition Info",
-    command=lambda: run_conversion_and_wide(recipe_have_foods, wide_search_input, wide_search_index),
+    command=lambda: resolve_meal(),
     font=("Segoe UI", 12, "bold"),
     bg=current_theme["button_bg"],
     fg="white"
 )
 get_nutrition_button.pack(pady=(0, 10))
 
-Get_Nutrients_Text = tk.Text(custom_frame, width=40, height=3, wrap=tk.WORD, font=("Segoe UI", 11))
-Get_Nutrients_Text.pack(pady=5)
+meal_listbox = tk.Listbox(custom_frame, width=40, height=6, font=("Segoe UI", 11))
+meal_listbox.pack(pady=5)
+
+meal_edit_frame = tk.Frame(custom_frame, bg=current_theme["bg"])
+meal_edit_frame.pack(pady=(0, 10))
+
+remove_button = tk.Button(meal_edit_frame, text="Remove Selected", command=lambda: remove_ingredient(), font=("Segoe UI", 10))
+remove_button.pack(side="left", padx=5)
+
+reweight_button = tk.Button(meal_edit_frame, text="Set Weight", command=lambda: reweight_ingredient(), font=("Segoe UI", 10))
+reweight_button.pack(side="left", padx=5)
+
+change_food_button = tk.Button(meal_edit_frame, text="Change Food", command=lambda: change_food(), font=("Segoe UI", 10))
+change_food_button.pack(side="left", padx=5)
+
+# Food choice for the ingredient being resolved. Built once and filled in
+# place; it is only packed while a choice is waiting.
+choice_frame = tk.Frame(custom_frame, bg=current_theme["bg"])
+
+choice_label = tk.Label(choice_frame, text="", font=("Segoe UI", 11), bg=current_theme["bg"], fg=current_theme["fg"])
+choice_label.pack()
+
+selected_food = tk.StringVar()
+choice_box = ttk.Combobox(choice_frame, textvariable=selected_food, width=45, state="readonly")
+choice_box.pack(pady=5)
+
+choose_button = tk.Button(choice_frame, text="Select", command=lambda: choose_food(), font=("Segoe UI", 10))
+choose_button.pack(pady=(0, 5))
 
 # ===== Right: Nutrition Summary Section =====
 summary_frame = tk.Frame(center_frame, bg=current_theme["bg"], bd=2, relief="groove")
@@ -239,316 +280,494 @@ recipeT.pack(pady=10)
 reset_button = tk.Button(
     summary_frame,
     text="Reset",
-    command=lambda: Recipe_Maker_Reset(recipe_have_foods, conversion_factors, wide_search_input, Single_Nutrition_Input, wide_search_index),
+    command=lambda: Recipe_Maker_Reset(),
     font=("Segoe UI", 12, "bold"),
     bg=current_theme["button_bg"],
     fg="white"
 )
 reset_button.pack(pady=10)
 
-# ===== Core Functions =====
+# ===== Bottom: Status Bar =====
+status_frame = tk.Frame(root, bg=current_theme["bg"])
+status_frame.grid(row=4, column=0, sticky="ew")
 
-def Recipe_Maker(recipe_have_foods):
-    fname = F_Entry.get()
-    gnum = G_Entry.get()
+status_label = tk.Label(status_frame, text="Ready", font=("Segoe UI", 10), bg=current_theme["bg"], fg=current_theme["fg"])
+status_label.pack(side="left", padx=10, pady=5)
 
-    if not fname or not gnum:
-        messagebox.showwarning("Missing Input", "Please enter both a food name and a weight!")
+progress_bar = ttk.Progressbar(status_frame, length=250, mode="indeterminate")
+progress_bar.pack(side="left", padx=10, pady=5)
+
+cancel_button = tk.Button(status_frame, text="Cancel", command=lambda: cancel_work(), state="disabled", font=("Segoe UI", 10))
+cancel_button.pack(side="left", padx=10, pady=5)
+
+latency_button = tk.Button(status_frame, text="Latency", command=lambda: open_latency_panel(), font=("Segoe UI", 10))
+latency_button.pack(side="right", padx=10, pady=5)
+
+# ===== Background Work =====
+task_runner = TaskRunner(root)
+
+def start_busy(message, maximum=None):
+    status_label.configure(text=message)
+    progress_bar.stop()
+    if maximum:
+        progress_bar.configure(mode="determinate", maximum=maximum, value=0)
+    else:
+        progress_bar.configure(mode="indeterminate")
+        progress_bar.start(15)
+    cancel_button.configure(state="normal")
+
+def stop_busy():
+    if task_runner.busy:
         return
+    progress_bar.stop()
+    progress_bar.configure(mode="determinate", value=0)
+    status_label.configure(text="Ready")
+    cancel_button.configure(state="disabled")
 
+def cancel_work():
+    task_runner.cancel_all()
+    status_label.configure(text="Cancelling...")
+
+def close_app():
+    task_runner.shutdown()
+    root.destroy()
+
+# ===== Core Functions =====
+
+def read_grams():
     try:
-        gnum = int(gnum)
-        recipe_have_foods.append({fname: gnum})
-        Get_Nutrients_Text.insert(tk.END, fname + ", ")
+        grams = float(G_Entry.get())
     except ValueError:
-        messagebox.showerror("Value Error", "Weight must be an integer.")
+        grams = None
+    if grams is None or not math.isfinite(grams) or grams < 0:
+        messagebox.showerror("Value Error", "Weight must be a non-negative number.")
+        return None
+    return grams
+
+def Recipe_Maker():
+    fname = F_Entry.get().strip()
+
+    if not fname or not G_Entry.get():
+        messagebox.showwarning("Missing Input", "Please enter both a food name and a weight!")
+        return
+
+    gnum = read_grams()
+    if gnum is None:
+        return
+
+    picked = picked_suggestion()
+    item = meal.add(fname, gnum)
+    if picked is not None:
+        meal.resolve(item.item_id, picked["fdcId"], picked["description"], learn=True)
 
     F_Entry.delete(0, tk.END)
     G_Entry.delete(0, tk.END)
+    clear_suggestions()
+    refresh_meal()
 
-def run_conversion_and_wide(recipe_have_foods, wide_search_input, wide_search_index):
-    conversion(recipe_have_foods)
-    wide_search(wide_search_input, wide_search_index)
-
-def conversion(recipe_have_foods):
-    for pair in recipe_have_foods:
-        for key, value in pair.items():
-            if isinstance(value, int):
-                wide_search_input.append(key)
-                conversion_factors.append(value / 100)
-            else:
-                wide_search_input.append(key)
-                conversion_factors.append(0.1)
-
-def wide_search(wide_search_input, wide_search_index):
-    if wide_search_index >= len(wide_search_input):
-        recipe_total()
+# ===== Type-Ahead Suggestions =====
+# Typing in F_Entry searches once the user pauses, lists the candidates under
+# the entry and prefetches the top candidates' nutrients. Clicking one pins
+# that food for the ingredient; either way the later search and density
+# lookups are served from cache.
+
+SUGGEST_DELAY_MS = 300
+PREFETCH_CANDIDATES = 3
+
+suggest_after_id = None
+suggest_generation = 0
+suggestions = []
+
+def schedule_suggestions(event):
+    global suggest_after_id
+    if event.keysym in ("Return", "Tab", "Up", "Down", "Left", "Right"):
         return
 
-    try:
-        USDA_response = requests.get(f"https://api.nal.usda.gov/fdc/v1/foods/search?api_key={USDA_API_KEY}&query={wide_search_input[wide_search_index]}&dataType=SR Legacy")
-        USDA_response.raise_for_status()
-        USDA_json = USDA_response.json()
-    except requests.exceptions.RequestException as e:
-        messagebox.showerror("Error", f"Failed to search USDA database: {e}")
+    # The pinned suggestion belonged to the old text.
+    suggestion_listbox.selection_clear(0, tk.END)
+
+    if suggest_after_id is not None:
+        root.after_cancel(suggest_after_id)
+    suggest_after_id = root.after(SUGGEST_DELAY_MS, request_suggestions)
+
+def request_suggestions():
+    global suggest_after_id, suggest_generation
+    suggest_after_id = None
+    suggest_generation += 1
+    generation = suggest_generation
+
+    query = F_Entry.get().strip()
+    if not query:
+        clear_suggestions()
         return
 
-    selection(USDA_json, wide_search_input, wide_search_index)
+    task_runner.submit(
+        lambda task: suggest_foods(query),
+        on_done=lambda foods: show_suggestions(foods, generation),
+        on_finally=stop_busy,
+        name="suggest"
+    )
+
+def show_suggestions(foods, generation):
+    global suggestions
+    # A newer keystroke has already superseded this search.
+    if generation != suggest_generation:
+        return
+
+    suggestions = foods
+    suggestion_listbox.delete(0, tk.END)
+    for food in foods:
+        suggestion_listbox.insert(tk.END, food["description"])
+
+    if not foods:
+        suggestion_listbox.pack_forget()
+        return
+
+    suggestion_listbox.pack(after=F_Entry, pady=(0, 10))
+    task_runner.submit(
+        lambda task: prefetch_densities([food["fdcId"] for food in foods[:PREFETCH_CANDIDATES]]),
+        on_finally=stop_busy,
+        name="prefetch"
+    )
+
+def picked_suggestion():
+    selected = suggestion_listbox.curselection()
+    if not selected or selected[0] >= len(suggestions):
+        return None
+    return suggestions[selected[0]]
+
+def clear_suggestions():
+    global suggestions, suggest_generation
+    suggest_generation += 1
+    suggestions = []
+    suggestion_listbox.delete(0, tk.END)
+    suggestion_listbox.pack_forget()
+
+def selected_item_id():
+    selected = meal_listbox.curselection()
+    if not selected:
+        messagebox.showwarning("Warning", "Select an ingredient first.")
+        return None
+    return list(meal.items)[selected[0]]
+
+def remove_ingredient():
+    item_id = selected_item_id()
+    if item_id is None:
+        return
+    meal.remove(item_id)
+    refresh_meal()
+
+def reweight_ingredient():
+    item_id = selected_item_id()
+    if item_id is None:
+        return
+    gnum = read_grams()
+    if gnum is None:
+        return
+    meal.reweight(item_id, gnum)
+    G_Entry.delete(0, tk.END)
+    refresh_meal()
 
-def selection(USDA_json, wide_search_input, wide_search_index):
+def change_food():
+    item_id = selected_item_id()
+    if item_id is None:
+        return
+    meal.unresolve(item_id)
+    refresh_meal()
+    resolve_meal()
+
+def refresh_meal():
+    meal_listbox.delete(0, tk.END)
+    for item in meal.items.values():
+        if item.ready:
+            status = f" = {item.description}" if item.description else ""
+        elif item.unavailable:
+            status = " (no nutrition data)"
+        else:
+            status = " (pending)"
+        meal_listbox.insert(tk.END, f"{item.name}: {item.grams:g} g{status}")
+    show_recipe_total()
+
+# Resolves only ingredients that have no food yet, asking only for those
+# the learned resolver cannot place, then fetches the densities that are
+# not cached.
+def resolve_meal():
+    global resolving
+    if resolving:
+        return
+
+    pending = [item for item in meal.unresolved() if not meal.auto_resolve(item.item_id)]
+    if not pending:
+        food_search_narrow()
+        return
+
+    resolving = True
+    wide_search(pending[0])
+
+def wide_search(item):
+    query = item.name
+    start_busy(f"Searching USDA for '{query}'...")
+    task_runner.submit(
+        lambda task: search_foods(query),
+        on_done=lambda USDA_json: selection(USDA_json, item),
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to search USDA database: {e}"),
+        on_finally=search_finished,
+        name="food_search"
+    )
+
+# Resolution stays in progress only while a choice is waiting on screen;
+# a failed, empty or cancelled search ends it.
+def search_finished():
+    global resolving
+    stop_busy()
+    if pending_choice is None:
+        resolving = False
+
+def selection(USDA_json, item):
+    global pending_choice
     food_choices = USDA_json.get("foods", [])[:10]
     choice_list = [i["description"] for i in food_choices]
     ID_list = [i["fdcId"] for i in food_choices]
     food_and_id = dict(zip(choice_list, ID_list))
 
     if not choice_list:
-        messagebox.showwarning("Warning", "No foods found for your input.")
+        messagebox.showwarning("Warning", f"No foods found for '{item.name}'.")
+        meal.remove(item.item_id)
+        refresh_meal()
         return
 
-    selected_food = tk.StringVar()
+    pending_choice = (item, food_and_id)
+    choice_label.configure(text=f"Choose a food for '{item.name}':")
+    choice_box.configure(values=choice_list)
     selected_food.set(choice_list[0])
+    choice_frame.pack(after=meal_edit_frame, pady=(0, 10))
 
-    dropdown = tk.OptionMenu(content_frame, selected_food, *choice_list)
-    dropdown.pack(pady=10)
-
-
-    def Choice_Swapper():
-        choice = selected_food.get()
-        Single_Nutrition_Input.append(food_and_id[choice])
-        dropdown.destroy()
-        choose_button.destroy()
-        food_search_narrow(Single_Nutrition_Input)
-        wide_search(wide_search_input, wide_search_index + 1)
-
-    choose_button = tk.Button(content_frame, text="Select", command=Choice_Swapper)
-    choose_button.pack(pady=10)
-
-def food_search_narrow(Single_Nutrition_Input):
-    if not Single_Nutrition_Input:
+def choose_food():
+    global resolving
+    if pending_choice is None:
         return
 
-    f_ID = Single_Nutrition_Input.pop(0)
-
-    try:
-        USDA_response = requests.get(f"https://api.nal.usda.gov/fdc/v1/food/{f_ID}?api_key={USDA_API_KEY}")
-        USDA_response.raise_for_status()
-        USDA_json = USDA_response.json()
-    except requests.exceptions.RequestException as e:
-        messagebox.showerror("Error", f"Failed to fetch nutrition data: {e}")
+    item, food_and_id = pending_choice
+    choice = selected_food.get()
+    clear_selection()
+
+    resolving = False
+    if item.item_id in meal.items:
+        meal.resolve(item.item_id, food_and_id[choice], choice, learn=True)
+        refresh_meal()
+    resolve_meal()
+
+def clear_selection():
+    global pending_choice
+    pending_choice = None
+    choice_box.configure(values=())
+    selected_food.set("")
+    choice_frame.pack_forget()
+
+def food_search_narrow():
+    f_IDs = meal.missing_densities()
+    if not f_IDs:
+        refresh_meal()
         return
 
-    nutrition(USDA_json)
+    start_busy("Fetching nutrition data...")
+    task_runner.submit(
+        lambda task: fetch_food_details(f_IDs),
+        on_done=lambda foods_by_id: apply_food_details(f_IDs, foods_by_id),
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch nutrition data: {e}"),
+        on_finally=stop_busy,
+        name="food_details"
+    )
+
+def apply_food_details(f_IDs, foods_by_id):
+    for f_ID in f_IDs:
+        USDA_json = foods_by_id.get(f_ID)
+        if USDA_json is None:
+            messagebox.showwarning("Warning", f"No nutrition data returned for food {f_ID}.")
+            continue
 
-def nutrition(USDA_json):
-    if nut_text is None:
-        return
+        items = meal.add_food_details(f_ID, USDA_json)
+        if items and not items[0].ready:
+            messagebox.showwarning("Warning", "Incomplete nutrition info.")
+        elif items:
+            show_food_nutrition(items[-1])
 
-    nut_text.delete("1.0", "end")
-    nutrients = USDA_json.get("foodNutrients", [])
+    refresh_meal()
 
-    # Extract and calculate values
-    try:
-        calories = next(n for n in nutrients if n["nutrient"]["name"] == "Energy")["amount"]
-        protein = next(n for n in nutrients if n["nutrient"]["name"] == "Protein")["amount"]
-        fat = next(n for n in nutrients if n["nutrient"]["name"] == "Total lipid (fat)")["amount"]
-        carbs = next(n for n in nutrients if n["nutrient"]["name"] == "Carbohydrate, by difference")["amount"]
-        fiber = next((n["amount"] for n in nutrients if n["nutrient"]["name"] == "Fiber, total dietary"), 0)
-        calcium = next((n["amount"] for n in nutrients if n["nutrient"]["name"] == "Calcium, Ca"), 0)
-    except StopIteration:
-        messagebox.showwarning("Warning", "Incomplete nutrition info.")
-        return
+def show_food_nutrition(item):
+    nut_text.delete("1.0", "end")
+    show_nutrients(nut_text, summarize(item.contribution()))
 
-    # Insert into Text widget
-    nut_text.insert(tk.END, f"Calories: {round(calories * conversion_factors[0], 2)} kcal\n")
-    nut_text.insert(tk.END, f"Protein: {round(protein * conversion_factors[0], 2)} g\n")
-    nut_text.insert(tk.END, f"Fat: {round(fat * conversion_factors[0], 2)} g\n")
-    nut_text.insert(tk.END, f"Carbs: {round(carbs * conversion_factors[0], 2)} g\n")
-    nut_text.insert(tk.END, f"Fiber: {round(fiber * conversion_factors[0], 2)} g\n")
-    nut_text.insert(tk.END, f"Calcium: {round(calcium * conversion_factors[0], 2)} mg\n")
-
-    # Store totals
-    calorie_t.append(calories * conversion_factors[0])
-    protein_t.append(protein * conversion_factors[0])
-    fat_t.append(fat * conversion_factors[0])
-    Carbs_t.append(carbs * conversion_factors[0])
-    Fiber_t.append(fiber * conversion_factors[0])
-    Calci_t.append(calcium * conversion_factors[0])
-
-    conversion_factors.pop(0)
-
-def recipe_total():
+def show_recipe_total():
     recipeT.delete("1.0", "end")
-    recipeT.insert(tk.END, f"Calories: {round(sum(calorie_t), 2)} kcal\n")
-    recipeT.insert(tk.END, f"Protein: {round(sum(protein_t), 2)} g\n")
-    recipeT.insert(tk.END, f"Fat: {round(sum(fat_t), 2)} g\n")
-    recipeT.insert(tk.END, f"Carbs: {round(sum(Carbs_t), 2)} g\n")
-    recipeT.insert(tk.END, f"Fiber: {round(sum(Fiber_t), 2)} g\n")
-    recipeT.insert(tk.END, f"Calcium: {round(sum(Calci_t), 2)} mg\n")
-    
-def Recipe_Maker_Reset(recipe_have_foods, conversion_factors, wide_search_input, Single_Nutrition_Input, wide_search_index):
-    recipe_have_foods.clear()
-    conversion_factors.clear()
-    wide_search_input.clear()
-    Single_Nutrition_Input.clear()
-    wide_search_index = 0
-
-    Get_Nutrients_Text.delete("1.0", tk.END)
+    show_nutrients(recipeT, meal.summary())
+
+def show_nutrients(widget, values):
+    for label, value in values.items():
+        widget.insert(tk.END, f"{label}: {round(value, 2)} {NUTRIENT_UNITS[label]}\n")
+
+def Recipe_Maker_Reset():
+    global resolving
+    task_runner.cancel_all()
+    clear_selection()
+    meal.clear()
+    resolving = False
+
+    meal_listbox.delete(0, tk.END)
     nut_text.delete("1.0", tk.END)
     recipeT.delete("1.0", tk.END)
-    output_text.delete("1.0", tk.END)
-
-    return recipe_have_foods, conversion_factors, wide_search_input, Single_Nutrition_Input, wide_search_index
+    clear_suggestions()
+    clear_recipe_results()
     
 # ===== Recipe Finding and Scraping =====
 
+# Results are kept in `recipe_results` and shown a page at a time, so the
+# text widget never holds more than RECIPES_PER_PAGE entries however many
+# recipes were requested.
+RECIPES_PER_PAGE = 20
+
 missed_dict = {}
 nutrientDict = {}
+recipe_records = {}
 choices = []
+recipe_results = []
+recipe_page = 0
+recipe_total_expected = 0
+
+recipe_task = None
 
 def display_recipes():
-    food_list = entry.get().split(",")
+    food_list = [food for food in entry.get().split(",") if food.strip()]
 
     if not food_list:
         messagebox.showwarning("Warning", "Please enter at least one ingredient!")
         return
 
-    recipe_urls = fetch_recipe_data(food_list)
-    recipe_list = scrape_recipe_details(recipe_urls)
-
-    output_text.delete(1.0, tk.END)
-
-    for recipe in recipe_list:
-        output_text.insert(tk.END, f"{recipe['name']}:\n")
-        for ingredient, measure in recipe['ingredients'].items():
-            output_text.insert(tk.END, f"- {ingredient}: {measure}\n")
-        output_text.insert(tk.END, f"Ingredients Missing: {missed_dict.get(recipe['name'], [])}\n")
-        output_text.insert(tk.END, f"Price: {recipe['price']}\n")
-        output_text.insert(tk.END, "\n--------------------------\n")
-
-    more_recipe()
-
-def fetch_recipe_data(food_list):
-    sep = ',+'
-    food = sep.join(food_list)
-    url = f"https://api.spoonacular.com/recipes/findByIngredients?ingredients={food}&number=2&apiKey={SPOONACULAR_API_KEY}"
-
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        json_file = response.json()
-    except requests.exceptions.RequestException as e:
-        messagebox.showerror("Error", f"Failed to fetch recipes: {e}")
-        return []
-
-    url_list = []
-    global missed_dict
-    missed_dict = {}
-
-    for item in json_file:
-        id = item["id"]
-        price_url = f"https://api.spoonacular.com/recipes/{id}/information?apiKey={SPOONACULAR_API_KEY}"
-
-        try:
-            price_response = requests.get(price_url)
-            price_response.raise_for_status()
-            price_data = price_response.json()
-            url_list.append(price_data["spoonacularSourceUrl"])
-        except requests.exceptions.RequestException:
-            continue
-
-        missed_ingredients = [i["name"] for i in item.get("missedIngredients", [])]
-        missed_dict[item["title"]] = missed_ingredients
-
-    return url_list
+        number = max(1, min(int(recipe_count.get()), MAX_RECIPE_RESULTS))
+    except (tk.TclError, ValueError):
+        messagebox.showerror("Value Error", f"Number of recipes must be between 1 and {MAX_RECIPE_RESULTS}.")
+        return
 
-def scrape_recipe_details(recipe_urls):
-    recipe_list = []
-    global nutrientDict
+    global recipe_task
+    if recipe_task is not None:
+        recipe_task.cancel()
+    clear_recipe_results()
+
+    start_busy("Finding recipes...")
+    recipe_task = task_runner.submit(
+        find_recipes, food_list, number,
+        on_progress=show_recipe_progress,
+        on_done=lambda _: finish_recipe_results(),
+        on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch recipes: {e}"),
+        on_finally=stop_busy,
+        name="fetch_recipes"
+    )
+
+def clear_recipe_results():
+    global missed_dict, nutrientDict, recipe_records, choices, recipe_results, recipe_total_expected
+    missed_dict = {}
     nutrientDict = {}
-    global choices
+    recipe_records = {}
     choices = []
+    recipe_results = []
+    recipe_total_expected = 0
+    show_recipe_page(0)
+    reset_recipe_picker()
+
+# Each recipe is reported as soon as the pipeline finishes it, while later
+# ones are still being looked up or loaded.
+def find_recipes(task, food_list, number):
+    records = stream_recipes(
+        food_list, number,
+        on_found=lambda missed, total: task.report(("found", missed, total)),
+        cancelled=lambda: task.cancelled
+    )
+    for record in records:
+        task.report(("recipe", record))
+
+def show_recipe_progress(update):
+    global recipe_total_expected
+    if update[0] == "found":
+        _, missed, total = update
+        missed_dict.update(missed)
+        recipe_total_expected = total
+        start_busy(f"Scraping {total} recipes...", maximum=total)
+        update_page_controls()
+        return
 
-    driver = webdriver.Chrome(options=browser_options)
+    recipe, nutrientDictItems = update[1]
+    nutrientDict[recipe["name"]] = nutrientDictItems
+    recipe_records[recipe["name"]] = update[1]
+    choices.append(recipe["name"])
+    recipe_results.append(recipe)
+    progress_bar.step(1)
+    ensure_recipe_picker()
+
+    # Only recipes landing on the visible page touch the text widget.
+    if (len(recipe_results) - 1) // RECIPES_PER_PAGE == recipe_page:
+        output_text.insert(tk.END, format_recipe(recipe))
+    update_page_controls()
+
+# Recipes without a page to scrape drop out after the search has announced
+# them; the pager settles on what actually arrived.
+def finish_recipe_results():
+    global recipe_total_expected
+    recipe_total_expected = len(recipe_results)
+    update_page_controls()
+
+def format_recipe(recipe):
+    lines = [f"{recipe['name']}:"]
+    lines.extend(f"- {ingredient}: {measure}" for ingredient, measure in recipe['ingredients'].items())
+    lines.append(f"Ingredients Missing: {missed_dict.get(recipe['name'], [])}")
+    lines.append(f"Price: {recipe['price']}")
+    return "\n".join(lines) + "\n\n--------------------------\n"
+
+def page_count():
+    return max(1, -(-max(len(recipe_results), recipe_total_expected) // RECIPES_PER_PAGE))
+
+def show_recipe_page(page):
+    global recipe_page
+    recipe_page = max(0, min(page, page_count() - 1))
+
+    start = recipe_page * RECIPES_PER_PAGE
+    output_text.delete("1.0", tk.END)
+    output_text.insert(tk.END, "".join(format_recipe(recipe) for recipe in recipe_results[start:start + RECIPES_PER_PAGE]))
+    output_text.yview_moveto(0)
+    update_page_controls()
+
+def update_page_controls():
+    pages = page_count()
+    page_label.configure(text=f"Page {recipe_page + 1} of {pages} ({len(recipe_results)} recipes)" if recipe_results else "")
+    prev_page_button.configure(state="normal" if recipe_page > 0 else "disabled")
+    next_page_button.configure(state="normal" if recipe_page < pages - 1 else "disabled")
+
+# Ingredients the scrape could not match locally are searched on USDA only
+# now, for the one recipe the user picked.
+def insert_nutrition():
+    name = clicked.get()
+    record = recipe_records.get(name)
+    if record is not None and record[0].get("pending"):
+        start_busy("Looking up ingredients...")
+        task_runner.submit(
+            lambda task: complete_recipe_records([record])[0],
+            on_done=lambda completed: apply_recipe_nutrition(name, completed),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to fetch nutrition data: {e}"),
+            on_finally=stop_busy,
+            name="recipe_nutrition"
+        )
+        return
+    show_recipe_nutrition(nutrientDict.get(name))
 
-    try:
-        for url in recipe_urls:
-            driver.get(url)
-            time.sleep(1)
-
-            try:
-                WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.ID, "spoonacular-metric")))
-                metric_button = driver.find_element(By.XPATH, "//*[@id='spoonacularMeasure']/label[1]")
-                metric_button.click()
-
-                WebDriverWait(driver, 5).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.stepper-wrap")))
-                serving_input = driver.find_element(By.XPATH, "//*[@id='spoonacular-serving-stepper']")
-                serving_input.clear()
-                serving_input.send_keys("0" + Keys.ENTER)
-            except Exception:
-                pass
-
-            measures = []
-            ingredients = []
-            price = []
-            nutrientName = []
-            nutrientValue = []
-
-            try:
-                for element in driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-ingredient"):
-                    measure = element.find_element(By.CSS_SELECTOR, "div.spoonacular-amount.t12.spoonacular-metric").text
-                    measures.append(measure)
-
-                for idx, element in enumerate(driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-image-wrapper"), start=1):
-                    try:
-                        ingredient = driver.find_element(By.XPATH, f'//*[@id=\"spoonacular-ingredient-vis-grid\"]/div[{idx}]/div/div[4]').text
-                        ingredients.append(ingredient)
-                    except NoSuchElementException:
-                        break
-
-                recipe_name = driver.find_element(By.XPATH, '//*[@id="wrapper"]/div/div[3]/h1').text
-            except Exception:
-                recipe_name = "Unknown Recipe"
-
-            try:
-                for element in driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-nutrient-name"):
-                    nutrientName.append(element.text)
-                for element in driver.find_elements(By.CSS_SELECTOR, "div.spoonacular-nutrient-value"):
-                    nutrientValue.append(element.text)
-            except Exception:
-                pass
-
-            try:
-                for element in driver.find_elements(By.ID, "spoonacularPriceBreakdownTable"):
-                    prices = element.find_element(By.CSS_SELECTOR, "div.spoonacular-quickview").text
-                    price.append(prices)
-            except Exception:
-                pass
-
-            recipe_details = {
-                "name": recipe_name,
-                "ingredients": dict(zip(ingredients, measures)),
-                "price": price
-            }
-
-            nutrientDictItems = {
-                "Calories": nutrientValue[nutrientName.index("Calories")] if "Calories" in nutrientName else "N/A",
-                "Protein": nutrientValue[nutrientName.index("Protein")] if "Protein" in nutrientName else "N/A",
-                "Fat": nutrientValue[nutrientName.index("Fat")] if "Fat" in nutrientName else "N/A",
-                "Carbs": nutrientValue[nutrientName.index("Carbohydrates")] if "Carbohydrates" in nutrientName else "N/A",
-                "Fiber": nutrientValue[nutrientName.index("Fiber")] if "Fiber" in nutrientName else "N/A",
-                "Calcium": nutrientValue[nutrientName.index("Calcium")] if "Calcium" in nutrientName else "N/A"
-            }
-
-            nutrientDict[recipe_name] = nutrientDictItems
-            recipe_list.append(recipe_details)
-            choices.append(recipe_name)
-    finally:
-        driver.quit()
-
-    return recipe_list
+def apply_recipe_nutrition(name, record):
+    if recipe_records.get(name) is None:
+        return
+    recipe_records[name] = record
+    nutrientDict[name] = record[1]
+    if clicked.get() == name:
+        show_recipe_nutrition(record[1])
 
-def insert_nutrition():
-    pick = nutrientDict.get(clicked.get())
+def show_recipe_nutrition(pick):
     More_Spoonacular_text.delete(1.0, tk.END)
 
     if not pick:
@@ -557,7 +776,16 @@ def insert_nutrition():
         for key, value in pick.items():
             More_Spoonacular_text.insert(tk.END, f"{key}: {value}\n")
 
-def more_recipe():
+# The picker is built once and reused across searches. Its list is filled
+# from `choices` only when it is opened, so streaming in hundreds of
+# recipes costs nothing until the user looks.
+More_Spoonacular_Frame = None
+
+def ensure_recipe_picker():
+    global More_Spoonacular_Frame, More_Spoonacular_text
+    if More_Spoonacular_Frame is not None:
+        return
+
     More_Spoonacular_Frame = tk.Frame(content_frame, background=current_theme["bg"])
     More_Spoonacular_Frame.pack(pady=10)
 
@@ -565,15 +793,101 @@ def more_recipe():
     More_Spoonacular_Label.pack(pady=10)
 
     clicked.set("Choose a Recipe")
-    dropp = tk.OptionMenu(More_Spoonacular_Frame, clicked, *choices)
+    dropp = ttk.Combobox(More_Spoonacular_Frame, textvariable=clicked, width=50, state="readonly", height=20)
+    dropp.configure(postcommand=lambda: dropp.configure(values=choices))
+    dropp.bind("<<ComboboxSelected>>", lambda event: insert_nutrition())
     dropp.pack()
 
-    global More_Spoonacular_text
     More_Spoonacular_text = scrolledtext.ScrolledText(More_Spoonacular_Frame, width=60, height=10, wrap=tk.WORD)
     More_Spoonacular_text.pack(padx=10, pady=10)
 
     fetch_nutrition_button = tk.Button(More_Spoonacular_Frame, text="Fetch Nutrition", command=insert_nutrition, font=("Arial", 14))
     fetch_nutrition_button.pack(pady=5)
 
+def reset_recipe_picker():
+    if More_Spoonacular_Frame is None:
+        return
+    clicked.set("Choose a Recipe")
+    More_Spoonacular_text.delete(1.0, tk.END)
+
+# ===== Latency Panel =====
+# Per-stage breakdown of the most recent operations. Spans from parallel
+# workers are summed, so a stage can exceed the operation's wall time.
+
+LATENCY_PANEL_REFRESH_MS = 1000
+LATENCY_PANEL_OPERATIONS = 10
+latency_window = None
+
+def open_latency_panel():
+    global latency_window
+    if latency_window is not None and latency_window.winfo_exists():
+        latency_window.lift()
+        return
+
+    latency_window = tk.Toplevel(root)
+    latency_window.title("Latency Breakdown")
+    latency_window.configure(background=current_theme["bg"])
+
+    latency_text = scrolledtext.ScrolledText(latency_window, width=80, height=30, wrap=tk.NONE, font=("Consolas", 10))
+    latency_text.pack(padx=10, pady=10, fill="both", expand=True)
+
+    button_frame = tk.Frame(latency_window, bg=current_theme["bg"])
+    button_frame.pack(pady=(0, 10))
+    tk.Button(button_frame, text="Export Prometheus...", command=lambda: export_metrics("prometheus")).pack(side="left", padx=5)
+    tk.Button(button_frame, text="Export JSON Lines...", command=lambda: export_metrics("jsonl")).pack(side="left", padx=5)
+
+    def refresh():
+        if not latency_window.winfo_exists():
+            return
+        latency_text.delete("1.0", tk.END)
+        latency_text.insert(tk.END, format_latency_report())
+        latency_window.after(LATENCY_PANEL_REFRESH_MS, refresh)
+
+    refresh()
+
+def format_latency_report():
+    metrics = get_metrics()
+    lines = [
+        f"Cache hits: {metrics.counter('cache_hits_total')}   misses: {metrics.counter('cache_misses_total')}   "
+        f"offline DB hits: {metrics.counter('food_db_hits_total')}",
+        f"HTTP requests: {metrics.counter('http_requests_total')}   retries: {metrics.counter('http_retries_total')}   "
+        f"swallowed failures: {metrics.counter('swallowed_failures_total')}",
+        ""
+    ]
+
+    operations = metrics.recent_operations()[-LATENCY_PANEL_OPERATIONS:]
+    if not operations:
+        lines.append("No operations recorded yet.")
+
+    for operation in reversed(operations):
+        status = f"  [{operation.error}]" if operation.error else ""
+        lines.append(f"{operation.name}: {operation.duration * 1000:.0f} ms{status}")
+        for name, seconds in sorted(operation.breakdown().items(), key=lambda item: -item[1]):
+            lines.append(f"    {name:<34} {seconds * 1000:10.1f} ms")
+        lines.append("")
+
+    return "\n".join(lines)
+
+def export_metrics(kind):
+    if kind == "prometheus":
+        path = filedialog.asksaveasfilename(defaultextension=".prom", filetypes=[("Prometheus text", "*.prom"), ("All files", "*.*")])
+    else:
+        path = filedialog.asksaveasfilename(defaultextension=".jsonl", filetypes=[("JSON Lines", "*.jsonl"), ("All files", "*.*")])
+    if not path:
+        return
+
+    try:
+        if kind == "prometheus":
+            get_metrics().write_prometheus(path)
+        else:
+            get_metrics().append_jsonl(path)
+    except OSError as e:
+        messagebox.showerror("Error", f"Failed to export metrics: {e}")
+
 apply_theme()
-root.mainloop()
\ No newline at end of file
+root.protocol("WM_DELETE_WINDOW", close_app)
+
+# Importing the module builds the UI without entering the main loop, so
+# benchmarks/soak.py can drive it.
+if __name__ == "__main__":
+    root.mainloop()
\ No newline at end of file
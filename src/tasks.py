@@ -0,0 +1,123 @@
+# ===== Imports =====
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from engine.metrics import activate, span, start_operation, finish_operation
+
+# ===== Defaults =====
+DEFAULT_WORKERS = 4
+POLL_INTERVAL_MS = 16
+DRAIN_BUDGET_SECONDS = 0.008
+
+# ===== Background Task =====
+
+# Handle for one piece of background work. The worker function receives the
+# task as its first argument so it can check `cancelled` between steps and
+# push intermediate results to the Tk thread with `report`. A named task is
+# traced as one operation, covering the worker and the Tk callbacks alike.
+class Task:
+    def __init__(self, runner, on_done=None, on_error=None, on_progress=None, on_finally=None, name=None):
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_finally = on_finally
+        self.operation = start_operation(name) if name else None
+
+        self._runner = runner
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def report(self, value):
+        if not self.cancelled:
+            self._runner._results.put((self, "progress", value))
+
+# ===== Task Runner =====
+
+# Runs blocking work on a thread pool and hands results back to the Tk main
+# loop. Worker threads never touch widgets: everything they produce goes
+# through a queue that is drained with `root.after`, a few milliseconds at a
+# time so repaints are never starved.
+class TaskRunner:
+    def __init__(self, root, workers=DEFAULT_WORKERS):
+        self.root = root
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._results = queue.Queue()
+        self._active = set()
+        self._closed = False
+        self.root.after(POLL_INTERVAL_MS, self._drain)
+
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, on_finally=None, name=None):
+        task = Task(self, on_done, on_error, on_progress, on_finally, name)
+        self._active.add(task)
+        self._pool.submit(self._run, task, func, args)
+        return task
+
+    def cancel_all(self):
+        for task in list(self._active):
+            task.cancel()
+
+    @property
+    def busy(self):
+        return bool(self._active)
+
+    def shutdown(self):
+        self._closed = True
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, task, func, args):
+        if task.cancelled:
+            self._results.put((task, "cancelled", None))
+            return
+
+        try:
+            with activate(task.operation):
+                result = func(task, *args)
+        except Exception as e:
+            self._results.put((task, "error", e))
+            return
+
+        self._results.put((task, "cancelled" if task.cancelled else "done", result))
+
+    def _drain(self):
+        deadline = time.perf_counter() + DRAIN_BUDGET_SECONDS
+
+        try:
+            while time.perf_counter() < deadline:
+                try:
+                    task, kind, value = self._results.get_nowait()
+                except queue.Empty:
+                    break
+                self._dispatch(task, kind, value)
+        finally:
+            if not self._closed:
+                self.root.after(POLL_INTERVAL_MS, self._drain)
+
+    def _dispatch(self, task, kind, value):
+        with activate(task.operation):
+            if kind == "progress":
+                if task.on_progress and not task.cancelled:
+                    with span("ui.progress"):
+                        task.on_progress(value)
+                return
+
+            self._active.discard(task)
+            try:
+                with span("ui.done"):
+                    if kind == "done" and task.on_done:
+                        task.on_done(value)
+                    elif kind == "error" and task.on_error:
+                        task.on_error(value)
+
+                if task.on_finally:
+                    task.on_finally()
+            finally:
+                if task.operation is not None:
+                    finish_operation(task.operation, value if kind == "error" else None)
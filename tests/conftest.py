@@ -0,0 +1,10 @@
+# ===== Test Setup =====
+# The engine is imported from src/ the way main.py and the benchmarks run
+# it; the stub server's fixtures render realistic recipe pages.
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "src"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
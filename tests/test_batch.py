@@ -0,0 +1,65 @@
+import io
+
+from engine import batch, http_client
+from engine.batch import analyze_stream, best_match, read_meals
+
+def test_best_match_prefers_descriptions_containing_every_query_word():
+    foods = [
+        {"fdcId": 3, "description": "Chicken, broilers or fryers, breast, meat only, cooked, roasted"},
+        {"fdcId": 2, "description": "Chicken breast tenders, breaded, cooked"},
+        {"fdcId": 1, "description": "Soup, chicken noodle"}
+    ]
+
+    assert best_match("chicken breast", foods)["fdcId"] == 2
+
+def test_best_match_breaks_ties_by_length_then_fdc_id():
+    foods = [{"fdcId": 9, "description": "Rice, white"}, {"fdcId": 4, "description": "White rice"}, {"fdcId": 7, "description": "Rice, white, cooked"}]
+
+    assert best_match("white rice", foods)["fdcId"] == 4
+    assert best_match("white rice", []) is None
+    assert best_match("!!", foods) is None
+
+def test_jsonl_meals_keep_going_past_bad_lines():
+    source = io.StringIO('{"id": "lunch", "ingredients": [{"fdcId": 1, "grams": 100}]}\n\n{not json\n[1, 2]\n{"ingredients": []}\n')
+
+    meals = list(read_meals(source, "jsonl"))
+
+    assert meals[0] == {"id": "lunch", "ingredients": [{"fdcId": 1, "grams": 100}]}
+    assert meals[1]["id"] == 3 and meals[1]["error"].startswith("JSONDecodeError")
+    assert meals[2] == {"id": 4, "error": "ValueError: meal must be a JSON object"}
+    assert meals[3] == {"id": 5, "ingredients": []}
+
+def test_csv_meals_group_rows_and_report_bad_meals():
+    source = io.StringIO(
+        "meal_id,food,fdc_id,grams\n"
+        "a,rice,,100\n"
+        "a,,171477,50.5\n"
+        "b,egg,,\n"
+        "c,egg,,-1\n"
+        "d,milk,,nan\n"
+        "e,oats,,40\n"
+    )
+
+    meals = list(read_meals(source, "csv"))
+
+    assert meals[0] == {"id": "a", "ingredients": [{"food": "rice", "fdcId": None, "grams": 100.0}, {"food": None, "fdcId": 171477, "grams": 50.5}]}
+    assert [meal["id"] for meal in meals] == ["a", "b", "c", "d", "e"]
+    assert all("error" in meal for meal in meals[1:4])
+    assert meals[4] == {"id": "e", "ingredients": [{"food": "oats", "fdcId": None, "grams": 40.0}]}
+
+def test_stream_keeps_input_order_and_passes_errors_through():
+    meals = [{"id": i, "ingredients": []} if i % 7 else {"id": i, "error": "ValueError: bad"} for i in range(50)]
+
+    results = list(analyze_stream(meals, workers=2, chunk_size=3))
+
+    assert [result["id"] for result in results] == list(range(50))
+    assert [result["id"] for result in results if "error" in result] == list(range(0, 50, 7))
+    assert results[1]["totals"]["Calories"] == 0.0
+
+def test_workers_split_the_usda_quota(monkeypatch):
+    monkeypatch.setenv("RECIPE_USDA_REQUESTS_PER_HOUR", "1000")
+    monkeypatch.setattr(http_client, "_http_client", None)
+
+    batch._init_worker(4)
+
+    assert http_client.get_http_client().limiters["usda"].rate == 250 / 3600
@@ -0,0 +1,58 @@
+import pytest
+
+from engine import cache as cache_module
+from engine.cache import ResponseCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+def open_cache(tmp_path, **options):
+    return ResponseCache(path=str(tmp_path / "cache.sqlite3"), **options)
+
+def test_round_trip_and_stats(tmp_path, clock):
+    cache = open_cache(tmp_path)
+    cache.set("search:SR Legacy:rice", {"foods": [{"fdcId": 1}]})
+
+    assert cache.get("search:SR Legacy:rice") == {"foods": [{"fdcId": 1}]}
+    assert cache.get("missing") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = open_cache(tmp_path, ttl=60)
+    cache.set("food:1", {"fdcId": 1})
+
+    clock.now += 60
+    assert cache.get("food:1") == {"fdcId": 1}
+
+    clock.now += 1
+    assert cache.get("food:1") is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.get("a")
+    clock.now += 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+def test_entries_persist_across_instances(tmp_path, clock):
+    open_cache(tmp_path).set("food:2", {"fdcId": 2})
+
+    assert open_cache(tmp_path).get("food:2") == {"fdcId": 2}
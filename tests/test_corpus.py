@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from engine.corpus import MAXIMIZE_USED, MINIMIZE_MISSED, RecipeCorpus, ingredient_key
+
+INGREDIENTS = [
+    "chicken breast", "chicken thigh", "rice", "brown rice", "egg", "eggs", "tomatoes", "cherry tomato",
+    "onion", "garlic", "butter", "unsalted butter", "pasta", "cheddar cheese", "milk", "flour", "basil"
+]
+
+@pytest.fixture
+def corpus(tmp_path):
+    corpus = RecipeCorpus(str(tmp_path / "corpus.sqlite3"))
+    yield corpus
+    corpus.close()
+
+def synthetic_recipes(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {"id": i, "title": f"Recipe {i}", "url": f"https://example.com/{i}", "ingredients": rng.sample(INGREDIENTS, rng.randint(1, 8))}
+        for i in range(count)
+    ]
+
+# Scans every recipe: a query ingredient matches each ingredient whose key
+# contains all of its words.
+def naive_find(recipes, food_list, number, ranking):
+    queries = [set(ingredient_key(food).split()) for food in food_list]
+    ranked = []
+    for position, recipe in enumerate(recipes):
+        keys = list(dict.fromkeys(key for key in map(ingredient_key, recipe["ingredients"]) if key))
+        used = sum(1 for key in keys if any(query and query <= set(key.split()) for query in queries))
+        if used == 0:
+            continue
+        missed = len(keys) - used
+        order = (-used, missed, position) if ranking == MAXIMIZE_USED else (missed, -used, position)
+        ranked.append((order, recipe["id"], used, missed))
+    return [(recipe_id, used, missed) for _, recipe_id, used, missed in sorted(ranked)[:number]]
+
+@pytest.mark.parametrize("ranking", [MAXIMIZE_USED, MINIMIZE_MISSED])
+@pytest.mark.parametrize("food_list", [["rice"], ["chicken", "rice"], ["tomato", "egg", "basil"], ["butter", "flour", "milk", "egg"]])
+def test_find_matches_naive_ranking(corpus, food_list, ranking):
+    recipes = synthetic_recipes(500)
+    corpus.add_many(recipes)
+
+    found = [(r["id"], r["usedIngredientCount"], r["missedIngredientCount"]) for r in corpus.find(food_list, 25, ranking)]
+
+    assert found == naive_find(recipes, food_list, 25, ranking)
+
+def test_replaced_recipe_is_reindexed(corpus):
+    corpus.add_many([{"id": 1, "title": "Soup", "url": "u", "ingredients": ["onion", "garlic"]}])
+    corpus.add_many([{"id": 1, "title": "Soup", "url": "u", "ingredients": ["rice"]}])
+
+    assert corpus.find(["onion"], 10) == []
+    assert [r["id"] for r in corpus.find(["rice"], 10)] == [1]
+
+def test_index_survives_reopening(tmp_path):
+    path = str(tmp_path / "corpus.sqlite3")
+    recipes = synthetic_recipes(50)
+    first = RecipeCorpus(path)
+    first.add_many(recipes)
+    expected = first.find(["egg", "rice"], 10)
+    first.close()
+
+    reopened = RecipeCorpus(path)
+    try:
+        assert reopened.find(["egg", "rice"], 10) == expected
+    finally:
+        reopened.close()
+
+def test_covers_only_recent_searches_for_enough_results(corpus):
+    corpus.record_search(["Rice", "eggs"], 10)
+
+    assert corpus.covers(["egg", "rice"], 10)
+    assert not corpus.covers(["egg", "rice"], 20)
+    assert not corpus.covers(["egg"], 10)
+    assert not corpus.covers(["egg", "rice"], 10, max_age=-1)
@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+
+webdriver = pytest.importorskip("selenium.webdriver")
+from selenium.common.exceptions import WebDriverException
+
+from engine.drivers import DriverPool
+
+class FakeDriver:
+    def __init__(self, options=None):
+        self.alive = True
+        self.quit_calls = 0
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise WebDriverException("chrome not reachable")
+        return 1
+
+    def quit(self):
+        self.quit_calls += 1
+
+@pytest.fixture
+def started(monkeypatch):
+    drivers = []
+
+    def chrome(options=None):
+        drivers.append(FakeDriver(options))
+        return drivers[-1]
+
+    monkeypatch.setattr(webdriver, "Chrome", chrome)
+    return drivers
+
+def test_released_drivers_are_reused(started):
+    pool = DriverPool(options=None, size=2, max_pages=10)
+
+    first = pool.acquire()
+    pool.release(first)
+    second = pool.acquire()
+
+    assert second is first
+    assert len(started) == 1
+
+def test_drivers_are_recycled_after_max_pages(started):
+    pool = DriverPool(options=None, size=1, max_pages=3)
+
+    driver = pool.acquire()
+    pool.release(driver, pages=2)
+    assert pool.acquire() is driver
+    pool.release(driver, pages=1)
+
+    replacement = pool.acquire()
+    assert replacement is not driver
+    assert driver.quit_calls == 1
+    assert len(started) == 2
+
+def test_unhealthy_drivers_are_replaced(started):
+    pool = DriverPool(options=None, size=1)
+
+    driver = pool.acquire()
+    pool.release(driver)
+    driver.alive = False
+
+    replacement = pool.acquire()
+    assert replacement is not driver and replacement.alive
+    assert driver.quit_calls == 1
+
+def test_acquire_waits_when_the_pool_is_full(started):
+    pool = DriverPool(options=None, size=1)
+    driver = pool.acquire()
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    waiter.join(0.3)
+    assert acquired == []
+
+    pool.release(driver)
+    waiter.join(5)
+    assert acquired == [driver]
+    assert len(started) == 1
+
+def test_close_quits_idle_drivers_and_later_releases(started):
+    pool = DriverPool(options=None, size=2)
+    idle = pool.acquire()
+    busy = pool.acquire()
+    pool.release(idle)
+
+    pool.close()
+    assert idle.quit_calls == 1 and busy.quit_calls == 0
+
+    pool.release(busy)
+    assert busy.quit_calls == 1
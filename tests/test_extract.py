@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("lxml")
+
+from engine.extract import extract_recipe_page
+from stub_server import Fixtures
+
+PAGE_SHELL = """<html><body><div id="wrapper"><div><div></div><div></div>
+<div class="recipeHeader"><h1>Garlic Pasta</h1></div>
+{body}
+</div></div></body></html>"""
+
+def test_fixture_page():
+    fixtures = Fixtures()
+    page = extract_recipe_page(fixtures.recipe_page(700000))
+    ingredients = fixtures.information["extendedIngredients"]
+
+    assert page["name"] == fixtures.recipe_information(700000, "")["title"]
+    assert page["ingredients"] == [ingredient["name"] for ingredient in ingredients]
+    assert page["measures"] == [f"{round(ingredient['amount'] * 28.35)} g" for ingredient in ingredients]
+    assert page["servings"] == "2"
+    assert page["nutrient_names"][0] == "Calories"
+    assert len(page["nutrient_names"]) == len(page["nutrient_values"])
+    assert page["price"] and page["price"][0].startswith("Cost per Serving")
+
+@pytest.mark.parametrize("page_html", [None, "", "<html><body><p>Not a recipe</p></body></html>"])
+def test_empty_or_unrelated_page(page_html):
+    assert extract_recipe_page(page_html) is None
+
+def test_title_without_ingredient_rows_falls_back():
+    assert extract_recipe_page(PAGE_SHELL.format(body="")) is None
+
+def test_names_and_amounts_must_pair_up():
+    body = """<div id="spoonacular-ingredient-vis-grid">
+<div><div><div></div><div></div><div></div><div>pasta</div></div></div>
+<div><div><div></div><div></div><div></div><div>garlic</div></div></div>
+</div>
+<div class="spoonacular-ingredient"><div class="spoonacular-amount t12 spoonacular-metric">200 g</div></div>"""
+    assert extract_recipe_page(PAGE_SHELL.format(body=body)) is None
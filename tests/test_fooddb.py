@@ -0,0 +1,105 @@
+import csv
+import json
+import zipfile
+
+import pytest
+
+from engine.fooddb import FoodDatabase
+
+FOODS = [
+    (171705, "Cheese, cheddar", "sr_legacy_food"),
+    (171265, "Cheese, parmesan, grated", "sr_legacy_food"),
+    (169756, "Rice, white, long-grain, regular, enriched, cooked", "sr_legacy_food")
+]
+NUTRIENTS = [(1003, "Protein", "G", "203"), (1008, "Energy", "KCAL", "208")]
+AMOUNTS = [(171705, 1003, 22.87), (171705, 1008, 403), (169756, 1003, 2.69), (169756, 1008, "")]
+
+def write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+@pytest.fixture
+def csv_dump(tmp_path):
+    dump = tmp_path / "FoodData_Central_sr_legacy_food_csv"
+    dump.mkdir()
+    write_csv(dump / "food.csv", ["fdc_id", "data_type", "description"], [(fdc_id, data_type, description) for fdc_id, description, data_type in FOODS])
+    write_csv(dump / "nutrient.csv", ["id", "name", "unit_name", "nutrient_nbr"], NUTRIENTS)
+    write_csv(dump / "food_nutrient.csv", ["id", "fdc_id", "nutrient_id", "amount"], [(i, *row) for i, row in enumerate(AMOUNTS)])
+    return dump
+
+@pytest.fixture
+def database(tmp_path):
+    database = FoodDatabase(str(tmp_path / "foods.sqlite3"))
+    yield database
+    database.close()
+
+def test_csv_directory_import(database, csv_dump):
+    assert database.import_csv(str(csv_dump)) == 3
+
+    cheddar = database.food(171705)
+    assert cheddar["description"] == "Cheese, cheddar"
+    assert cheddar["dataType"] == "SR Legacy"
+    assert [(n["nutrient"]["id"], n["nutrient"]["unitName"], n["amount"]) for n in cheddar["foodNutrients"]] == [(1003, "g", 22.87), (1008, "kcal", 403)]
+
+    # Empty amounts are not stored.
+    assert [n["nutrient"]["id"] for n in database.food(169756)["foodNutrients"]] == [1003]
+    assert database.food(1) is None
+
+def test_csv_zip_import(database, csv_dump, tmp_path):
+    archive = tmp_path / "sr_legacy.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        for path in csv_dump.iterdir():
+            zf.write(path, f"{csv_dump.name}/{path.name}")
+
+    assert database.import_dump(str(archive)) == 3
+    assert database.has_data()
+
+def test_csv_import_needs_every_table(database, csv_dump):
+    (csv_dump / "nutrient.csv").unlink()
+
+    with pytest.raises(FileNotFoundError, match="nutrient.csv"):
+        database.import_csv(str(csv_dump))
+
+def test_json_import(database, tmp_path):
+    dump = tmp_path / "sr_legacy.json"
+    dump.write_text(json.dumps({"SRLegacyFoods": [
+        {
+            "fdcId": 171705,
+            "description": "Cheese, cheddar",
+            "foodNutrients": [
+                {"nutrient": {"id": 1003, "number": "203", "name": "Protein", "unitName": "g"}, "amount": 22.87},
+                {"nutrient": {"id": 1008, "number": "208", "name": "Energy", "unitName": "kcal"}},
+                {"nutrient": {"number": "999", "name": "No id"}, "amount": 1}
+            ]
+        }
+    ]}), encoding="utf-8")
+
+    assert database.import_dump(str(dump)) == 1
+    assert [n["nutrient"]["id"] for n in database.food(171705)["foodNutrients"]] == [1003]
+
+def test_search_matches_words_and_prefixes(database, csv_dump):
+    database.import_csv(str(csv_dump))
+
+    assert [food["fdcId"] for food in database.search("cheddar cheese")["foods"]] == [171705]
+    assert {food["fdcId"] for food in database.search("chees")["foods"]} == {171705, 171265}
+    assert database.search("rice")["foods"][0] == {"fdcId": 169756, "description": FOODS[2][1], "dataType": "SR Legacy"}
+    assert database.search("cheese", limit=1)["totalHits"] == 1
+    assert database.search("'\"*") == {"totalHits": 0, "foods": []}
+    assert database.search("tofu")["foods"] == []
+
+def test_open_existing_ignores_missing_or_empty_databases(tmp_path, csv_dump):
+    path = str(tmp_path / "foods.sqlite3")
+    assert FoodDatabase.open_existing(path) is None
+
+    FoodDatabase(path).close()
+    assert FoodDatabase.open_existing(path) is None
+
+    database = FoodDatabase(path)
+    database.import_csv(str(csv_dump))
+    database.close()
+
+    reopened = FoodDatabase.open_existing(path)
+    assert reopened.search("rice")["totalHits"] == 1
+    reopened.close()
@@ -0,0 +1,96 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+tkinter = pytest.importorskip("tkinter")
+
+from run import configure_environment
+from soak import Dialogs, pump, run_meal, run_recipe_search, settled, widget_count
+from stub_server import StubServer
+
+# Drives the Tk app the way benchmarks/soak.py does, against the stub
+# server. Skipped where no display can be opened; run under Xvfb on a
+# headless machine.
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    saved_environment = dict(os.environ)
+    stub = StubServer().start()
+    configure_environment(stub, str(tmp_path_factory.mktemp("gui")))
+
+    try:
+        import main as app
+    except tkinter.TclError as e:
+        stub.stop()
+        os.environ.clear()
+        os.environ.update(saved_environment)
+        pytest.skip(f"no display: {e}")
+
+    dialogs = Dialogs()
+    for kind in ("showwarning", "showerror", "showinfo"):
+        setattr(app.messagebox, kind, dialogs.record(kind))
+    app.dialogs = dialogs
+
+    yield app
+
+    app.close_app()
+    stub.stop()
+    os.environ.clear()
+    os.environ.update(saved_environment)
+
+# ----- Type-Ahead Suggestions -----
+
+def type_text(app, text):
+    app.F_Entry.delete(0, "end")
+    app.F_Entry.insert(0, text)
+    app.schedule_suggestions(SimpleNamespace(keysym=text[-1]))
+    app.root.update()
+
+def test_a_burst_of_keystrokes_sends_one_search(app, monkeypatch):
+    queries = []
+
+    def suggest_foods(query):
+        queries.append(query)
+        return []
+
+    monkeypatch.setattr(app, "suggest_foods", suggest_foods)
+    for length in range(1, 7):
+        type_text(app, "cheddar"[:length])
+    assert queries == []
+
+    pump(app, lambda: queries and settled(app))
+    app.root.after(2 * app.SUGGEST_DELAY_MS, lambda: queries.append(None))
+    pump(app, lambda: queries[-1] is None)
+
+    assert queries == ["chedda", None]
+
+def test_stale_suggestions_are_dropped(app, monkeypatch):
+    monkeypatch.setattr(app, "suggest_foods", lambda query: [{"fdcId": 1, "description": query}])
+    monkeypatch.setattr(app, "prefetch_densities", lambda fdc_ids: [])
+
+    app.F_Entry.delete(0, "end")
+    app.F_Entry.insert(0, "rice")
+    app.request_suggestions()
+    generation = app.suggest_generation
+    pump(app, lambda: settled(app))
+    assert app.suggestion_listbox.get(0, "end") == ("rice",)
+
+    app.show_suggestions([{"fdcId": 2, "description": "old"}], generation - 1)
+    assert app.suggestion_listbox.get(0, "end") == ("rice",)
+    app.clear_suggestions()
+
+# ----- Widget Lifecycle -----
+
+def test_widget_count_stays_flat_over_many_operations(app):
+    def operate(steps):
+        for step in steps:
+            (run_meal if step % 2 == 0 else run_recipe_search)(app, step)
+        app.root.update()
+
+    operate(range(4))
+    baseline = widget_count(app.root)
+
+    operate(range(4, 40))
+
+    assert widget_count(app.root) <= baseline
+    assert app.dialogs.shown == []
@@ -0,0 +1,145 @@
+import pytest
+import requests
+
+from engine import http_client as http_module
+from engine.http_client import HttpClient, TokenBucket
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(http_module.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(http_module.time, "sleep", clock.sleep)
+    return clock
+
+# ----- Token Bucket -----
+
+def test_bucket_allows_a_burst_then_paces_at_the_rate(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3)
+
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == pytest.approx([0.5, 0.5])
+
+def test_bucket_refills_while_idle_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    bucket.acquire(2)
+
+    clock.now += 60
+    bucket.acquire(2)
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == pytest.approx([1.0])
+
+def test_costly_calls_are_paid_in_full(clock):
+    bucket = TokenBucket(rate=1.0, capacity=5)
+
+    bucket.acquire(12)
+    assert clock.sleeps == pytest.approx([7.0])
+
+    bucket.acquire()
+    assert clock.sleeps == pytest.approx([7.0, 1.0])
+
+# ----- Retries -----
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error", response=self)
+
+class FakeSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def get(self, url, params=None, headers=None, timeout=None):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def client_with(outcomes, **kwargs):
+    client = HttpClient(**kwargs)
+    session = FakeSession(outcomes)
+    client._sessions["api.example.com"] = session
+    return client, session
+
+def test_retry_after_is_honoured(clock):
+    client, session = client_with([FakeResponse(429, {"Retry-After": "7"}), FakeResponse(200)])
+
+    response = client.get("https://api.example.com/foods")
+
+    assert response.status_code == 200
+    assert session.calls == 2
+    assert clock.sleeps == [7.0]
+
+def test_backoff_is_jittered_and_capped(clock, monkeypatch):
+    bounds = []
+    monkeypatch.setattr(http_module.random, "uniform", lambda low, high: bounds.append((low, high)) or high)
+    outcomes = [FakeResponse(503), FakeResponse(502), requests.exceptions.ConnectionError("reset"), FakeResponse(500), FakeResponse(200)]
+    client, session = client_with(outcomes, max_retries=4, backoff_base=1.0, backoff_max=5.0)
+
+    assert client.get("https://api.example.com/foods").status_code == 200
+    assert bounds == [(0.5, 1.0), (1.0, 2.0), (2.0, 4.0), (2.5, 5.0)]
+    assert clock.sleeps == [1.0, 2.0, 4.0, 5.0]
+
+def test_retry_after_dates_fall_back_to_backoff(clock):
+    client, _ = client_with([FakeResponse(503, {"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}), FakeResponse(200)], backoff_base=1.0)
+
+    client.get("https://api.example.com/foods")
+
+    assert 0.5 <= clock.sleeps[0] <= 1.0
+
+def test_gives_up_after_max_retries(clock):
+    client, session = client_with([FakeResponse(503)] * 3, max_retries=2)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get("https://api.example.com/foods")
+    assert session.calls == 3
+
+    client, session = client_with([requests.exceptions.Timeout("slow")] * 2, max_retries=1)
+    with pytest.raises(requests.exceptions.Timeout):
+        client.get("https://api.example.com/foods")
+    assert session.calls == 2
+
+def test_client_errors_are_not_retried(clock):
+    client, session = client_with([FakeResponse(404)])
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get("https://api.example.com/foods")
+    assert session.calls == 1
+    assert clock.sleeps == []
+
+def test_every_attempt_is_charged_to_the_limiter(clock):
+    client, _ = client_with([FakeResponse(429, {"Retry-After": "0"}), FakeResponse(200)])
+    client.add_limiter("usda", rate=1.0, capacity=1)
+
+    client.get("https://api.example.com/foods", limiter="usda", cost=1)
+
+    # The first attempt empties the bucket, so the retry waits for a token.
+    assert clock.sleeps == [0.0, pytest.approx(1.0)]
@@ -0,0 +1,81 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from engine import meal as meal_module
+from engine.meal import Meal
+from engine.vectors import PANEL_SIZE
+
+@pytest.fixture
+def densities(monkeypatch):
+    rng = np.random.default_rng(7)
+    vectors = {fdc_id: rng.uniform(0, 50, PANEL_SIZE) for fdc_id in range(1, 6)}
+    for fdc_id, vector in vectors.items():
+        monkeypatch.setitem(meal_module._densities, fdc_id, vector)
+    return vectors
+
+def expected_total(meal, densities):
+    return sum((densities[item.fdc_id] * item.grams / 100.0 for item in meal.items.values()), np.zeros(PANEL_SIZE))
+
+def test_add_remove_and_reweight_keep_the_total(densities):
+    meal = Meal()
+    rice = meal.add("rice", 150)
+    meal.resolve(rice.item_id, 1, "Rice")
+    beans = meal.add("beans", 80)
+    meal.resolve(beans.item_id, 2, "Beans")
+
+    assert np.allclose(meal.total, densities[1] * 1.5 + densities[2] * 0.8)
+
+    meal.reweight(rice.item_id, 50)
+    assert np.allclose(meal.total, densities[1] * 0.5 + densities[2] * 0.8)
+
+    meal.remove(beans.item_id)
+    assert np.allclose(meal.total, densities[1] * 0.5)
+
+    meal.remove(rice.item_id)
+    assert not meal.total.any()
+
+def test_names_chosen_earlier_resolve_by_themselves(densities):
+    meal = Meal()
+    first = meal.add("Rice", 100)
+    meal.resolve(first.item_id, 3, "Rice, white")
+
+    second = meal.add("rice", 20)
+
+    assert second.fdc_id == 3 and second.ready
+    assert np.allclose(meal.total, densities[3] * 1.2)
+
+def test_running_total_matches_a_recompute(densities):
+    rng = random.Random(11)
+    meal = Meal()
+    for step in range(500):
+        action = rng.random()
+        if action < 0.5 or not meal.items:
+            item = meal.add(f"food {step}", rng.uniform(1, 400))
+            meal.resolve(item.item_id, rng.randint(1, 5))
+        elif action < 0.8:
+            meal.reweight(rng.choice(list(meal.items)), rng.uniform(0, 400))
+        else:
+            meal.remove(rng.choice(list(meal.items)))
+
+    running = meal.total
+    assert np.allclose(running, expected_total(meal, densities))
+    meal.recompute()
+    assert np.allclose(running, meal.total)
+
+@pytest.mark.parametrize("grams", [-1, math.nan, math.inf, "1e309", "abc"])
+def test_bad_weights_are_rejected(densities, grams):
+    meal = Meal()
+    item = meal.add("rice", 100)
+    meal.resolve(item.item_id, 1)
+
+    with pytest.raises(ValueError):
+        meal.add("beans", grams)
+    with pytest.raises(ValueError):
+        meal.reweight(item.item_id, grams)
+
+    assert list(meal.items) == [item.item_id]
+    assert item.grams == 100
+    assert np.allclose(meal.total, densities[1])
@@ -0,0 +1,61 @@
+import pytest
+
+from engine.measures import PIECE_GRAMS, VOLUME_ML, measure_grams, parse_measure
+
+@pytest.mark.parametrize("measure, expected", [
+    ("200 g", (200.0, "g")),
+    ("200g", (200.0, "g")),
+    ("1 1/2 cups", (1.5, "cup")),
+    ("½ tsp", (0.5, "tsp")),
+    ("2-3 cloves", (2.5, "clove")),
+    ("1,5 l", (1.5, "l")),
+    ("1,000 g", (1000.0, "g")),
+    ("1,000-1,500 g", (1250.0, "g")),
+    ("1 T", (1.0, "tbsp")),
+    ("1 t", (1.0, "tsp")),
+    ("2 Tbsp.", (2.0, "tbsp")),
+    (".5 cup", (0.5, "cup")),
+    ("1-.5 cup", (0.75, "cup")),
+    ("3", (3.0, ""))
+])
+def test_parse_measure(measure, expected):
+    assert parse_measure(measure) == expected
+
+@pytest.mark.parametrize("measure", ["", None, "to taste", "a pinch"])
+def test_parse_measure_without_amount(measure):
+    assert parse_measure(measure) is None
+
+def test_mass_units():
+    assert measure_grams("1,000 g", "flour") == 1000.0
+    assert measure_grams("2 kg", "flour") == 2000.0
+    assert measure_grams("1 lb", "beef") == pytest.approx(453.592)
+
+def test_volume_uses_density():
+    assert measure_grams("1 cup", "water") == pytest.approx(VOLUME_ML["cup"])
+    assert measure_grams("1 cup", "all-purpose flour") == pytest.approx(VOLUME_ML["cup"] * 0.53)
+    assert measure_grams("1 T", "butter") == pytest.approx(VOLUME_ML["tbsp"] * 0.96)
+
+def test_pieces_and_sizes():
+    assert measure_grams("2", "eggs") == 2 * PIECE_GRAMS["egg"]
+    assert measure_grams("2 eggs") == 2 * PIECE_GRAMS["egg"]
+    assert measure_grams("1 large", "onion") == PIECE_GRAMS["onion"] * 1.25
+    assert measure_grams("3 cloves", "garlic") == 3 * PIECE_GRAMS["garlic"]
+    assert measure_grams(".5 cup", "water") == pytest.approx(VOLUME_ML["cup"] / 2)
+
+def test_size_word_before_the_food():
+    assert measure_grams("2 large eggs") == 2 * PIECE_GRAMS["egg"] * 1.25
+    assert measure_grams("2 large eggs", "eggs") == 2 * PIECE_GRAMS["egg"] * 1.25
+    assert measure_grams("1 small onion") == PIECE_GRAMS["onion"] * 0.75
+    assert measure_grams("1 medium onion") == PIECE_GRAMS["onion"]
+
+def test_egg_parts_are_not_whole_eggs():
+    assert measure_grams("1 egg yolk") == PIECE_GRAMS["egg yolk"]
+    assert measure_grams("3 egg whites") == 3 * PIECE_GRAMS["egg white"]
+    assert measure_grams("2 large egg yolks") == 2 * PIECE_GRAMS["egg yolk"] * 1.25
+    assert measure_grams("2", "egg yolks") == 2 * PIECE_GRAMS["egg yolk"]
+    assert PIECE_GRAMS["egg yolk"] < PIECE_GRAMS["egg"]
+
+def test_unweighable_measures():
+    assert measure_grams("to taste", "salt") is None
+    assert measure_grams("1 serving", "pasta") is None
+    assert measure_grams("2", "mystery fruit") is None
@@ -0,0 +1,37 @@
+from engine.metrics import Metrics
+
+def test_prometheus_text_with_mixed_label_types():
+    metrics = Metrics()
+    metrics.incr("http_requests_total", status=200)
+    metrics.incr("http_requests_total", status="ConnectionError")
+    metrics.incr("http_retries_total", reason=429)
+    metrics.incr("http_retries_total", reason="ConnectionError")
+    metrics.observe("http_request_seconds", 0.02, status=200)
+    metrics.observe("http_request_seconds", 0.3, status="Timeout")
+
+    text = metrics.prometheus_text()
+
+    assert 'recipe_http_requests_total{status="200"} 1' in text
+    assert 'recipe_http_requests_total{status="ConnectionError"} 1' in text
+    assert 'recipe_http_retries_total{reason="429"} 1' in text
+    assert 'recipe_http_request_seconds_count{status="Timeout"} 1' in text
+
+def test_counter_lookup_matches_recorded_labels():
+    metrics = Metrics()
+    metrics.incr("http_requests_total", status=200)
+    metrics.incr("http_requests_total", status=200)
+    metrics.incr("http_requests_total", status=404)
+
+    assert metrics.counter("http_requests_total", status=200) == 2
+    assert metrics.counter("http_requests_total") == 3
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics()
+    for seconds in (0.001, 0.02, 0.02, 40.0):
+        metrics.observe("op_seconds", seconds)
+
+    text = metrics.prometheus_text()
+
+    assert 'recipe_op_seconds_bucket{le="0.005"} 1' in text
+    assert 'recipe_op_seconds_bucket{le="0.025"} 3' in text
+    assert 'recipe_op_seconds_bucket{le="+Inf"} 4' in text
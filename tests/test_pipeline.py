@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from engine.pipeline import Stage, run_pipeline
+
+def live_pipeline_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")]
+
+def test_items_flow_through_every_stage():
+    stages = [Stage("double", lambda x: [x * 2], workers=3), Stage("split", lambda x: [x, x + 1], workers=2)]
+
+    results = sorted(run_pipeline(range(10), stages, queue_size=2))
+
+    assert results == sorted([2 * x for x in range(10)] + [2 * x + 1 for x in range(10)])
+    assert live_pipeline_threads() == []
+
+def test_stage_error_is_raised_and_stops_every_stage():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("bad item")
+        return [x]
+
+    with pytest.raises(ValueError, match="bad item"):
+        list(run_pipeline(range(1000), [Stage("check", fail_on_three, workers=2), Stage("pass", lambda x: [x])]))
+    assert live_pipeline_threads() == []
+
+def test_source_error_is_raised():
+    def source():
+        yield 1
+        raise RuntimeError("search failed")
+
+    with pytest.raises(RuntimeError, match="search failed"):
+        list(run_pipeline(source(), [Stage("pass", lambda x: [x])]))
+    assert live_pipeline_threads() == []
+
+def test_cancel_stops_the_pipeline():
+    cancelled = threading.Event()
+    processed = []
+
+    def slow(x):
+        processed.append(x)
+        time.sleep(0.01)
+        return [x]
+
+    results = []
+    for item in run_pipeline(range(1000), [Stage("slow", slow, workers=2)], cancelled=cancelled.is_set):
+        results.append(item)
+        if len(results) == 3:
+            cancelled.set()
+
+    assert 3 <= len(results) < 1000
+    assert len(processed) < 1000
+    assert live_pipeline_threads() == []
+
+def test_closing_the_generator_stops_the_pipeline():
+    pipeline = run_pipeline(iter(range(1000)), [Stage("pass", lambda x: [x], workers=2)], queue_size=1)
+    assert next(pipeline) is not None
+    pipeline.close()
+
+    assert live_pipeline_threads() == []
+
+def test_empty_source():
+    assert list(run_pipeline([], [Stage("pass", lambda x: [x], workers=4)])) == []
@@ -0,0 +1,146 @@
+import threading
+
+import pytest
+
+from engine import cache as cache_module
+from engine import recipes
+from engine.recipes import DEFAULT_RECIPE_RESULTS, MAX_RECIPE_RESULTS, default_recipe_results
+
+def test_default_result_count_is_two_unless_raised(monkeypatch):
+    monkeypatch.delenv("RECIPE_DEFAULT_RESULTS", raising=False)
+    assert default_recipe_results() == DEFAULT_RECIPE_RESULTS == 2
+
+    monkeypatch.setenv("RECIPE_DEFAULT_RESULTS", "10")
+    assert default_recipe_results() == 10
+
+    monkeypatch.setenv("RECIPE_DEFAULT_RESULTS", "5000")
+    assert default_recipe_results() == MAX_RECIPE_RESULTS
+
+# ----- informationBulk batching -----
+
+class FakeCorpus:
+    def __init__(self):
+        self.added = []
+
+    def covers(self, food_list, number, refresh):
+        return False
+
+    def add_many(self, recipes):
+        self.added.extend(recipes)
+
+    def record_search(self, food_list, number):
+        pass
+
+def test_recipe_information_is_fetched_fifty_ids_at_a_time(monkeypatch):
+    corpus = FakeCorpus()
+    chunks = []
+    lock = threading.Lock()
+    items = [{"id": i, "title": f"Recipe {i}", "missedIngredients": [{"name": "salt"}]} for i in range(1, 121)]
+
+    def fetch_recipe_information(chunk):
+        with lock:
+            chunks.append(list(chunk))
+        # Recipe 7 has no page, so it is left out.
+        return [{"id": i, "spoonacularSourceUrl": f"https://example.com/{i}"} for i in reversed(chunk) if i != 7]
+
+    monkeypatch.setenv("RECIPE_CORPUS_MODE", "remote")
+    monkeypatch.setattr(recipes, "get_recipe_corpus", lambda: corpus)
+    monkeypatch.setattr(recipes, "find_by_ingredients", lambda food_list, number: items[:number])
+    monkeypatch.setattr(recipes, "fetch_recipe_information", fetch_recipe_information)
+
+    urls, missed = recipes.fetch_recipe_data(["rice"], number=120)
+
+    assert sorted(chunks) == [list(range(1, 51)), list(range(51, 101))]
+    assert urls == [f"https://example.com/{i}" for i in range(1, 101) if i != 7]
+    assert missed["Recipe 1"] == ["salt"] and "Recipe 7" not in missed
+    assert len(corpus.added) == 99
+
+# ----- Parsed recipe store -----
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return clock
+
+@pytest.fixture
+def store(tmp_path, monkeypatch, clock):
+    monkeypatch.setenv("RECIPE_STORE_PATH", str(tmp_path / "recipes.sqlite3"))
+    monkeypatch.setenv("RECIPE_STORE_TTL", "3600")
+    monkeypatch.setenv("RECIPE_STORE_MAX_ENTRIES", "3")
+    monkeypatch.setattr(recipes, "_recipe_store", None)
+    store = recipes.get_recipe_store()
+    yield store
+    store.close()
+
+@pytest.fixture
+def scraped(monkeypatch):
+    urls = []
+    lock = threading.Lock()
+
+    def scrape_recipe_page(url):
+        with lock:
+            urls.append(url)
+        name = "Unknown Recipe" if "broken" in url else url.rsplit("/", 1)[-1]
+        return {"name": name, "ingredients": ["rice"] if name != "Unknown Recipe" else []}, {"Calories": 100}
+
+    monkeypatch.setattr(recipes, "scrape_recipe_page", scrape_recipe_page)
+    return urls
+
+def test_recipe_keys_ignore_query_fragment_and_host_case():
+    key = recipes.recipe_key("https://Spoonacular.com/pasta-1/?utm=x#reviews")
+
+    assert key == recipes.recipe_key("https://spoonacular.com/pasta-1")
+    assert key.startswith(f"recipe:v{recipes.RECIPE_PARSER_VERSION}:")
+
+def test_stored_recipes_are_not_scraped_again(store, scraped):
+    urls = ["https://example.com/a", "https://example.com/broken", "https://example.com/b"]
+
+    first = recipes.scrape_recipe_details(urls)
+    second = recipes.scrape_recipe_details(urls)
+
+    assert [details["name"] for details, _ in second] == ["a", "Unknown Recipe", "b"]
+    assert second == first
+    # Incomplete records are never stored, so only the broken page is retried.
+    assert sorted(scraped) == sorted(urls) + ["https://example.com/broken"]
+
+def test_parser_version_bump_ignores_old_records(store, scraped, monkeypatch):
+    recipes.scrape_recipe_details(["https://example.com/a"])
+
+    monkeypatch.setattr(recipes, "RECIPE_PARSER_VERSION", recipes.RECIPE_PARSER_VERSION + 1)
+    recipes.scrape_recipe_details(["https://example.com/a"])
+
+    assert scraped == ["https://example.com/a"] * 2
+
+def test_stale_records_are_scraped_again(store, scraped, clock):
+    recipes.scrape_recipe_details(["https://example.com/a"])
+
+    clock.now += 3600
+    recipes.scrape_recipe_details(["https://example.com/a"])
+    assert len(scraped) == 1
+
+    clock.now += 1
+    recipes.scrape_recipe_details(["https://example.com/a"])
+    assert len(scraped) == 2
+
+def test_least_recently_used_records_are_evicted(store, scraped, clock):
+    for name in ["a", "b", "c"]:
+        clock.now += 1
+        recipes.scrape_recipe_details([f"https://example.com/{name}"])
+
+    clock.now += 1
+    recipes.scrape_recipe_details(["https://example.com/a"])
+    clock.now += 1
+    recipes.scrape_recipe_details(["https://example.com/d"])
+
+    assert store.stats()["entries"] == 3
+    scraped.clear()
+    recipes.scrape_recipe_details([f"https://example.com/{name}" for name in "abcd"])
+    assert scraped == ["https://example.com/b"]
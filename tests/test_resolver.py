@@ -0,0 +1,41 @@
+import pytest
+
+from engine.resolver import FoodResolver
+
+@pytest.fixture
+def resolver(tmp_path):
+    resolver = FoodResolver(str(tmp_path / "resolver.sqlite3"))
+    yield resolver
+    resolver.close()
+
+def pick(resolver, query, fdc_id, description, times=2):
+    for _ in range(times):
+        resolver.record(query, fdc_id, description)
+
+def test_single_pick_is_not_enough(resolver):
+    pick(resolver, "salted butter", 1, "Butter, salted", times=1)
+
+    assert resolver.resolve("salted butter") is None
+
+def test_same_words_resolve(resolver):
+    pick(resolver, "chicken breast", 3, "Chicken, breast")
+
+    assert resolver.resolve("Breasts, chicken")["fdcId"] == 3
+    assert resolver.resolve("chicken breast")["fdcId"] == 3
+
+def test_similar_spelling_with_different_words_does_not_resolve(resolver):
+    pick(resolver, "salted butter", 1, "Butter, salted")
+
+    assert resolver.resolve("unsalted butter") is None
+
+def test_divided_choices_do_not_resolve(resolver):
+    pick(resolver, "rice", 10, "Rice, white")
+    pick(resolver, "rice", 11, "Rice, brown")
+
+    assert resolver.resolve("rice") is None
+
+def test_forget(resolver):
+    pick(resolver, "rice", 10, "Rice, white")
+    resolver.forget("rice")
+
+    assert resolver.resolve("rice") is None
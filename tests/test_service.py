@@ -0,0 +1,166 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+import pytest
+
+from engine import service as service_module
+from engine.resolver import FoodResolver
+from engine.service import Coalescer, RecipeService, Request
+
+@pytest.fixture
+def service(tmp_path):
+    service = RecipeService(workers=4, session_ttl=60)
+    service._resolver = FoodResolver(str(tmp_path / "resolver.sqlite3"))
+
+    # Sessions never reach USDA: searches find nothing and details are missing.
+    async def search_foods(query):
+        return {"foods": [{"fdcId": 1, "description": query}]}
+
+    async def food_details(fdc_id):
+        return None
+
+    service.search_foods = search_foods
+    service.food_details = food_details
+    yield service
+    service._resolver.close()
+    service._executor.shutdown(wait=True)
+
+def dispatch(service, method, target, body=None):
+    raw = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8") if body is not None else b""
+    return asyncio.run(service.dispatch(Request(method, target, {}, raw)))
+
+def new_session(service):
+    status, payload = dispatch(service, "POST", "/sessions")
+    assert status == HTTPStatus.CREATED
+    return payload["session"]
+
+# ----- Routing -----
+
+def test_routes_and_unknown_paths(service):
+    assert dispatch(service, "GET", "/health/") == (HTTPStatus.OK, {"status": "ok", "sessions": 0})
+    assert dispatch(service, "GET", "/nothing")[0] == HTTPStatus.NOT_FOUND
+    assert dispatch(service, "POST", "/health")[0] == HTTPStatus.NOT_FOUND
+    assert dispatch(service, "GET", "/sessions/missing")[0] == HTTPStatus.NOT_FOUND
+    assert dispatch(service, "GET", "/foods/search")[0] == HTTPStatus.BAD_REQUEST
+
+# ----- Input Validation -----
+
+@pytest.mark.parametrize("body", [
+    b"{not json",
+    b"[1, 2]",
+    {"ingredients": "rice"},
+    {"ingredients": [1]},
+    {"ingredients": ["  "]},
+    {"ingredients": ["rice"], "number": "5"},
+    {"ingredients": ["rice"], "number": True},
+    {"ingredients": ["rice"], "resolve": "yes"}
+])
+def test_bad_recipe_bodies_are_rejected(service, body):
+    status, payload = dispatch(service, "POST", "/recipes", body)
+
+    assert status == HTTPStatus.BAD_REQUEST
+    assert "error" in payload
+
+@pytest.mark.parametrize("grams", ["abc", None, -1, "nan", "inf", b"1e309"])
+def test_bad_grams_are_rejected(service, grams):
+    session_id = new_session(service)
+    body = b'{"name": "rice", "grams": 1e309}' if isinstance(grams, bytes) else {"name": "rice", "grams": grams}
+
+    status, payload = dispatch(service, "POST", f"/sessions/{session_id}/items", body)
+
+    assert status == HTTPStatus.BAD_REQUEST
+    assert "grams" in payload["error"]
+    assert service.sessions[session_id].meal.items == {}
+
+def test_bad_item_fields_are_rejected(service):
+    session_id = new_session(service)
+
+    assert dispatch(service, "POST", f"/sessions/{session_id}/items", {"name": 5, "grams": 10})[0] == HTTPStatus.BAD_REQUEST
+    assert dispatch(service, "POST", f"/sessions/{session_id}/items", {"name": "", "grams": 10})[0] == HTTPStatus.BAD_REQUEST
+    assert dispatch(service, "POST", f"/sessions/{session_id}/items", {"name": "rice", "grams": 10, "fdcId": "1"})[0] == HTTPStatus.BAD_REQUEST
+    assert dispatch(service, "PATCH", f"/sessions/{session_id}/items/9", {"grams": 10})[0] == HTTPStatus.NOT_FOUND
+
+# ----- Sessions -----
+
+def test_sessions_are_isolated(service):
+    first = new_session(service)
+    second = new_session(service)
+
+    status, payload = dispatch(service, "POST", f"/sessions/{first}/items", {"name": "rice", "grams": 150})
+    assert status == HTTPStatus.CREATED
+    assert payload["candidates"]["foods"][0]["description"] == "rice"
+
+    assert [item["name"] for item in dispatch(service, "GET", f"/sessions/{first}")[1]["items"]] == ["rice"]
+    assert dispatch(service, "GET", f"/sessions/{second}")[1]["items"] == []
+
+    assert dispatch(service, "DELETE", f"/sessions/{first}")[0] == HTTPStatus.NO_CONTENT
+    assert dispatch(service, "GET", f"/sessions/{first}")[0] == HTTPStatus.NOT_FOUND
+    assert dispatch(service, "GET", f"/sessions/{second}")[0] == HTTPStatus.OK
+
+def test_idle_sessions_expire(service, monkeypatch):
+    idle = new_session(service)
+    active = new_session(service)
+    service.sessions[idle].touched = time.monotonic() - 120
+    monkeypatch.setattr(service_module, "SESSION_SWEEP_SECONDS", 0)
+
+    async def sweep_once():
+        sweeper = asyncio.create_task(service.sweep_sessions())
+        await asyncio.sleep(0.01)
+        sweeper.cancel()
+
+    asyncio.run(sweep_once())
+
+    assert list(service.sessions) == [active]
+
+# ----- Coalescing -----
+
+def test_identical_calls_share_one_upstream_call():
+    release = threading.Event()
+    calls = []
+
+    def lookup(query):
+        calls.append(query)
+        release.wait(5)
+        return {"query": query}
+
+    async def burst(coalescer):
+        waiters = [asyncio.ensure_future(coalescer.run(("search", "rice"), lookup, "rice")) for _ in range(5)]
+        other = asyncio.ensure_future(coalescer.run(("search", "oats"), lookup, "oats"))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*waiters), await other
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results, other = asyncio.run(burst(Coalescer(executor)))
+
+    assert sorted(calls) == ["oats", "rice"]
+    assert results == [{"query": "rice"}] * 5
+    assert other == {"query": "oats"}
+
+def test_errors_reach_every_waiter_and_are_not_kept():
+    release = threading.Event()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        release.wait(5)
+        raise RuntimeError("upstream down")
+
+    async def burst(coalescer):
+        waiters = [asyncio.ensure_future(coalescer.run(("food", 1), failing)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        retry = await asyncio.gather(coalescer.run(("food", 1), failing), return_exceptions=True)
+        return results, retry
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results, retry = asyncio.run(burst(Coalescer(executor)))
+
+    assert all(isinstance(result, RuntimeError) and str(result) == "upstream down" for result in results)
+    assert isinstance(retry[0], RuntimeError)
+    assert len(calls) == 2
@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from engine import usda
+from engine.cache import ResponseCache, food_key
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    monkeypatch.setattr(usda, "_response_cache", cache)
+    monkeypatch.setattr(usda, "_food_database", None)
+    monkeypatch.setattr(usda, "_food_database_loaded", True)
+    yield cache
+    cache.close()
+
+@pytest.fixture
+def chunks(monkeypatch):
+    sent = []
+    lock = threading.Lock()
+
+    # USDA returns the foods of a chunk in no particular order.
+    def fetch_food_chunk(chunk):
+        with lock:
+            sent.append(list(chunk))
+        return [{"fdcId": f_ID, "description": f"food {f_ID}"} for f_ID in reversed(chunk)]
+
+    monkeypatch.setattr(usda, "fetch_food_chunk", fetch_food_chunk)
+    return sent
+
+def test_details_are_fetched_in_chunks_of_twenty(response_cache, chunks):
+    ids = list(range(1000, 1045))
+
+    foods = usda.fetch_food_details(ids + ids[:5])
+
+    assert sorted(chunks) == [ids[0:20], ids[20:40], ids[40:45]]
+    assert all(len(chunk) <= usda.FDC_MAX_IDS_PER_REQUEST for chunk in chunks)
+    assert sorted(foods) == ids
+    assert all(foods[f_ID]["fdcId"] == f_ID for f_ID in ids)
+
+def test_cached_details_are_not_fetched_again(response_cache, chunks):
+    response_cache.set(food_key(7), {"fdcId": 7, "description": "cached"})
+
+    foods = usda.fetch_food_details([5, 7, 9])
+    assert chunks == [[5, 9]]
+    assert foods[7]["description"] == "cached"
+
+    chunks.clear()
+    assert sorted(usda.fetch_food_details([9, 5, 7])) == [5, 7, 9]
+    assert chunks == []
+
+def test_local_only_lookup_sends_nothing(response_cache, chunks):
+    response_cache.set(food_key(7), {"fdcId": 7, "description": "cached"})
+
+    assert list(usda.fetch_food_details([5, 7], remote=False)) == [7]
+    assert chunks == []
+
+# ----- Type-ahead suggestions -----
+
+class FakeHttpClient:
+    def __init__(self, release=None):
+        self.queries = []
+        self.release = release
+
+    def get(self, url, params=None, **kwargs):
+        self.queries.append(params["query"])
+        if self.release is not None:
+            self.release.wait(5)
+        foods = [{"fdcId": i, "description": f"{params['query']} {i}"} for i in range(20)]
+        return type("Response", (), {"json": lambda self: {"foods": foods}})()
+
+def test_short_queries_send_nothing(response_cache, monkeypatch):
+    client = FakeHttpClient()
+    monkeypatch.setattr(usda, "get_http_client", lambda: client)
+
+    assert usda.suggest_foods("ch") == []
+    assert usda.suggest_foods("  c  ") == []
+    assert client.queries == []
+
+def test_suggestions_are_limited_and_warm_the_search_cache(response_cache, monkeypatch):
+    client = FakeHttpClient()
+    monkeypatch.setattr(usda, "get_http_client", lambda: client)
+
+    suggestions = usda.suggest_foods("Chedd")
+    assert len(suggestions) == usda.DEFAULT_SUGGESTIONS
+    assert len(usda.suggest_foods("chedd", limit=3)) == 3
+
+    # Picking the typed name later is answered from the cache.
+    assert usda.search_foods("chedd")["foods"][:usda.DEFAULT_SUGGESTIONS] == suggestions
+    assert client.queries == ["chedd"]
+
+def test_concurrent_identical_suggestions_share_one_request(response_cache, monkeypatch):
+    release = threading.Event()
+    client = FakeHttpClient(release)
+    monkeypatch.setattr(usda, "get_http_client", lambda: client)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(usda.suggest_foods("cheddar"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert client.queries == ["cheddar"]
+    assert len(results) == 4 and all(result == results[0] for result in results)
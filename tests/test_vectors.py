@@ -0,0 +1,33 @@
+import numpy as np
+
+from engine.vectors import NUTRIENT_PANEL, PANEL_INDEX, PANEL_SIZE, meal_totals, nutrient_vector
+
+def test_panel_ids_are_unique_and_the_main_panel_leads():
+    ids = [nutrient_id for nutrient_id, _, _ in NUTRIENT_PANEL]
+
+    assert len(set(ids)) == PANEL_SIZE
+    assert ids[:4] == [1008, 1062, 1003, 1004]
+    assert PANEL_INDEX[1257] == 58
+
+def test_minor_nutrients_are_parsed_by_id_and_by_name():
+    USDA_json = {"foodNutrients": [
+        {"nutrient": {"id": 1210, "name": "Tryptophan", "unitName": "g"}, "amount": 0.3},
+        {"nutrient": {"id": 1265, "name": "SFA 16:0", "unitName": "g"}, "amount": 2.5},
+        {"nutrientName": "Beta-sitosterol", "unitName": "MG", "value": 60},
+        {"nutrient": {"id": 1024, "name": "Specific Gravity", "unitName": "sp gr"}, "amount": 1.1}
+    ]}
+
+    vector, present = nutrient_vector(USDA_json)
+
+    assert present.sum() == 3
+    assert vector[PANEL_INDEX[1210]] == 0.3
+    assert vector[PANEL_INDEX[1265]] == 2.5
+    assert vector[PANEL_INDEX[1286]] == 60
+
+def test_meal_totals_scale_every_slot():
+    vectors = np.arange(2 * PANEL_SIZE, dtype=float).reshape(2, PANEL_SIZE)
+
+    totals = meal_totals(vectors, [50, 200])
+
+    assert np.allclose(totals, vectors[0] * 0.5 + vectors[1] * 2)
+    assert not meal_totals([], []).any()